@@ -0,0 +1,210 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, replace
+from datetime import datetime
+from typing import Callable, Dict, List
+
+try:
+    import resource
+except ImportError:
+    # Windows: пиковая память не измеряется
+    resource = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.smp_benchmark.instance_generator import InstanceParams, generate_instance
+
+# Наборы размеров сценариев для оценки масштабирования
+PRESETS: Dict[str, InstanceParams] = {
+    'small': InstanceParams(n_ports=15, n_edges=25, n_vessels=10, n_icebreakers=2, duration_days=3, cross_days=1),
+    'medium': InstanceParams(n_ports=45, n_edges=75, n_vessels=40, n_icebreakers=4, duration_days=7, cross_days=2),
+    'large': InstanceParams(n_ports=80, n_edges=140, n_vessels=120, n_icebreakers=8, duration_days=14, cross_days=3),
+}
+
+
+def get_peak_rss_mb() -> float:
+    """
+    Пиковая резидентная память процесса в МБ
+    """
+    if resource is None:
+        return float('nan')
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает КБ, macOS - байты
+    return peak_rss / 1024 ** 2 if sys.platform == 'darwin' else peak_rss / 1024
+
+
+def get_current_rss_mb() -> float:
+    """
+    Текущая резидентная память процесса в МБ (только Linux)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        return float('nan')
+
+
+def measure_stage(stages: List[dict], name: str, func: Callable):
+    """
+    Выполнение этапа с замером времени и памяти
+    """
+    start = time.perf_counter()
+    result = func()
+    stages.append({
+        'stage': name,
+        'wall_time_sec': round(time.perf_counter() - start, 3),
+        'peak_rss_mb': round(get_peak_rss_mb(), 1),
+        'rss_mb': round(get_current_rss_mb(), 1),
+    })
+    print(f'Этап {name}: {stages[-1]}')
+    return result
+
+
+def run_instance(instance_folder_path: str, model_backend: str) -> dict:
+    """
+    Прогон модели на сценарии по этапам. Выполняется в отдельном процессе, чтобы пиковая память
+    не накапливалась между сценариями
+    """
+    from src.smp_model.input import ModelInput
+    from src.smp_model.model import Model
+    from src.smp_scenario.scenario_config import ScenarioConfig
+
+    input_folder_path = os.path.join(instance_folder_path, 'input')
+    output_folder_path = os.path.join(instance_folder_path, 'output')
+    os.makedirs(output_folder_path, exist_ok=True)
+    model_config = ScenarioConfig.create_from_json(os.path.join(input_folder_path, 'config.json')).get_model_config()
+    # Снимок входных данных не используется: замеряется полное построение
+    model_config.use_input_snapshot = False
+    model_config.model_backend = model_backend
+
+    stages = []
+    model_input = measure_stage(
+        stages, 'input', lambda: ModelInput(input_folder_path, output_folder_path, model_config)
+    )
+    model = measure_stage(stages, 'create_model', lambda: Model(model_input))
+    measure_stage(stages, 'solve_model', model.solve_model)
+    try:
+        objective = model.get_objective_value()
+    except ValueError:
+        objective = None
+    measure_stage(stages, 'correct_results', model.correct_results)
+    measure_stage(stages, 'create_output', model.output.create_output)
+    model.save_telemetry()
+
+    return {
+        'stages': stages,
+        'total_wall_time_sec': round(sum(stage['wall_time_sec'] for stage in stages), 3),
+        'peak_rss_mb': round(get_peak_rss_mb(), 1),
+        'model_size': {
+            'time_points': len(model_input.times),
+            'departures': len(model_input.departures),
+            'locations': len(model_input.locations),
+            'edge_t_connections': len(model_input.edge_t_connections),
+            'variables': model.highs_model.num_col if model.highs_model else model.model.nvariables(),
+            'constraints': model.highs_model.num_row if model.highs_model else model.model.nconstraints(),
+        },
+        'objective': objective,
+        # Запуски решателя (подробно - solver_telemetry.json в папке output сценария)
+        'solver_runs': [
+            {
+                key: run.get(key)
+                for key in ('stage', 'status', 'is_time_limit_reached', 'gap', 'node_count', 'wall_time_sec')
+            }
+            for run in model.get_telemetry().runs
+        ],
+    }
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_benchmark(work_folder_path: str, instances: Dict[str, InstanceParams], model_backend: str = 'pyomo') -> dict:
+    """
+    Генерация сценариев и их прогон, каждый в новом процессе
+    """
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': get_git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'model_backend': model_backend,
+        'instances': [],
+    }
+    context = multiprocessing.get_context('spawn')
+    for name, params in instances.items():
+        print(f'Сценарий {name}: {params}')
+        instance_folder_path = os.path.join(work_folder_path, name)
+        generate_instance(os.path.join(instance_folder_path, 'input'), params)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_instance, instance_folder_path, model_backend).result()
+        report['instances'].append({'name': name, 'params': asdict(params), **result})
+    return report
+
+
+def print_comparison(report: dict, previous_report: dict) -> None:
+    """
+    Сравнение времени и памяти с предыдущим отчетом по одноименным сценариям
+    """
+    previous_instances = {instance['name']: instance for instance in previous_report['instances']}
+    for instance in report['instances']:
+        previous = previous_instances.get(instance['name'])
+        if previous is None:
+            continue
+        print(f"Сценарий {instance['name']} (текущий / предыдущий):")
+        previous_stages = {stage['stage']: stage for stage in previous['stages']}
+        for stage in instance['stages']:
+            if stage['stage'] in previous_stages and previous_stages[stage['stage']]['wall_time_sec'] > 0:
+                ratio = stage['wall_time_sec'] / previous_stages[stage['stage']]['wall_time_sec']
+                print(f"  {stage['stage']}: {stage['wall_time_sec']} / "
+                      f"{previous_stages[stage['stage']]['wall_time_sec']} сек (x{ratio:.2f})")
+        print(f"  пиковая память: {instance['peak_rss_mb']} / {previous['peak_rss_mb']} МБ")
+        print(f"  целевая функция: {instance['objective']} / {previous['objective']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Замер масштабирования модели на синтетических сценариях')
+    parser.add_argument('--sizes', nargs='+', default=['small', 'medium'], choices=list(PRESETS))
+    parser.add_argument('--custom', nargs='*', default=[],
+                        help='Дополнительные сценарии вида n_ports=60,n_vessels=80,duration_days=10')
+    parser.add_argument('--timelimit', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', default='pyomo', choices=['pyomo', 'highs', 'column_generation', 'greedy', 'lp_rounding'])
+    parser.add_argument('--work_folder', default=os.path.join('data', 'tmp', 'benchmark'))
+    parser.add_argument('--output', default=os.path.join('data', 'tmp', 'benchmark', 'report.json'))
+    parser.add_argument('--compare', help='Предыдущий отчет для сравнения')
+    args = parser.parse_args()
+
+    instances = {
+        size: replace(PRESETS[size], timelimit=args.timelimit, seed=args.seed)
+        for size in args.sizes
+    }
+    for i, custom in enumerate(args.custom):
+        values = dict(item.split('=') for item in custom.split(','))
+        params = replace(InstanceParams(), timelimit=args.timelimit, seed=args.seed)
+        params = replace(params, **{
+            key: type(getattr(params, key))(value) for key, value in values.items()
+        })
+        instances[f'custom_{i}'] = params
+
+    report = run_benchmark(args.work_folder, instances, args.backend)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'Отчет сохранен: {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
@@ -0,0 +1,237 @@
+import argparse
+import os
+import sys
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.smp_model.model import EUROPE_POINTS
+from src.smp_scenario.scenario_config import ScenarioConfig
+
+# Радиус Земли в морских милях
+EARTH_RADIUS_NM = 3440.065
+
+VESSEL_CLASS_TYPES = ['No', 'Arc 4', 'Arc 5', 'Arc 6', 'Arc 7']
+ICEBREAKER_CLASS_TYPES = ['Arc 9_1', 'Arc 9_2']
+
+# Таблица снижения скорости: class_type, integer_velocity_from, integer_velocity_to, is_icebreaker_assistance,
+# is_possible, speed_decrease_pct, base_speed
+SPEED_DECREASE_ROWS = [
+    *((class_type, 20, 22, 0, 1, 0, 'max_speed') for class_type in VESSEL_CLASS_TYPES[1:] + ICEBREAKER_CLASS_TYPES),
+    ('No', 20, 22, 0, 1, 0, 'max_speed'),
+    *((class_type, 15, 19, 1, 1, 20, 'max_speed') for class_type in ['Arc 4', 'Arc 5', 'Arc 6']),
+    ('Arc 7', 15, 19, 1, 1, 0, 'integer_velocity'),
+    ('Arc 7', 15, 19, 0, 1, 40, 'max_speed'),
+    ('Arc 9_1', 15, 19, 0, 1, 0, 'integer_velocity'),
+    ('Arc 9_2', 15, 19, 0, 1, 10, 'integer_velocity'),
+    ('No', 15, 19, 1, 1, 50, 'integer_velocity'),
+    *((class_type, 10, 14, 1, 1, 30, 'max_speed') for class_type in ['Arc 4', 'Arc 5', 'Arc 6']),
+    ('Arc 7', 10, 14, 1, 1, 20, 'integer_velocity'),
+    ('Arc 9_1', 10, 14, 0, 1, 0, 'integer_velocity'),
+    ('Arc 9_2', 10, 14, 0, 1, 25, 'integer_velocity'),
+    ('No', -10, 14, 0, 0, 100, 'max_speed'),
+    *((class_type, -10, 9, 0, 0, 100, 'max_speed') for class_type in VESSEL_CLASS_TYPES[1:] + ICEBREAKER_CLASS_TYPES),
+]
+
+
+@dataclass
+class InstanceParams:
+    """
+    Параметры синтетического сценария СМП
+    """
+    n_ports: int = 45
+    n_edges: int = 75
+    n_vessels: int = 40
+    n_icebreakers: int = 4
+    duration_days: int = 7
+    cross_days: int = 2
+    start_date: str = '27-02-2022'
+    timelimit: int = 60
+    k_bests: int = 5
+    seed: int = 0
+
+
+def generate_ports(params: InstanceParams, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Порты вдоль СМП: долгота равномерно от Баренцева до Берингова моря, широта 68-78
+    """
+    longitude = np.sort(rng.uniform(30, 190, params.n_ports))
+    latitude = rng.uniform(68, 78, params.n_ports)
+    return pd.DataFrame({
+        'point_id': np.arange(params.n_ports),
+        'latitude': np.round(latitude, 2),
+        'longitude': np.round(longitude, 2),
+        'point_name': [f'Порт {i}' for i in range(params.n_ports)],
+    })
+
+
+def calculate_distances(ports_df: pd.DataFrame) -> np.ndarray:
+    """
+    Матрица расстояний между портами по большому кругу в морских милях
+    """
+    lat = np.radians(ports_df['latitude'].to_numpy())
+    lon = np.radians(ports_df['longitude'].to_numpy())
+    d_lat = lat[:, None] - lat[None, :]
+    d_lon = lon[:, None] - lon[None, :]
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def generate_edges(params: InstanceParams, ports_df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Ребра графа СМП: каждый порт связан с ближайшим из портов западнее (граф связный),
+    остальные ребра - между ближайшими несвязанными парами портов
+    """
+    if params.n_edges < params.n_ports - 1:
+        raise ValueError(f'Для связного графа из {params.n_ports} портов нужно не менее {params.n_ports - 1} ребер')
+    distances = calculate_distances(ports_df)
+    pairs = set()
+    for i in range(1, params.n_ports):
+        j = int(np.argmin(distances[i, :i]))
+        pairs.add((j, i))
+    candidates = [
+        (distances[i, j] * rng.uniform(1, 1.5), i, j)
+        for i in range(params.n_ports)
+        for j in range(i + 1, params.n_ports)
+        if (i, j) not in pairs
+    ]
+    for _, i, j in sorted(candidates)[:params.n_edges - len(pairs)]:
+        pairs.add((i, j))
+
+    edges = sorted(pairs)
+    return pd.DataFrame({
+        'start_point_id': [i for i, _ in edges],
+        'end_point_id': [j for _, j in edges],
+        'length': [distances[i, j] for i, j in edges],
+        'avg_norm': 0.0,
+    })
+
+
+def generate_velocity_env(
+        params: InstanceParams,
+        ports_df: pd.DataFrame,
+        edges_df: pd.DataFrame,
+        rng: np.random.Generator,
+) -> pd.DataFrame:
+    """
+    Интегральная тяжесть льда на ребрах по неделям: тяжелее на востоке, с ослаблением к концу периода
+    """
+    start_date = datetime.strptime(params.start_date, '%d-%m-%Y')
+    n_weeks = (params.duration_days + params.cross_days) // 7 + 1
+    longitude = ports_df.set_index('point_id')['longitude']
+    mean_longitude = (
+        longitude[edges_df['start_point_id']].to_numpy() + longitude[edges_df['end_point_id']].to_numpy()
+    ) / 2
+    # Базовая тяжесть: ~21 на западе, ~11 на востоке
+    base_ice = 21 - 10 * (mean_longitude - 30) / 160 + rng.normal(0, 2, len(edges_df))
+    frames = []
+    for week in range(n_weeks):
+        frames.append(pd.DataFrame({
+            'start_point_id': edges_df['start_point_id'],
+            'end_point_id': edges_df['end_point_id'],
+            'avg_norm': np.clip(base_ice + week * 0.5 + rng.normal(0, 0.5, len(edges_df)), 5, 22),
+            'length': edges_df['length'].to_numpy() * rng.uniform(1, 1.1, len(edges_df)),
+            'date': start_date + timedelta(days=7 * week),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def generate_vessels(params: InstanceParams, ports_df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Заявки: случайные порты отправления и назначения, даты начала в пределах горизонта планирования
+    """
+    start_date = datetime.strptime(params.start_date, '%d-%m-%Y')
+    point_names = ports_df.set_index('point_id')['point_name']
+    rows = []
+    for i in range(params.n_vessels):
+        start_point_id, end_point_id = (int(x) for x in rng.choice(params.n_ports, 2, replace=False))
+        date_start = start_date + timedelta(days=int(rng.integers(0, params.duration_days)))
+        rows.append({
+            'vessel_id': i + 1,
+            'vessel_name': f'Судно {i + 1}',
+            'class_type': VESSEL_CLASS_TYPES[int(rng.integers(len(VESSEL_CLASS_TYPES)))],
+            'max_speed': int(rng.integers(12, 18)),
+            'start_point_name': point_names[start_point_id],
+            'start_point_id': start_point_id,
+            'end_point_name': point_names[end_point_id],
+            'end_point_id': end_point_id,
+            'date': date_start.strftime('%d.%m.%Y'),
+            'date_start': date_start,
+        })
+    return pd.DataFrame(rows)
+
+
+def generate_icebreakers(params: InstanceParams, ports_df: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Ледоколы. Первые два стартуют в западных портах, чтобы выполнялось ограничение на баланс ледоколов
+    """
+    if params.n_icebreakers < 2:
+        raise ValueError('Модель требует не менее двух ледоколов')
+    start_date = datetime.strptime(params.start_date, '%d-%m-%Y')
+    point_names = ports_df.set_index('point_id')['point_name']
+    europe_points = [p for p in EUROPE_POINTS if p < params.n_ports]
+    rows = []
+    for i in range(params.n_icebreakers):
+        if i < 2:
+            start_point_id = int(rng.choice(europe_points))
+        else:
+            start_point_id = int(rng.integers(params.n_ports))
+        rows.append({
+            'vessel_id': params.n_vessels + i + 1,
+            'vessel_name': f'Ледокол {i + 1}',
+            'class_type': ICEBREAKER_CLASS_TYPES[i % len(ICEBREAKER_CLASS_TYPES)],
+            'max_speed': float(rng.choice([18.5, 21.0, 22.0])),
+            'start_point_name': point_names[start_point_id],
+            'start_point_id': start_point_id,
+            'date_start': start_date,
+        })
+    return pd.DataFrame(rows)
+
+
+def generate_instance(input_folder_path: str, params: InstanceParams) -> None:
+    """
+    Генерация входных данных сценария: model_data.xlsx, velocity_env.xlsx и config.json
+    """
+    rng = np.random.default_rng(params.seed)
+    ports_df = generate_ports(params, rng)
+    edges_df = generate_edges(params, ports_df, rng)
+    velocity_env_df = generate_velocity_env(params, ports_df, edges_df, rng)
+    first_week_df = velocity_env_df[velocity_env_df['date'] == velocity_env_df['date'].min()]
+    edges_df['avg_norm'] = first_week_df['avg_norm'].to_numpy()
+    speed_decrease_df = pd.DataFrame(SPEED_DECREASE_ROWS, columns=[
+        'class_type', 'integer_velocity_from', 'integer_velocity_to', 'is_icebreaker_assistance',
+        'is_possible', 'speed_decrease_pct', 'base_speed',
+    ])
+
+    os.makedirs(input_folder_path, exist_ok=True)
+    with pd.ExcelWriter(os.path.join(input_folder_path, 'model_data.xlsx')) as writer:
+        ports_df.to_excel(writer, sheet_name='points', index=False)
+        edges_df.to_excel(writer, sheet_name='edges', index=False)
+        generate_vessels(params, ports_df, rng).to_excel(writer, sheet_name='vessels', index=False)
+        generate_icebreakers(params, ports_df, rng).to_excel(writer, sheet_name='icebreakers', index=False)
+        speed_decrease_df.to_excel(writer, sheet_name='speed_decrease', index=False)
+    with pd.ExcelWriter(os.path.join(input_folder_path, 'velocity_env.xlsx')) as writer:
+        velocity_env_df.to_excel(writer, index=False)
+
+    ScenarioConfig(
+        start_date=params.start_date,
+        duration_days=params.duration_days,
+        interval_hours=1,
+        cross_days=params.cross_days,
+        timelimit=params.timelimit,
+        k_bests=params.k_bests,
+    ).to_json(input_folder_path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Генерация синтетического сценария СМП')
+    parser.add_argument('input_folder_path')
+    for field_name, value in asdict(InstanceParams()).items():
+        parser.add_argument(f'--{field_name}', type=type(value), default=value)
+    args = vars(parser.parse_args())
+    input_folder_path = args.pop('input_folder_path')
+    generate_instance(input_folder_path, InstanceParams(**args))
@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def solve(input_folder_path: str, output_folder_path: str, args: argparse.Namespace, is_rolling: bool) -> float:
+    """
+    Решение сценария целиком или скользящим окном. Возвращает значение целевой функции
+    """
+    from src.smp_model.input import ModelInput
+    from src.smp_model.model import Model
+    from src.smp_scenario.scenario_config import ScenarioConfig
+
+    model_config = ScenarioConfig.create_from_json(os.path.join(input_folder_path, 'config.json')).get_model_config()
+    model_config.use_input_snapshot = False
+    model_config.model_backend = args.backend
+    model_config.timelimit = args.timelimit
+    if args.horizon_hours:
+        model_config.hours_in_horizon = args.horizon_hours
+        model_config.hours_in_cross = args.cross_hours
+    if is_rolling:
+        model_config.rolling_window_hours = args.window_hours
+        model_config.rolling_overlap_hours = args.overlap_hours
+
+    model = Model(ModelInput(input_folder_path, output_folder_path, model_config))
+    model.solve_model()
+    return model.get_objective_value()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Проверка решения скользящим окном: целевая функция не должна заметно отличаться '
+                    'от решения сценария целиком'
+    )
+    parser.add_argument('--scenario', default=os.path.join('data', 'scenarios', 'base'))
+    parser.add_argument('--backend', default='highs', choices=['pyomo', 'highs'])
+    parser.add_argument('--horizon_hours', type=int, default=96)
+    parser.add_argument('--cross_hours', type=int, default=24)
+    parser.add_argument('--window_hours', type=float, default=48)
+    parser.add_argument('--overlap_hours', type=float, default=12)
+    parser.add_argument('--timelimit', type=int, default=60)
+    parser.add_argument('--max_gap', type=float, default=0.25,
+                        help='Допустимое относительное превышение целевой функции решения скользящим окном')
+    parser.add_argument('--work_folder', default=os.path.join('data', 'tmp', 'rolling_horizon_check'))
+    args = parser.parse_args()
+
+    input_folder_path = os.path.join(args.scenario, 'input')
+    os.makedirs(args.work_folder, exist_ok=True)
+    full_objective = solve(input_folder_path, args.work_folder, args, is_rolling=False)
+    rolling_objective = solve(input_folder_path, args.work_folder, args, is_rolling=True)
+
+    gap = (rolling_objective - full_objective) / abs(full_objective)
+    print(f'Целевая функция: целиком {full_objective:.2f}, скользящим окном {rolling_objective:.2f} '
+          f'(превышение {gap:.1%}, допустимо {args.max_gap:.1%})')
+    if gap > args.max_gap:
+        sys.exit(1)
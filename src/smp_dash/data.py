@@ -6,6 +6,9 @@ import os
 import plotly.express as px
 import plotly.graph_objects as go
 
+from src.smp_model.excel_cache import read_excel_cached
+from src.smp_model.output_store import read_output_table
+
 
 class DashData:
     """
@@ -81,22 +84,20 @@ class DashData:
         input_folder_path = os.path.join(self.scenarios_folder_path, scenario_name, 'input')
         output_folder_path = os.path.join(self.scenarios_folder_path, scenario_name, 'output')
 
-        with pd.ExcelFile(os.path.join(input_folder_path, 'model_data.xlsx')) as reader:
-            ports_df = pd.read_excel(reader, sheet_name='points')
-            edges_df = pd.read_excel(reader, sheet_name='edges')
-            icebreakers_df = pd.read_excel(reader, sheet_name='icebreakers')
-            vessels_df = pd.read_excel(reader, sheet_name='vessels')
-        with pd.ExcelFile(os.path.join(input_folder_path, 'velocity_env.xlsx')) as reader:
-            velocity_df = pd.read_excel(reader, sheet_name='Sheet1')
-        with pd.ExcelFile(os.path.join(output_folder_path, 'departures.xlsx')) as reader:
-            result_departures_df = pd.read_excel(reader, sheet_name='Sheet1')
-        with pd.ExcelFile(os.path.join(output_folder_path, 'statistics.xlsx')) as reader:
-            summary_stat_df = pd.read_excel(reader, sheet_name='Общая статистика')
-            detailed_stat_df = pd.read_excel(reader, sheet_name='Частная статистика')
-        with pd.ExcelFile(os.path.join(output_folder_path, 'start_planning_dates.xlsx')) as reader:
-            start_planning_dates_df = pd.read_excel(reader, sheet_name='Sheet1')
-        with pd.ExcelFile(os.path.join(output_folder_path, 'vessel_best_routes.xlsx')) as reader:
-            vessel_best_routes_df = pd.read_excel(reader, sheet_name='Sheet1')
+        model_data = read_excel_cached(
+            os.path.join(input_folder_path, 'model_data.xlsx'),
+            ['points', 'edges', 'icebreakers', 'vessels'],
+        )
+        ports_df = model_data['points']
+        edges_df = model_data['edges']
+        icebreakers_df = model_data['icebreakers']
+        vessels_df = model_data['vessels']
+        velocity_df = read_excel_cached(os.path.join(input_folder_path, 'velocity_env.xlsx'), ['Sheet1'])['Sheet1']
+        result_departures_df = read_output_table(output_folder_path, 'departures')
+        summary_stat_df = read_output_table(output_folder_path, 'summary_statistics')
+        detailed_stat_df = read_output_table(output_folder_path, 'detailed_statistics')
+        start_planning_dates_df = read_output_table(output_folder_path, 'start_planning_dates')
+        vessel_best_routes_df = read_output_table(output_folder_path, 'vessel_best_routes')
 
         self.add_edge_type(result_departures_df)
         self.ports_dict[scenario_name] = (
@@ -4,6 +4,9 @@ from typing import List
 import plotly.express as px
 import pandas as pd
 
+from src.smp_model.excel_cache import read_excel_cached
+from src.smp_model.output_store import read_output_table, save_output_table
+
 
 class ModelDash:
     """
@@ -15,14 +18,16 @@ class ModelDash:
         self.output_folder_path = output_folder_path
         self.scenario_start_dates = scenario_start_dates
 
-        with pd.ExcelFile(os.path.join(input_folder_path, 'model_data.xlsx')) as reader:
-            self.ports_df = pd.read_excel(reader, sheet_name='points')
-            self.edges_df = pd.read_excel(reader, sheet_name='edges')
-            self.icebreakers_df = pd.read_excel(reader, sheet_name='icebreakers')
-            self.vessels_df = pd.read_excel(reader, sheet_name='vessels')
-        with pd.ExcelFile(os.path.join(output_folder_path, 'departures.xlsx')) as reader:
-            self.result_departures_df = pd.read_excel(reader, sheet_name='Sheet1')
-            self.collect_kpi(output_folder_path, self.result_departures_df)
+        model_data = read_excel_cached(
+            os.path.join(input_folder_path, 'model_data.xlsx'),
+            ['points', 'edges', 'icebreakers', 'vessels'],
+        )
+        self.ports_df = model_data['points']
+        self.edges_df = model_data['edges']
+        self.icebreakers_df = model_data['icebreakers']
+        self.vessels_df = model_data['vessels']
+        self.result_departures_df = read_output_table(output_folder_path, 'departures')
+        self.collect_kpi(output_folder_path, self.result_departures_df)
 
         self.fill_miss_intervals()
         self.ports_dict = self.ports_df.set_index('point_id').to_dict(orient='index')
@@ -53,11 +58,13 @@ class ModelDash:
                 row['time_to_dt'] = curr_date
                 res_df = pd.concat([res_df, pd.DataFrame(row).T], ignore_index=True)
                 last_date = temp_df['time_to_dt'].iloc[i]
+        # Ожидания между отправлениями обычно уже добавлены в выходные данные: заполнять нечего
+        if res_df.empty:
+            return
         res_df = res_df[res_df['duration'] >= 0]
         self.result_departures_df = pd.concat([self.result_departures_df, res_df], ignore_index=True)
 
-        with pd.ExcelWriter(os.path.join(self.output_folder_path, 'departures.xlsx')) as writer:
-            self.result_departures_df.to_excel(writer, index=False)
+        save_output_table(self.result_departures_df, self.output_folder_path, 'departures')
 
     def plot_results(self):
         """
@@ -441,6 +448,5 @@ class ModelDash:
         summary_df.index.name = 'Тип судна'
         summary_df = summary_df.round(3)
         partial_statistic_df = partial_statistic_df.round(3)
-        with pd.ExcelWriter(os.path.join(output_path, 'statistics.xlsx')) as writer:
-            summary_df.to_excel(writer, sheet_name='Общая статистика')
-            partial_statistic_df.to_excel(writer, sheet_name='Частная статистика', index=False)
+        save_output_table(summary_df.reset_index(), output_path, 'summary_statistics')
+        save_output_table(partial_statistic_df, output_path, 'detailed_statistics')
@@ -0,0 +1,279 @@
+import time
+from typing import List, Optional, Tuple
+
+import highspy
+import numpy as np
+
+from src.smp_model.highs_model import HighsModel
+from src.smp_model.input import ModelInput
+
+# Допуск отрицательной приведенной стоимости маршрута
+EPS = 1e-6
+# Стоимость искусственной переменной баланса ледоколов (пока маршрутов ледоколов не хватает, а в целочисленном
+# решении - если ни один сгенерированный маршрут ледокола не заканчивается в порту баланса)
+ARTIFICIAL_COST = 1e6
+
+
+class ColumnGenerationModel(HighsModel):
+    """
+    Модель в форме выбора маршрутов: переменная - маршрут судна (цепочка отправлений от стартовой вершины
+    до вершины остановки). Ограничения: ровно один маршрут у каждого судна (одна остановка), максимальное
+    количество судов в караване и баланс ледоколов - как в HighsModel.
+
+    Маршруты генерируются по двойственным оценкам LP-релаксации: для каждого судна ищется маршрут
+    с минимальной приведенной стоимостью. Сеть судна упорядочена по времени (прибытие всегда позже
+    отправления), поэтому кратчайший путь находится одним проходом по моментам времени для всех судов сразу.
+    После генерации решается целочисленная задача на сгенерированных маршрутах. Искусственная переменная баланса
+    ледоколов остается в ней со штрафом: задача всегда допустима, невыполненный баланс выводится в лог
+    """
+    def __init__(self, input: ModelInput, icebreaker_end_ports: List[int], max_iterations: int = 100) -> None:
+        super().__init__(input, icebreaker_end_ports)
+        self.max_iterations = max_iterations
+
+        # Маршруты: (позиция судна, позиции отправлений, позиция вершины остановки)
+        self.routes: List[Tuple[int, np.ndarray, int]] = []
+        # Номера столбцов маршрутов по ключу (судно, остановка, отправления)
+        self.route_columns = {}
+        # Столбцы маршрутов начального решения
+        self.start_columns: List[int] = []
+        # Столбцы маршрутов, в которых судно остается в стартовой вершине
+        self.stay_columns: List[int] = []
+
+        self.n_vessels = len(input.vessels)
+        self.n_convoy_rows = 0
+        self.is_icebreaker_end_location = np.empty(0, dtype=bool)
+        self.departure_cost = np.empty(0, dtype=float)
+        self.stop_cost = np.empty(0, dtype=float)
+        self.start_locations = np.empty(0, dtype=np.int64)
+        # Отправления, сгруппированные по моментам времени (в порядке возрастания)
+        self.time_layers: List[np.ndarray] = []
+        # Вершины, сгруппированные по судам
+        self.vessel_locations: List[np.ndarray] = []
+
+    def create_model(self) -> None:
+        departure_arrays = self.input.departure_arrays
+        location_arrays = self.input.location_arrays
+
+        self.convoy_coefficients, self.convoy_rows, self.n_convoy_rows = self.get_convoy_rows()
+        self.is_icebreaker_end_location = self.get_icebreaker_end_locations()
+        self.departure_cost, self.stop_cost = self.get_costs()
+        self.start_locations = np.array(
+            [self.input.locations_dict.find((v, v.port_start, v.time_start)) for v in self.input.vessels],
+            dtype=np.int64,
+        )
+
+        departure_order = np.argsort(departure_arrays.time, kind='stable')
+        self.time_layers = np.split(
+            departure_order, np.nonzero(np.diff(departure_arrays.time[departure_order]))[0] + 1
+        )
+        location_order = np.argsort(location_arrays.vessel_idx, kind='stable')
+        self.vessel_locations = np.split(
+            location_order,
+            np.searchsorted(location_arrays.vessel_idx[location_order], np.arange(1, self.n_vessels)),
+        )
+
+        # Строки: одна остановка для каждого судна, караваны на (ребро, время), баланс ледоколов
+        self.num_row = self.n_vessels + self.n_convoy_rows + 1
+        self.icebreaker_balance_row = self.num_row - 1
+        highs = self.get_highs()
+        highs.setOptionValue('output_flag', False)
+        highs.addRows(
+            self.num_row,
+            np.concatenate((np.ones(self.n_vessels), np.full(self.n_convoy_rows, -highspy.kHighsInf), [2])),
+            np.concatenate((np.ones(self.n_vessels), np.zeros(self.n_convoy_rows), [highspy.kHighsInf])),
+            0,
+            np.zeros(self.num_row, dtype=np.int32),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=float),
+        )
+        # Искусственная переменная баланса ледоколов (только для LP-релаксации)
+        highs.addCol(
+            ARTIFICIAL_COST, 0, highspy.kHighsInf,
+            1, np.array([self.icebreaker_balance_row], dtype=np.int32), np.ones(1),
+        )
+        self.num_col = 1
+
+        # Начальные маршруты: судно остается в стартовой вершине
+        self.stay_columns = self.add_routes([
+            (v, np.empty(0, dtype=np.int64), int(location))
+            for v, location in enumerate(self.start_locations)
+            if location >= 0
+        ])
+
+    def get_highs(self) -> highspy.Highs:
+        if self.highs is None:
+            self.highs = highspy.Highs()
+        return self.highs
+
+    def set_departure_bounds(self, lower: np.ndarray, upper: np.ndarray) -> None:
+        raise ValueError('Границы отправлений не задаются в модели генерации столбцов')
+
+    def add_routes(self, routes: List[Tuple[int, np.ndarray, int]]) -> List[int]:
+        """
+        Добавление маршрутов в модель, возвращает номера столбцов маршрутов (повторные маршруты не добавляются)
+        """
+        columns, costs, starts, indices, values = [], [], [], [], []
+        n_nonzeros = 0
+        for vessel, departures, location in routes:
+            departures = np.sort(departures)
+            key = (vessel, location, departures.tobytes())
+            if key not in self.route_columns:
+                convoy_departures = departures[self.convoy_rows[departures] >= 0]
+                is_end_location = self.is_icebreaker_end_location[location]
+                route_indices = np.concatenate((
+                    [vessel],
+                    self.n_vessels + self.convoy_rows[convoy_departures],
+                    [self.icebreaker_balance_row] if is_end_location else [],
+                )).astype(np.int32)
+                starts.append(n_nonzeros)
+                indices.append(route_indices)
+                values.append(np.concatenate((
+                    [1.0],
+                    self.convoy_coefficients[convoy_departures],
+                    [1.0] if is_end_location else [],
+                )))
+                n_nonzeros += len(route_indices)
+                costs.append(self.departure_cost[departures].sum() + self.stop_cost[location])
+
+                self.route_columns[key] = self.num_col
+                self.num_col += 1
+                self.routes.append((vessel, departures, location))
+            columns.append(self.route_columns[key])
+
+        if costs:
+            self.get_highs().addCols(
+                len(costs),
+                np.array(costs),
+                np.zeros(len(costs)),
+                np.ones(len(costs)),
+                n_nonzeros,
+                np.array(starts, dtype=np.int32),
+                np.concatenate(indices),
+                np.concatenate(values),
+            )
+        return columns
+
+    def get_start_routes(self, start_values: np.ndarray) -> List[Tuple[int, np.ndarray, int]]:
+        """
+        Маршруты судов из начального решения (отправления, затем остановки)
+        """
+        departure_arrays = self.input.departure_arrays
+        location_arrays = self.input.location_arrays
+        n_departures = len(departure_arrays)
+        departures = np.nonzero(start_values[:n_departures] > 0.5)[0]
+        locations = np.nonzero(start_values[n_departures:] > 0.5)[0]
+        departure_vessel = departure_arrays.vessel_idx[departures]
+        return [
+            (
+                int(location_arrays.vessel_idx[location]),
+                departures[departure_vessel == location_arrays.vessel_idx[location]],
+                int(location),
+            )
+            for location in locations
+        ]
+
+    def price_routes(self, row_dual: np.ndarray) -> List[Tuple[int, np.ndarray, int]]:
+        """
+        Маршруты с отрицательной приведенной стоимостью: кратчайший путь по приведенным стоимостям отправлений
+        от стартовой вершины судна до лучшей вершины остановки
+        """
+        location_arrays = self.input.location_arrays
+        location_from = location_arrays.departure_location_from
+        location_to = location_arrays.departure_location_to
+        vessel_dual = row_dual[:self.n_vessels]
+        convoy_dual = row_dual[self.n_vessels:self.n_vessels + self.n_convoy_rows]
+        balance_dual = row_dual[self.icebreaker_balance_row]
+
+        reduced_cost = self.departure_cost - np.where(
+            self.convoy_rows >= 0, self.convoy_coefficients * convoy_dual[np.maximum(self.convoy_rows, 0)], 0
+        )
+        distance = np.full(len(location_arrays), np.inf)
+        predecessor = np.full(len(location_arrays), -1, dtype=np.int64)
+        distance[self.start_locations[self.start_locations >= 0]] = 0
+        for layer in self.time_layers:
+            candidate = distance[location_from[layer]] + reduced_cost[layer]
+            is_reachable = np.isfinite(candidate)
+            layer, candidate = layer[is_reachable], candidate[is_reachable]
+            np.minimum.at(distance, location_to[layer], candidate)
+            is_best = candidate <= distance[location_to[layer]]
+            predecessor[location_to[layer[is_best]]] = layer[is_best]
+
+        stop_reduced_cost = distance + self.stop_cost - self.is_icebreaker_end_location * balance_dual
+        routes = []
+        for vessel, locations in enumerate(self.vessel_locations):
+            if self.start_locations[vessel] < 0 or not len(locations):
+                continue
+            location = locations[np.argmin(stop_reduced_cost[locations])]
+            if stop_reduced_cost[location] - vessel_dual[vessel] >= -EPS:
+                continue
+            departures = []
+            current = location
+            while current != self.start_locations[vessel]:
+                departures.append(predecessor[current])
+                current = location_from[predecessor[current]]
+            routes.append((vessel, np.array(departures[::-1], dtype=np.int64), int(location)))
+        return routes
+
+    def solve_model(self, timelimit: float, start_values: Optional[np.ndarray] = None) -> None:
+        """
+        Генерация маршрутов на LP-релаксации (не более половины лимита времени) и целочисленное решение
+        на сгенерированных маршрутах
+        """
+        start_time = time.perf_counter()
+        highs = self.get_highs()
+        if start_values is not None:
+            self.start_columns = self.add_routes(self.get_start_routes(np.asarray(start_values)))
+
+        for iteration in range(self.max_iterations):
+            highs.setOptionValue('time_limit', max(timelimit / 2 - (time.perf_counter() - start_time), 1))
+            self.telemetry.start(highs, 'column_generation_lp')
+            highs.run()
+            self.telemetry.finish()
+            if highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+                break
+            n_columns = self.num_col
+            lp_objective = highs.getInfo().objective_function_value
+            self.add_routes(self.price_routes(np.array(highs.getSolution().row_dual)))
+            print(
+                f'Генерация маршрутов: итерация {iteration}, LP {lp_objective:.2f},'
+                f' добавлено маршрутов {self.num_col - n_columns}, всего {self.num_col - 1}'
+            )
+            if self.num_col == n_columns or time.perf_counter() - start_time > timelimit / 2:
+                break
+
+        # Целочисленное решение: искусственная переменная покрывает нехватку ледоколов в портах баланса
+        highs.changeColBounds(0, 0, 2)
+        highs.changeColsIntegrality(
+            self.num_col, np.arange(self.num_col, dtype=np.int32),
+            np.full(self.num_col, highspy.HighsVarType.kInteger),
+        )
+        highs.setOptionValue('output_flag', True)
+        highs.setOptionValue('time_limit', max(timelimit - (time.perf_counter() - start_time), 1))
+        # Начальное решение: маршруты начального решения или стартовые вершины судов
+        start_columns = self.start_columns or self.stay_columns
+        n_end_locations = sum(self.is_icebreaker_end_location[self.routes[c - 1][2]] for c in start_columns)
+        start_solution = highspy.HighsSolution()
+        col_value = np.zeros(self.num_col)
+        col_value[start_columns] = 1
+        col_value[0] = max(2 - n_end_locations, 0)
+        start_solution.col_value = col_value.tolist()
+        highs.setSolution(start_solution)
+        self.telemetry.start(highs, 'column_generation_mip')
+        highs.run()
+        self.telemetry.finish()
+
+        solution = highs.getSolution()
+        if not solution.value_valid:
+            raise RuntimeError(f'Решение не найдено: {highs.modelStatusToString(highs.getModelStatus())}')
+        self.departure_values = np.zeros(len(self.input.departure_arrays))
+        self.stop_place_values = np.zeros(len(self.input.location_arrays))
+        for (vessel, departures, location), x in zip(self.routes, solution.col_value[1:]):
+            if x > 0.5:
+                self.departure_values[departures] = 1
+                self.stop_place_values[location] = 1
+        n_missing = round(solution.col_value[0])
+        if n_missing:
+            print(
+                f'Генерация маршрутов: баланс ледоколов не выполнен, в портах баланса не хватает {n_missing} ледоколов'
+            )
+        self.objective_value = highs.getInfo().objective_function_value - ARTIFICIAL_COST * n_missing
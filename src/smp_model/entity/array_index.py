@@ -0,0 +1,103 @@
+from collections.abc import Mapping
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+class ArrayIndex(Mapping):
+    """
+    Словарь с ключами-кортежами, хранимый как отсортированный массив целочисленных кодов ключей.
+
+    Компонента ключа - либо объект из заданной последовательности (кодируется позицией в ней),
+    либо целое число (время, признак проводки), которое кодируется как есть.
+    """
+    def __init__(
+            self,
+            components: List[Optional[Sequence]],
+            sizes: List[int],
+            columns: List[np.ndarray],
+            values: Sequence,
+    ) -> None:
+        """
+        :param components: последовательности объектов для компонент ключа (None - целочисленная компонента)
+        :param sizes: число возможных значений каждой компоненты
+        :param columns: позиции компонент ключа для каждого значения
+        :param values: значения, в порядке строк columns
+        """
+        self.components = components
+        self.positions: List[Optional[Dict[Hashable, int]]] = [
+            None if component is None else {obj: i for i, obj in enumerate(component)}
+            for component in components
+        ]
+        self.sizes = [max(int(size), 1) for size in sizes]
+        self.values = values
+
+        codes = np.zeros(len(values), dtype=np.int64)
+        for column, size in zip(columns, self.sizes):
+            codes = codes * size + np.asarray(column, dtype=np.int64)
+        self.order = np.argsort(codes, kind='stable')
+        self.codes = codes[self.order]
+
+    def encode(self, key) -> Optional[int]:
+        """
+        Код ключа (None, если ключ не может присутствовать в индексе)
+        """
+        if not isinstance(key, tuple) or len(key) != len(self.sizes):
+            return None
+        code = 0
+        for k, positions, size in zip(key, self.positions, self.sizes):
+            position = int(k) if positions is None else positions.get(k, -1)
+            if not 0 <= position < size:
+                return None
+            code = code * size + position
+        return code
+
+    def find(self, key) -> int:
+        """
+        Позиция значения по ключу (-1, если ключ отсутствует)
+        """
+        code = self.encode(key)
+        if code is None:
+            return -1
+        i = int(np.searchsorted(self.codes, code))
+        if i < len(self.codes) and self.codes[i] == code:
+            return int(self.order[i])
+        return -1
+
+    def find_columns(self, columns: List[np.ndarray]) -> np.ndarray:
+        """
+        Позиции значений для набора ключей, заданных позициями компонент (-1 для отсутствующих ключей)
+        """
+        codes = np.zeros(len(columns[0]), dtype=np.int64)
+        is_valid = np.ones(len(columns[0]), dtype=bool)
+        for column, size in zip(columns, self.sizes):
+            column = np.asarray(column, dtype=np.int64)
+            is_valid &= (column >= 0) & (column < size)
+            codes = codes * size + np.where(is_valid, column, 0)
+        if not len(self.codes):
+            return np.full(len(codes), -1, dtype=np.int64)
+        i = np.minimum(np.searchsorted(self.codes, codes), len(self.codes) - 1)
+        return np.where(is_valid & (self.codes[i] == codes), self.order[i], -1)
+
+    def decode(self, code: int) -> tuple:
+        key = []
+        for component, size in zip(reversed(self.components), reversed(self.sizes)):
+            code, position = divmod(code, size)
+            key.append(position if component is None else component[position])
+        return tuple(reversed(key))
+
+    def __getitem__(self, key):
+        i = self.find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.values[i]
+
+    def __contains__(self, key) -> bool:
+        return self.find(key) >= 0
+
+    def __iter__(self) -> Iterator[tuple]:
+        for code in self.codes.tolist():
+            yield self.decode(code)
+
+    def __len__(self) -> int:
+        return len(self.codes)
@@ -1,23 +1,131 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
 from src.smp_model.entity.edge import Edge
 from src.smp_model.entity.vessel import Vessel
 
 
+class DepartureArrays:
+    """
+    Хранилище отправлений по колонкам: отправление - строка массивов numpy
+    """
+    def __init__(self, vessels: List[Vessel], edges: List[Edge]) -> None:
+        self.vessels = vessels
+        self.edges = edges
+
+        # Позиции судна и ребра в списках vessels и edges
+        self.vessel_idx = np.empty(0, dtype=np.int32)
+        self.edge_idx = np.empty(0, dtype=np.int32)
+        self.time = np.empty(0, dtype=np.int32)
+        self.speed = np.empty(0, dtype=float)
+        self.duration = np.empty(0, dtype=np.int32)
+        self.is_icebreaker_assistance = np.empty(0, dtype=bool)
+
+        # Представления отправлений, по одному на строку
+        self.views: List[Departure] = []
+        # Отправления ледоколов без проводки по (позиция ребра, время)
+        self.icebreaker_departures_by_edge_t: Dict[Tuple[int, int], List[Departure]] = {}
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def extend(self, vessel_idx, edge_idx, time, speed, duration, is_icebreaker_assistance) -> None:
+        """
+        Добавление отправлений, заданных колонками
+        """
+        n_before = len(self)
+        self.vessel_idx = np.concatenate((self.vessel_idx, np.asarray(vessel_idx, dtype=np.int32)))
+        self.edge_idx = np.concatenate((self.edge_idx, np.asarray(edge_idx, dtype=np.int32)))
+        self.time = np.concatenate((self.time, np.asarray(time, dtype=np.int32)))
+        self.speed = np.concatenate((self.speed, np.asarray(speed, dtype=float)))
+        self.duration = np.concatenate((self.duration, np.asarray(duration, dtype=np.int32)))
+        self.is_icebreaker_assistance = np.concatenate(
+            (self.is_icebreaker_assistance, np.asarray(is_icebreaker_assistance, dtype=bool))
+        )
+        self.views.extend(Departure(self, i) for i in range(n_before, len(self)))
+
+    def take(self, positions: np.ndarray) -> 'DepartureArrays':
+        """
+        Новое хранилище из строк с заданными позициями
+        """
+        result = DepartureArrays(self.vessels, self.edges)
+        result.extend(
+            self.vessel_idx[positions],
+            self.edge_idx[positions],
+            self.time[positions],
+            self.speed[positions],
+            self.duration[positions],
+            self.is_icebreaker_assistance[positions],
+        )
+        return result
+
+
 class Departure:
+    """
+    Отправление судна по ребру в момент времени - представление строки DepartureArrays
+    """
+    __slots__ = ('arrays', 'idx')
+
+    def __init__(self, arrays: DepartureArrays, idx: int) -> None:
+        self.arrays = arrays
+        self.idx = idx
+
+    @property
+    def vessel(self) -> Vessel:
+        return self.arrays.vessels[self.arrays.vessel_idx[self.idx]]
 
-    def __init__(self, vessel: Vessel, edge: Edge, time: int, speed: float, is_icebreaker_assistance: bool) -> None:
-        self.vessel = vessel
-        self.edge = edge
-        self.time = time
-        self.speed = speed
-        self.is_icebreaker_assistance = is_icebreaker_assistance
-        self.duration = (1 if self.edge.is_fict else round(edge.distance / self.speed, 0))
-        self.possible_icebreaker_departures = []
+    @property
+    def edge(self) -> Edge:
+        return self.arrays.edges[self.arrays.edge_idx[self.idx]]
+
+    @property
+    def time(self) -> int:
+        return int(self.arrays.time[self.idx])
+
+    @time.setter
+    def time(self, time: int) -> None:
+        self.arrays.time[self.idx] = time
+
+    @property
+    def speed(self) -> float:
+        return float(self.arrays.speed[self.idx])
+
+    @speed.setter
+    def speed(self, speed: float) -> None:
+        self.arrays.speed[self.idx] = speed
+
+    @property
+    def duration(self) -> int:
+        return int(self.arrays.duration[self.idx])
+
+    @duration.setter
+    def duration(self, duration: int) -> None:
+        self.arrays.duration[self.idx] = duration
+
+    @property
+    def is_icebreaker_assistance(self) -> bool:
+        return bool(self.arrays.is_icebreaker_assistance[self.idx])
+
+    @is_icebreaker_assistance.setter
+    def is_icebreaker_assistance(self, is_icebreaker_assistance: bool) -> None:
+        self.arrays.is_icebreaker_assistance[self.idx] = is_icebreaker_assistance
+
+    @property
+    def possible_icebreaker_departures(self) -> List['Departure']:
+        icebreaker_departures = self.arrays.icebreaker_departures_by_edge_t.get(
+            (int(self.arrays.edge_idx[self.idx]), self.time), []
+        )
+        if self.vessel.is_icebreaker:
+            return [d_i for d_i in icebreaker_departures if d_i.vessel is not self.vessel]
+        return icebreaker_departures
 
     def __repr__(self) -> str:
         return f"D({self.vessel, self.edge, self.time, self.is_icebreaker_assistance})"
-    
-    def add_possible_icebreaker(self, departure):
-        self.possible_icebreaker_departures.append(departure)
-        return
-
 
+    @staticmethod
+    def calculate_travel_hours(edge: Edge, speed: float) -> float:
+        """
+        Время в пути по ребру в часах (округляется до часа)
+        """
+        return round(edge.distance / speed, 0)
@@ -1,24 +1,129 @@
-from src.smp_model.entity.departure import Departure
+from typing import List
+
+import numpy as np
+
+from src.smp_model.entity.departure import Departure, DepartureArrays
 from src.smp_model.entity.port import Port
 from src.smp_model.entity.vessel import Vessel
 
 
+class LocationArrays:
+    """
+    Хранилище вершин сети (судно, порт, время) по колонкам.
+
+    Входящие и исходящие дуги вершин хранятся в формате CSR: отправления вершины k - позиции
+    input_departures[input_ptr[k]:input_ptr[k + 1]] в хранилище отправлений
+    """
+    def __init__(self, vessels: List[Vessel], ports: List[Port], departures: DepartureArrays) -> None:
+        self.vessels = vessels
+        self.ports = ports
+        self.departures = departures
+
+        self.vessel_idx = np.empty(0, dtype=np.int32)
+        self.port_idx = np.empty(0, dtype=np.int32)
+        self.time = np.empty(0, dtype=np.int32)
+        self.min_time_to_end_port = np.empty(0, dtype=float)
+
+        self.input_ptr = np.zeros(1, dtype=np.int64)
+        self.input_departures = np.empty(0, dtype=np.int64)
+        self.output_ptr = np.zeros(1, dtype=np.int64)
+        self.output_departures = np.empty(0, dtype=np.int64)
+        # Позиции вершин отправления и прибытия для каждого отправления (-1 - отправление не связано)
+        self.departure_location_from = np.empty(0, dtype=np.int64)
+        self.departure_location_to = np.empty(0, dtype=np.int64)
+
+        # Представления вершин, по одному на строку
+        self.views: List[Location] = []
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def extend(self, vessel_idx, port_idx, time, min_time_to_end_port) -> None:
+        """
+        Добавление вершин, заданных колонками. Связи с отправлениями сбрасываются
+        """
+        n_before = len(self)
+        self.vessel_idx = np.concatenate((self.vessel_idx, np.asarray(vessel_idx, dtype=np.int32)))
+        self.port_idx = np.concatenate((self.port_idx, np.asarray(port_idx, dtype=np.int32)))
+        self.time = np.concatenate((self.time, np.asarray(time, dtype=np.int32)))
+        self.min_time_to_end_port = np.concatenate(
+            (self.min_time_to_end_port, np.asarray(min_time_to_end_port, dtype=float))
+        )
+        self.views.extend(Location(self, i) for i in range(n_before, len(self)))
+        self.set_links(np.full(len(self.departures), -1), np.full(len(self.departures), -1))
+
+    def take(self, positions: np.ndarray, departures: DepartureArrays) -> 'LocationArrays':
+        """
+        Новое хранилище из строк с заданными позициями, без связей с отправлениями
+        """
+        result = LocationArrays(self.vessels, self.ports, departures)
+        result.extend(
+            self.vessel_idx[positions],
+            self.port_idx[positions],
+            self.time[positions],
+            self.min_time_to_end_port[positions],
+        )
+        return result
+
+    def set_links(self, departure_location_from: np.ndarray, departure_location_to: np.ndarray) -> None:
+        """
+        Заполнение дуг по позициям вершин отправления и прибытия каждого отправления (-1 - отправление не связано).
+        Внутри вершины отправления сохраняют исходный порядок
+        """
+        self.departure_location_from = np.asarray(departure_location_from, dtype=np.int64)
+        self.departure_location_to = np.asarray(departure_location_to, dtype=np.int64)
+        linked = np.nonzero((self.departure_location_from >= 0) & (self.departure_location_to >= 0))[0]
+        n_locations = len(self)
+        for location_idx, ptr_name, departures_name in (
+            (self.departure_location_to[linked], 'input_ptr', 'input_departures'),
+            (self.departure_location_from[linked], 'output_ptr', 'output_departures'),
+        ):
+            order = np.argsort(location_idx, kind='stable')
+            setattr(self, ptr_name, np.searchsorted(location_idx[order], np.arange(n_locations + 1)).astype(np.int64))
+            setattr(self, departures_name, linked[order])
+
+
 class Location:
+    """
+    Вершина сети: судно в порту в момент времени - представление строки LocationArrays
+    """
+    __slots__ = ('arrays', 'idx')
 
-    def __init__(self, vessel: Vessel, port: Port, time: int, min_time_to_port_end: float) -> None:
-        self.vessel = vessel
-        self.port = port
-        self.time = time
-        self.min_time_to_end_port = min_time_to_port_end
+    def __init__(self, arrays: LocationArrays, idx: int) -> None:
+        self.arrays = arrays
+        self.idx = idx
 
-        self.input_departures_by_location = []
-        self.output_departures_by_location = []
+    @property
+    def vessel(self) -> Vessel:
+        return self.arrays.vessels[self.arrays.vessel_idx[self.idx]]
 
-    def __repr__(self) -> str:
-        return 'L(' + ', '.join((self.vessel.name, self.port.name, str(self.time))) + ')'
+    @property
+    def port(self) -> Port:
+        return self.arrays.ports[self.arrays.port_idx[self.idx]]
+
+    @property
+    def time(self) -> int:
+        return int(self.arrays.time[self.idx])
 
-    def add_input_departure(self, departure: Departure) -> None:
-        self.input_departures_by_location.append(departure)
+    @time.setter
+    def time(self, time: int) -> None:
+        self.arrays.time[self.idx] = time
 
-    def add_output_departure(self, departure: Departure) -> None:
-        self.output_departures_by_location.append(departure)
+    @property
+    def min_time_to_end_port(self) -> float:
+        return float(self.arrays.min_time_to_end_port[self.idx])
+
+    @property
+    def input_departures_by_location(self) -> List[Departure]:
+        views = self.arrays.departures.views
+        ptr = self.arrays.input_ptr
+        return [views[i] for i in self.arrays.input_departures[ptr[self.idx]:ptr[self.idx + 1]].tolist()]
+
+    @property
+    def output_departures_by_location(self) -> List[Departure]:
+        views = self.arrays.departures.views
+        ptr = self.arrays.output_ptr
+        return [views[i] for i in self.arrays.output_departures[ptr[self.idx]:ptr[self.idx + 1]].tolist()]
+
+    def __repr__(self) -> str:
+        return 'L(' + ', '.join((self.vessel.name, self.port.name, str(self.time))) + ')'
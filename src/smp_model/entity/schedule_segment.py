@@ -0,0 +1,43 @@
+from src.smp_model.entity.port import Port
+from src.smp_model.entity.vessel import Vessel
+
+# Норматив ледовой обстановки для стоянки судна в порту (ребро А-А)
+WAIT_AVG_NORM = 21
+
+
+class ScheduleSegment:
+    """
+    Отрезок итогового расписания судна: скорректированное отправление или стоянка между отправлениями.
+    Легкая запись вместо копии Departure - не связана с хранилищем отправлений и не изменяет его
+    """
+    __slots__ = ('vessel', 'port_from', 'port_to', 'time', 'duration', 'speed', 'is_icebreaker_assistance', 'avg_norm')
+
+    def __init__(
+        self,
+        vessel: Vessel,
+        port_from: Port,
+        port_to: Port,
+        time: int,
+        duration: int,
+        speed: float,
+        is_icebreaker_assistance: bool,
+        avg_norm: float,
+    ) -> None:
+        self.vessel = vessel
+        self.port_from = port_from
+        self.port_to = port_to
+        self.time = time
+        self.duration = duration
+        self.speed = speed
+        self.is_icebreaker_assistance = is_icebreaker_assistance
+        self.avg_norm = avg_norm
+
+    @classmethod
+    def create_wait(cls, vessel: Vessel, port: Port, time: int, duration: int) -> 'ScheduleSegment':
+        """
+        Стоянка судна в порту
+        """
+        return cls(vessel, port, port, time, duration, 0, False, WAIT_AVG_NORM)
+
+    def __repr__(self) -> str:
+        return f"S({self.vessel, self.port_from, self.port_to, self.time, self.duration})"
@@ -0,0 +1,18 @@
+from src.smp_model.entity.port import Port
+from src.smp_model.entity.vessel import Vessel
+
+
+class ScheduleStop:
+    """
+    Конечная точка итогового расписания судна: порт остановки и скорректированное время прибытия.
+    Легкая запись вместо Location - не связана с хранилищем вершин и не изменяет его
+    """
+    __slots__ = ('vessel', 'port', 'time')
+
+    def __init__(self, vessel: Vessel, port: Port, time: int) -> None:
+        self.vessel = vessel
+        self.port = port
+        self.time = time
+
+    def __repr__(self) -> str:
+        return f"Stop({self.vessel, self.port, self.time})"
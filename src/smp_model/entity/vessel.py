@@ -27,6 +27,8 @@ class Vessel:
         # Допустимые ребра для передвижения судна
         self.possible_edges: List[Edge] = []
         self.possible_ports: Set[Port] = set()
+        # Лучшие маршруты судна (последовательности портов)
+        self.best_routes: List[List[Port]] = []
         self.locations_by_vessel = []
 
     def add_location(self, location):
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import re
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+# Папка с кэшем рядом с исходной книгой Excel
+CACHE_FOLDER_NAME = '.cache'
+
+# Хэши содержимого файлов, уже посчитанные в процессе: (путь, время изменения, размер) -> хэш
+_file_hash_memo: Dict[tuple, str] = {}
+
+
+def get_file_hash(file_path: str) -> str:
+    """
+    Хэш содержимого файла
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _file_hash_memo:
+        file_hash = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                file_hash.update(chunk)
+        _file_hash_memo[memo_key] = file_hash.hexdigest()
+    return _file_hash_memo[memo_key]
+
+
+def get_frame_arrays(df: pd.DataFrame) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Колонки DataFrame в виде массивов для .npz. None, если таблицу нельзя сохранить без потерь
+    """
+    if not df.columns.is_unique or not all(isinstance(col, str) for col in df.columns):
+        return None
+    arrays = {'columns': np.array(df.columns, dtype=str)}
+    for i, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        if values.dtype != object:
+            # Тип без метаданных (бывают у дат из pandas и не сохраняются в .npz)
+            arrays[f'values_{i}'] = values.view(np.dtype(values.dtype.str))
+            continue
+        # Строковые колонки хранятся как юникод-массив с маской пропусков
+        is_null = pd.isna(values)
+        if not all(isinstance(x, str) for x in values[~is_null]):
+            return None
+        arrays[f'str_{i}'] = np.where(is_null, '', values).astype(str)
+        arrays[f'null_{i}'] = is_null
+    return arrays
+
+
+def create_frame(arrays: Mapping[str, np.ndarray]) -> pd.DataFrame:
+    """
+    DataFrame по массивам, полученным get_frame_arrays
+    """
+    columns = arrays['columns'].tolist()
+    frame = {}
+    for i, col in enumerate(columns):
+        if f'values_{i}' in arrays:
+            frame[col] = arrays[f'values_{i}']
+        else:
+            values = arrays[f'str_{i}'].astype(object)
+            values[arrays[f'null_{i}']] = np.nan
+            frame[col] = values
+    return pd.DataFrame(frame, columns=columns)
+
+
+def save_frame_npz(df: pd.DataFrame, file_path: str) -> bool:
+    """
+    Сохранение DataFrame по колонкам в .npz. Возвращает False, если таблицу нельзя сохранить без потерь
+    """
+    arrays = get_frame_arrays(df)
+    if arrays is None:
+        return False
+
+    tmp_file_path = f'{file_path}.tmp'
+    with open(tmp_file_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_file_path, file_path)
+    return True
+
+
+def load_frame_npz(file_path: str) -> pd.DataFrame:
+    """
+    Загрузка DataFrame, сохраненного save_frame_npz
+    """
+    with np.load(file_path, allow_pickle=False) as data:
+        return create_frame(data)
+
+
+def read_excel_cached(file_path: str, sheet_names: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Чтение листов книги Excel через бинарный кэш.
+
+    Кэш привязан к хэшу содержимого книги: при изменении файла листы заново читаются из Excel,
+    а кэш предыдущей версии удаляется.
+    """
+    cache_folder_path = os.path.join(os.path.dirname(file_path), CACHE_FOLDER_NAME)
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    file_hash = get_file_hash(file_path)
+    # Кэш любой версии книги: <имя книги>.<хэш>.<лист>.npz
+    cache_name_pattern = re.compile(re.escape(file_name) + r'\.([0-9a-f]{40})\..+\.npz')
+
+    def get_cache_path(sheet_name):
+        return os.path.join(cache_folder_path, f'{file_name}.{file_hash}.{sheet_name}.npz')
+
+    result = {}
+    for sheet_name in sheet_names:
+        if os.path.isfile(get_cache_path(sheet_name)):
+            result[sheet_name] = load_frame_npz(get_cache_path(sheet_name))
+    missing_sheet_names = [sheet_name for sheet_name in sheet_names if sheet_name not in result]
+    if not missing_sheet_names:
+        return result
+
+    with pd.ExcelFile(file_path) as reader:
+        for sheet_name in missing_sheet_names:
+            result[sheet_name] = pd.read_excel(reader, sheet_name=sheet_name)
+
+    try:
+        os.makedirs(cache_folder_path, exist_ok=True)
+        for cache_file_name in os.listdir(cache_folder_path):
+            match = cache_name_pattern.fullmatch(cache_file_name)
+            if match and match.group(1) != file_hash:
+                os.remove(os.path.join(cache_folder_path, cache_file_name))
+        for sheet_name in missing_sheet_names:
+            save_frame_npz(result[sheet_name], get_cache_path(sheet_name))
+    except OSError as e:
+        # Кэш не обязателен: при недоступной на запись папке работаем напрямую с Excel
+        print(f'Не удалось сохранить кэш для {file_path}: {e}')
+    return result
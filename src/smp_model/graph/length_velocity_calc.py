@@ -8,6 +8,7 @@ from collections import defaultdict
 from src.smp_model.input import ModelInput
 from typing import List, Tuple
 import os
+from src.smp_model.excel_cache import read_excel_cached
 from src.smp_model.utils import choose_week_for_calc
 
 
@@ -42,11 +43,14 @@ class LengthVelocityCalc:
         self.data_folder_path = data_folder_path
         self.start_date = start_date
 
-        with pd.ExcelFile(os.path.join(data_folder_path, 'model_data.xlsx')) as reader:
-            self.ports_df = pd.read_excel(reader, sheet_name='points')
-            self.edges_df = pd.read_excel(reader, sheet_name='edges')
-            self.icebreakers_df = pd.read_excel(reader, sheet_name='icebreakers')
-            self.vessels_df = pd.read_excel(reader, sheet_name='vessels')
+        model_data = read_excel_cached(
+            os.path.join(data_folder_path, 'model_data.xlsx'),
+            ['points', 'edges', 'icebreakers', 'vessels'],
+        )
+        self.ports_df = model_data['points']
+        self.edges_df = model_data['edges']
+        self.icebreakers_df = model_data['icebreakers']
+        self.vessels_df = model_data['vessels']
         self.ports_dict = self.ports_df\
             .set_index(['point_id'])\
             .to_dict(orient='index')
@@ -0,0 +1,272 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.smp_model.entity.vessel import Vessel
+from src.smp_model.highs_model import HighsModel
+from src.smp_model.input import ModelInput
+
+
+class RoutePlan:
+    """
+    План маршрута судна: отправления судна, новые позиции задействованных ледоколов и их отправления,
+    изменения свободных мест в караванах
+    """
+    def __init__(self, location: int) -> None:
+        self.departures: List[int] = []
+        self.location = location
+        self.icebreaker_departures: Dict[Vessel, List[int]] = {}
+        self.icebreaker_locations: Dict[Vessel, int] = {}
+        self.convoy_capacity: Dict[Tuple[int, int], int] = {}
+        self.cost = 0.0
+
+
+class GreedyModel(HighsModel):
+    """
+    Жадная эвристика построения расписания на сети ModelInput.
+
+    Суда обрабатываются в порядке готовности к выходу. Для каждого из лучших маршрутов судна (fill_best_routes)
+    судно идет по ребрам маршрута в самый ранний возможный момент: самостоятельно, в существующий караван
+    со свободным местом (ледокол идет по ребру в этот момент) или с ледоколом, который приводится в порт отправления
+    кратчайшим по времени путем от своей текущей позиции. Выбирается маршрут с наименьшей стоимостью
+    (как в целевой функции модели), судно останавливается в лучшей точке маршрута.
+    Затем свободные ледоколы приводятся в порты баланса ледоколов, если их там меньше двух.
+
+    Решение не нарушает ограничений модели (кроме баланса ледоколов, если его не удалось выполнить), поэтому
+    используется и как самостоятельное расписание, и как начальное решение для решателя
+    """
+    def __init__(self, input: ModelInput, icebreaker_end_ports: List[int]) -> None:
+        super().__init__(input, icebreaker_end_ports)
+        self.icebreakers = [v for v in input.vessels if v.is_icebreaker]
+        # Текущая позиция (вершина) ледокола и его отправления
+        self.icebreaker_locations: Dict[Vessel, int] = {}
+        self.icebreaker_departures: Dict[Vessel, List[int]] = {}
+        # Свободные места в караванах: (позиция ребра, время) -> 3 * ледоколы - проводки
+        self.convoy_capacity: Dict[Tuple[int, int], int] = {}
+        # Кратчайшие по времени пути ледокола из вершины: (предшествующие отправления, самая ранняя вершина в порту)
+        self.reachable_cache: Dict[int, Tuple[Dict[int, int], Dict[int, int]]] = {}
+
+        self.departure_cost = np.empty(0, dtype=float)
+        self.stop_cost = np.empty(0, dtype=float)
+
+    def create_model(self) -> None:
+        self.departure_cost, self.stop_cost = self.get_costs()
+
+    def set_departure_bounds(self, lower: np.ndarray, upper: np.ndarray) -> None:
+        raise ValueError('Границы отправлений не задаются в жадной эвристике')
+
+    def find_departure(self, vessel: Vessel, port_from, port_to, t: int, is_icebreaker_assistance: bool) -> int:
+        edge = self.input.edges_dict.get((port_from.id, port_to.id))
+        if edge is None:
+            return -1
+        return self.input.departures_dict.find((vessel, edge, t, is_icebreaker_assistance))
+
+    def get_waits(self, vessel: Vessel, port, t_from: int, t_to: int) -> Optional[List[int]]:
+        """
+        Ожидания судна в порту с t_from до t_to (None, если ожидание невозможно)
+        """
+        waits = [self.find_departure(vessel, port, port, t, False) for t in range(t_from, t_to)]
+        return None if min(waits, default=0) < 0 else waits
+
+    def get_reachable(self, location: int) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        Кратчайшие по времени пути ледокола из вершины без проводок: предшествующее отправление для
+        достижимых вершин и самая ранняя достижимая вершина в каждом порту
+        """
+        if location not in self.reachable_cache:
+            location_arrays = self.input.location_arrays
+            output_ptr = location_arrays.output_ptr
+            output_departures = location_arrays.output_departures
+            location_to = location_arrays.departure_location_to
+            is_icebreaker_assistance = self.input.departure_arrays.is_icebreaker_assistance
+            predecessor = {location: -1}
+            earliest = {}
+            heap = [(int(location_arrays.time[location]), location)]
+            while heap:
+                t, l = heapq.heappop(heap)
+                port = int(location_arrays.port_idx[l])
+                if port not in earliest:
+                    earliest[port] = l
+                for d in output_departures[output_ptr[l]:output_ptr[l + 1]].tolist():
+                    l_to = int(location_to[d])
+                    if not is_icebreaker_assistance[d] and l_to not in predecessor:
+                        predecessor[l_to] = d
+                        heapq.heappush(heap, (int(location_arrays.time[l_to]), l_to))
+            self.reachable_cache[location] = (predecessor, earliest)
+        return self.reachable_cache[location]
+
+    def get_path(self, predecessor: Dict[int, int], location: int) -> List[int]:
+        path = []
+        while predecessor[location] >= 0:
+            path.append(predecessor[location])
+            location = int(self.input.location_arrays.departure_location_from[predecessor[location]])
+        return path[::-1]
+
+    def get_routes(self, vessel: Vessel) -> List[list]:
+        """
+        Маршруты-кандидаты судна (последовательности портов)
+        """
+        return vessel.best_routes
+
+    def plan_route(self, vessel: Vessel, route: list) -> RoutePlan:
+        """
+        План прохождения маршрута судном с остановкой в лучшей по стоимости точке
+        """
+        location_arrays = self.input.location_arrays
+        departure_arrays = self.input.departure_arrays
+        port_positions = self.input.port_positions
+        n_times = len(self.input.times)
+
+        plan = RoutePlan(self.input.locations_dict.find((vessel, vessel.port_start, vessel.time_start)))
+        icebreaker_locations = dict(self.icebreaker_locations)
+        best_cost = self.stop_cost[plan.location]
+        best_plan = (0, plan.location, {}, {}, {})
+        cost = 0.0
+        t = vessel.time_start
+        for port_from, port_to in zip(route[:-1], route[1:]):
+            # Самый ранний момент отправления: самостоятельно, в существующий караван или с ледоколом
+            icebreaker_arrivals = {}
+            for icebreaker in self.icebreakers:
+                _, earliest = self.get_reachable(icebreaker_locations[icebreaker])
+                if port_positions[port_from] in earliest:
+                    icebreaker_arrivals[icebreaker] = earliest[port_positions[port_from]]
+            move = None
+            waits = []
+            for tau in range(t, n_times):
+                d = self.find_departure(vessel, port_from, port_to, tau, False)
+                if d >= 0:
+                    move = (d, None)
+                    break
+                d = self.find_departure(vessel, port_from, port_to, tau, True)
+                if d >= 0:
+                    key = (int(departure_arrays.edge_idx[d]), tau)
+                    if self.convoy_capacity.get(key, 0) + plan.convoy_capacity.get(key, 0) > 0:
+                        move = (d, None)
+                        break
+                    for icebreaker, arrival in icebreaker_arrivals.items():
+                        if location_arrays.time[arrival] > tau:
+                            continue
+                        d_i = self.find_departure(icebreaker, port_from, port_to, tau, False)
+                        icebreaker_waits = self.get_waits(icebreaker, port_from, int(location_arrays.time[arrival]), tau)
+                        if d_i >= 0 and icebreaker_waits is not None:
+                            predecessor, _ = self.get_reachable(icebreaker_locations[icebreaker])
+                            move = (d, (icebreaker, self.get_path(predecessor, arrival) + icebreaker_waits + [d_i]))
+                            break
+                    if move is not None:
+                        break
+                w = self.find_departure(vessel, port_from, port_from, tau, False)
+                if w < 0:
+                    break
+                waits.append(w)
+            if move is None:
+                break
+
+            d, icebreaker_move = move
+            if icebreaker_move is not None:
+                icebreaker, icebreaker_path = icebreaker_move
+                plan.icebreaker_departures.setdefault(icebreaker, []).extend(icebreaker_path)
+                icebreaker_locations[icebreaker] = int(location_arrays.departure_location_to[icebreaker_path[-1]])
+                plan.icebreaker_locations[icebreaker] = icebreaker_locations[icebreaker]
+                for d_i in icebreaker_path:
+                    key = (int(departure_arrays.edge_idx[d_i]), int(departure_arrays.time[d_i]))
+                    plan.convoy_capacity[key] = plan.convoy_capacity.get(key, 0) + 3
+            if departure_arrays.is_icebreaker_assistance[d]:
+                key = (int(departure_arrays.edge_idx[d]), int(departure_arrays.time[d]))
+                plan.convoy_capacity[key] = plan.convoy_capacity.get(key, 0) - 1
+            plan.departures.extend(waits + [d])
+            cost += self.departure_cost[d]
+            plan.location = int(location_arrays.departure_location_to[d])
+            t = int(location_arrays.time[plan.location])
+
+            if cost + self.stop_cost[plan.location] < best_cost:
+                best_cost = cost + self.stop_cost[plan.location]
+                best_plan = (
+                    len(plan.departures),
+                    plan.location,
+                    {i: list(path) for i, path in plan.icebreaker_departures.items()},
+                    dict(plan.icebreaker_locations),
+                    dict(plan.convoy_capacity),
+                )
+
+        # Остановка в лучшей точке маршрута
+        n_departures, location, icebreaker_departures, icebreaker_locations, convoy_capacity = best_plan
+        plan.departures = plan.departures[:n_departures]
+        plan.location = location
+        plan.icebreaker_departures = icebreaker_departures
+        plan.icebreaker_locations = icebreaker_locations
+        plan.convoy_capacity = convoy_capacity
+        plan.cost = best_cost
+        return plan
+
+    def commit(self, plan: RoutePlan) -> None:
+        for icebreaker, path in plan.icebreaker_departures.items():
+            self.icebreaker_departures[icebreaker].extend(path)
+        self.icebreaker_locations.update(plan.icebreaker_locations)
+        for key, capacity in plan.convoy_capacity.items():
+            self.convoy_capacity[key] = self.convoy_capacity.get(key, 0) + capacity
+
+    def move_icebreakers_to_end_ports(self) -> None:
+        """
+        Приведение свободных ледоколов в порты баланса ледоколов (не менее двух в конце горизонта)
+        """
+        location_arrays = self.input.location_arrays
+        end_ports = {i for i, p in enumerate(self.input.ports) if p.id in self.icebreaker_end_ports}
+        is_in_end_port = {
+            icebreaker: int(location_arrays.port_idx[location]) in end_ports
+            for icebreaker, location in self.icebreaker_locations.items()
+        }
+        n_missing = 2 - sum(is_in_end_port.values())
+        moves = []
+        for icebreaker, location in self.icebreaker_locations.items():
+            if is_in_end_port[icebreaker]:
+                continue
+            predecessor, earliest = self.get_reachable(location)
+            arrivals = [earliest[p] for p in end_ports if p in earliest]
+            if arrivals:
+                arrival = min(arrivals, key=lambda l: location_arrays.time[l])
+                moves.append((location_arrays.time[arrival], icebreaker, self.get_path(predecessor, arrival), arrival))
+        for _, icebreaker, path, arrival in sorted(moves, key=lambda x: x[0])[:max(n_missing, 0)]:
+            self.icebreaker_departures[icebreaker].extend(path)
+            self.icebreaker_locations[icebreaker] = arrival
+        if n_missing > len(moves):
+            print('Жадная эвристика: не удалось выполнить баланс ледоколов')
+
+    def solve_model(self, timelimit: float, start_values: Optional[np.ndarray] = None) -> None:
+        """
+        Построение расписания (лимит времени и начальное решение не используются)
+        """
+        self.icebreaker_locations = {
+            icebreaker: self.input.locations_dict.find((icebreaker, icebreaker.port_start, icebreaker.time_start))
+            for icebreaker in self.icebreakers
+        }
+        self.icebreaker_departures = {icebreaker: [] for icebreaker in self.icebreakers}
+        self.icebreaker_locations = {i: l for i, l in self.icebreaker_locations.items() if l >= 0}
+        self.icebreakers = [i for i in self.icebreakers if i in self.icebreaker_locations]
+
+        self.departure_values = np.zeros(len(self.input.departure_arrays))
+        self.stop_place_values = np.zeros(len(self.input.location_arrays))
+        for vessel in sorted(self.input.vessels, key=lambda v: v.time_start):
+            if vessel.is_icebreaker:
+                continue
+            if self.input.locations_dict.find((vessel, vessel.port_start, vessel.time_start)) < 0:
+                continue
+            plan = min(
+                (self.plan_route(vessel, route) for route in self.get_routes(vessel)),
+                key=lambda p: p.cost,
+                default=None,
+            )
+            if plan is None:
+                plan = RoutePlan(self.input.locations_dict.find((vessel, vessel.port_start, vessel.time_start)))
+            self.commit(plan)
+            self.departure_values[plan.departures] = 1
+            self.stop_place_values[plan.location] = 1
+
+        self.move_icebreakers_to_end_ports()
+        for icebreaker, location in self.icebreaker_locations.items():
+            self.departure_values[self.icebreaker_departures[icebreaker]] = 1
+            self.stop_place_values[location] = 1
+        self.objective_value = float(
+            self.departure_cost @ self.departure_values + self.stop_cost @ self.stop_place_values
+        )
+        print(f'Жадная эвристика: целевая функция {self.objective_value:.2f}')
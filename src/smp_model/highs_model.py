@@ -0,0 +1,387 @@
+import os
+from typing import List, Optional, Tuple
+
+import highspy
+import numpy as np
+
+from src.smp_model.input import ModelInput
+from src.smp_model.solver_portfolio import solve_portfolio
+from src.smp_model.solver_telemetry import SolverTelemetry
+
+
+class HighsModel:
+    """
+    Та же модель, что и в Model.create_model, собранная напрямую в разреженную матрицу ограничений
+    по колонкам ModelInput и переданная в highspy без построения выражений Pyomo.
+
+    Переменные: отправления в порядке input.departures, затем остановки в порядке input.locations.
+    Порядок строк и столбцов отличается от appsi_highs, поэтому при нескольких оптимальных решениях
+    выбранное решение может отличаться (как и между запусками appsi_highs), целевая функция совпадает
+    """
+    def __init__(self, input: ModelInput, icebreaker_end_ports: List[int]) -> None:
+        self.input = input
+        # Порты, в которых в конце горизонта должно быть не менее двух ледоколов
+        self.icebreaker_end_ports = icebreaker_end_ports
+
+        self.num_col = 0
+        self.num_row = 0
+        self.lp = highspy.HighsLp()
+        # Верхние границы переменных в исходной модели
+        self.col_upper = np.empty(0, dtype=float)
+        # Коэффициенты отправлений в ограничениях каравана и номера строк (ребро, время) - см. get_convoy_rows
+        self.convoy_coefficients = np.empty(0, dtype=float)
+        self.convoy_rows = np.empty(0, dtype=np.int64)
+        # Номер строки баланса ледоколов
+        self.icebreaker_balance_row = -1
+        # Экземпляр решателя с переданной моделью (для повторных решений с измененными границами)
+        self.highs: Optional[highspy.Highs] = None
+        # Телеметрия запусков решателя
+        self.telemetry = SolverTelemetry()
+
+        self.objective_value = None
+        self.departure_values = np.empty(0, dtype=float)
+        self.stop_place_values = np.empty(0, dtype=float)
+
+    def create_model(self) -> None:
+        departure_arrays = self.input.departure_arrays
+        location_arrays = self.input.location_arrays
+        n_departures = len(departure_arrays)
+        n_locations = len(location_arrays)
+        self.num_col = n_departures + n_locations
+
+        vessels = self.input.vessels
+        port_positions = {p: i for i, p in enumerate(self.input.ports)}
+        vessel_port_start = np.array([port_positions.get(v.port_start, -1) for v in vessels], dtype=np.int64)
+        vessel_time_start = np.array([v.time_start for v in vessels], dtype=np.int64)
+        location_vessel = location_arrays.vessel_idx
+        stop_cols = n_departures + np.arange(n_locations)
+
+        rows, cols, values, row_lower, row_upper = [], [], [], [], []
+
+        def add_rows(row_idx, col_idx, coefficients, lower, upper) -> None:
+            rows.append(self.num_row + np.asarray(row_idx, dtype=np.int64))
+            cols.append(np.asarray(col_idx, dtype=np.int64))
+            values.append(np.broadcast_to(np.asarray(coefficients, dtype=float), len(cols[-1])))
+            row_lower.append(np.asarray(lower, dtype=float))
+            row_upper.append(np.asarray(upper, dtype=float))
+            self.num_row += len(row_lower[-1])
+
+        # Баланс прибытия и отправки судна в каждом порту: входящие - исходящие - остановка = -старт
+        is_start = (
+            (location_arrays.time == vessel_time_start[location_vessel])
+            & (location_arrays.port_idx == vessel_port_start[location_vessel])
+        ).astype(float)
+        location_range = np.arange(n_locations)
+        add_rows(
+            np.concatenate((
+                np.repeat(location_range, np.diff(location_arrays.input_ptr)),
+                np.repeat(location_range, np.diff(location_arrays.output_ptr)),
+                location_range,
+            )),
+            np.concatenate((location_arrays.input_departures, location_arrays.output_departures, stop_cols)),
+            np.concatenate((
+                np.ones(len(location_arrays.input_departures)),
+                -np.ones(len(location_arrays.output_departures)),
+                -np.ones(n_locations),
+            )),
+            -is_start,
+            -is_start,
+        )
+
+        # У каждого судна должна быть ровно одна конечная точка
+        add_rows(location_vessel, stop_cols, 1, np.ones(len(vessels)), np.ones(len(vessels)))
+
+        # Максимальное количество судов в караване: проводки на (ребро, время) <= 3 * ледоколы на (ребро, время).
+        # При отложенных ограничениях строки добавляются по мере нарушения в решении (add_convoy_rows)
+        self.convoy_coefficients, self.convoy_rows, n_convoy_rows = self.get_convoy_rows()
+        if not self.input.config.lazy_convoy_constraints:
+            convoy_departures = np.nonzero(self.convoy_rows >= 0)[0]
+            add_rows(
+                self.convoy_rows[convoy_departures],
+                convoy_departures,
+                self.convoy_coefficients[convoy_departures],
+                np.full(n_convoy_rows, -highspy.kHighsInf),
+                np.zeros(n_convoy_rows),
+            )
+
+        # Баланс ледоколов
+        end_locations = np.nonzero(self.get_icebreaker_end_locations())[0]
+        self.icebreaker_balance_row = self.num_row
+        add_rows(np.zeros(len(end_locations)), stop_cols[end_locations], 1, [2], [highspy.kHighsInf])
+
+        # Целевая функция
+        cost = np.concatenate(self.get_costs())
+
+        # Переменные, которых нет ни в ограничениях, ни в целевой функции, в Pyomo не передаются в решатель
+        # и остаются равными 0
+        cols = np.concatenate(cols)
+        col_upper = np.zeros(self.num_col)
+        col_upper[cols] = 1
+        col_upper[cost != 0] = 1
+        self.col_upper = col_upper
+
+        start, index, value = self.to_csr(np.concatenate(rows), cols, np.concatenate(values), self.num_row)
+        lp = self.lp
+        lp.num_col_ = self.num_col
+        lp.num_row_ = self.num_row
+        lp.col_cost_ = cost
+        lp.col_lower_ = np.zeros(self.num_col)
+        lp.col_upper_ = col_upper
+        lp.row_lower_ = np.concatenate(row_lower)
+        lp.row_upper_ = np.concatenate(row_upper)
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.num_col_ = self.num_col
+        lp.a_matrix_.num_row_ = self.num_row
+        lp.a_matrix_.start_ = start
+        lp.a_matrix_.index_ = index
+        lp.a_matrix_.value_ = value
+        lp.integrality_ = [highspy.HighsVarType.kInteger] * self.num_col
+
+    def get_convoy_rows(self) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Коэффициенты отправлений в ограничениях каравана (1 - проводка, -3 - ледокол), номер строки
+        (ребро, время) для каждого отправления (-1 - отправление не входит в ограничения) и количество строк
+        """
+        departure_arrays = self.input.departure_arrays
+        is_icebreaker = np.array([v.is_icebreaker for v in self.input.vessels], dtype=bool)
+        coefficients = np.where(
+            departure_arrays.is_icebreaker_assistance,
+            1.0,
+            np.where(is_icebreaker[departure_arrays.vessel_idx], -3.0, 0.0),
+        )
+        convoy_departures = np.nonzero(coefficients)[0]
+        edge_t_keys, edge_t_rows = np.unique(
+            departure_arrays.edge_idx[convoy_departures].astype(np.int64) * (len(self.input.times) + 1)
+            + departure_arrays.time[convoy_departures],
+            return_inverse=True,
+        )
+        convoy_rows = np.full(len(departure_arrays), -1, dtype=np.int64)
+        convoy_rows[convoy_departures] = edge_t_rows
+        return coefficients, convoy_rows, len(edge_t_keys)
+
+    def get_icebreaker_end_locations(self) -> np.ndarray:
+        """
+        Признак вершин ледоколов в портах, где должно остаться не менее двух ледоколов
+        """
+        location_arrays = self.input.location_arrays
+        is_icebreaker = np.array([v.is_icebreaker for v in self.input.vessels], dtype=bool)
+        port_ids = np.array([p.id for p in self.input.ports])
+        return is_icebreaker[location_arrays.vessel_idx] & np.isin(
+            port_ids[location_arrays.port_idx], self.icebreaker_end_ports
+        )
+
+    def get_costs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Целевая функция: время движения / 100 для отправлений, время в пути и отклонение от конечного порта
+        для остановок судов
+        """
+        departure_arrays = self.input.departure_arrays
+        location_arrays = self.input.location_arrays
+        vessels = self.input.vessels
+        is_icebreaker = np.array([v.is_icebreaker for v in vessels], dtype=bool)
+        vessel_time_start = np.array([v.time_start for v in vessels], dtype=np.int64)
+        location_vessel = location_arrays.vessel_idx
+        time_grid = self.input.time_grid
+        stop_cost = np.where(
+            is_icebreaker[location_vessel],
+            0.0,
+            (
+                time_grid.get_hours_array(location_arrays.time)
+                - time_grid.get_hours_array(vessel_time_start[location_vessel])
+            ) + location_arrays.min_time_to_end_port * 5,
+        )
+        is_fict = np.array([e.is_fict for e in self.input.edges], dtype=bool)
+        departure_cost = np.where(
+            is_fict[departure_arrays.edge_idx],
+            0.0,
+            (
+                time_grid.get_hours_array(departure_arrays.time.astype(np.int64) + departure_arrays.duration)
+                - time_grid.get_hours_array(departure_arrays.time)
+            ) / 100,
+        )
+        return departure_cost, stop_cost
+
+    @staticmethod
+    def to_csr(
+            rows: np.ndarray,
+            cols: np.ndarray,
+            values: np.ndarray,
+            num_row: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Перевод матрицы из формата (строка, столбец, значение) в построчный CSR
+        """
+        order = np.lexsort((cols, rows))
+        start = np.searchsorted(rows[order], np.arange(num_row + 1)).astype(np.int32)
+        return start, cols[order].astype(np.int32), values[order]
+
+    def get_column_keys(self) -> dict:
+        """
+        Соответствие столбцов отправлениям и вершинам: ключи (id судна, ребро, время, признак проводки)
+        отправлений и (id судна, порт, время) вершин в порядке столбцов
+        """
+        departure_arrays = self.input.departure_arrays
+        location_arrays = self.input.location_arrays
+        vessel_ids = np.array([v.id for v in self.input.vessels], dtype=np.int64)
+        return {
+            'departure_vessel_id': vessel_ids[departure_arrays.vessel_idx],
+            'departure_edge_idx': departure_arrays.edge_idx,
+            'departure_time': departure_arrays.time,
+            'departure_is_icebreaker_assistance': departure_arrays.is_icebreaker_assistance,
+            'location_vessel_id': vessel_ids[location_arrays.vessel_idx],
+            'location_port_idx': location_arrays.port_idx,
+            'location_time': location_arrays.time,
+        }
+
+    def save_model(self, file_path: str, model_hash: str) -> None:
+        """
+        Сохранение построенной модели на диск: матрица ограничений, границы, целевая функция
+        и соответствие столбцов отправлениям и вершинам
+        """
+        lp = self.lp
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_file_path = f'{file_path}.tmp'
+            with open(tmp_file_path, 'wb') as f:
+                np.savez(
+                    f,
+                    model_hash=np.array(model_hash),
+                    num_row=np.array(self.num_row),
+                    icebreaker_balance_row=np.array(self.icebreaker_balance_row),
+                    col_cost=np.asarray(lp.col_cost_),
+                    col_upper=self.col_upper,
+                    row_lower=np.asarray(lp.row_lower_),
+                    row_upper=np.asarray(lp.row_upper_),
+                    start=np.asarray(lp.a_matrix_.start_, dtype=np.int32),
+                    index=np.asarray(lp.a_matrix_.index_, dtype=np.int32),
+                    value=np.asarray(lp.a_matrix_.value_, dtype=float),
+                    **self.get_column_keys(),
+                )
+            os.replace(tmp_file_path, file_path)
+        except OSError as e:
+            print(f'Не удалось сохранить кэш модели {file_path}: {e}')
+
+    def load_model(self, file_path: str, model_hash: str) -> bool:
+        """
+        Загрузка модели, сохраненной save_model. False - кэша нет, он построен по другим входным данным
+        или его столбцы не совпадают с отправлениями и вершинами входных данных
+        """
+        if not os.path.isfile(file_path):
+            return False
+        try:
+            with np.load(file_path, allow_pickle=False) as data:
+                if str(data['model_hash']) != model_hash:
+                    return False
+                if not all(np.array_equal(data[key], keys) for key, keys in self.get_column_keys().items()):
+                    print(f'Кэш модели {file_path} не соответствует входным данным')
+                    return False
+                self.num_col = len(data['col_cost'])
+                self.num_row = int(data['num_row'])
+                self.icebreaker_balance_row = int(data['icebreaker_balance_row'])
+                self.col_upper = data['col_upper']
+                lp = self.lp
+                lp.num_col_ = self.num_col
+                lp.num_row_ = self.num_row
+                lp.col_cost_ = data['col_cost']
+                lp.col_lower_ = np.zeros(self.num_col)
+                lp.col_upper_ = self.col_upper
+                lp.row_lower_ = data['row_lower']
+                lp.row_upper_ = data['row_upper']
+                lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+                lp.a_matrix_.num_col_ = self.num_col
+                lp.a_matrix_.num_row_ = self.num_row
+                lp.a_matrix_.start_ = data['start']
+                lp.a_matrix_.index_ = data['index']
+                lp.a_matrix_.value_ = data['value']
+                lp.integrality_ = [highspy.HighsVarType.kInteger] * self.num_col
+        except Exception as e:
+            print(f'Не удалось загрузить кэш модели {file_path}: {e}')
+            return False
+        # Коэффициенты каравана нужны для отложенных ограничений и восстанавливаются по входным данным
+        self.convoy_coefficients, self.convoy_rows, _ = self.get_convoy_rows()
+        return True
+
+    def get_highs(self) -> highspy.Highs:
+        if self.highs is None:
+            self.highs = highspy.Highs()
+            self.highs.passModel(self.lp)
+        return self.highs
+
+    def set_departure_bounds(self, lower: np.ndarray, upper: np.ndarray) -> None:
+        """
+        Границы переменных отправлений (в порядке input.departures)
+        """
+        self.get_highs().changeColsBounds(
+            len(lower), np.arange(len(lower), dtype=np.int32), lower.astype(float), upper.astype(float)
+        )
+
+    def add_convoy_rows(self, edge_idx: np.ndarray, times: np.ndarray) -> None:
+        """
+        Добавление ограничений каравана для пар (позиция ребра, время)
+        """
+        departure_arrays = self.input.departure_arrays
+        n_times = len(self.input.times) + 1
+        departures = np.nonzero(
+            (self.convoy_rows >= 0)
+            & np.isin(
+                departure_arrays.edge_idx.astype(np.int64) * n_times + departure_arrays.time,
+                np.asarray(edge_idx, dtype=np.int64) * n_times + times,
+            )
+        )[0]
+        departures = departures[np.argsort(self.convoy_rows[departures], kind='stable')]
+        _, starts = np.unique(self.convoy_rows[departures], return_index=True)
+        self.get_highs().addRows(
+            len(starts),
+            np.full(len(starts), -highspy.kHighsInf),
+            np.zeros(len(starts)),
+            len(departures),
+            starts.astype(np.int32),
+            departures.astype(np.int32),
+            self.convoy_coefficients[departures],
+        )
+        self.num_row += len(starts)
+
+    def set_icebreaker_balance(self, is_active: bool) -> None:
+        self.get_highs().changeRowBounds(
+            self.icebreaker_balance_row, 2 if is_active else -highspy.kHighsInf, highspy.kHighsInf
+        )
+
+    def solve_model(self, timelimit: float, start_values: Optional[np.ndarray] = None) -> None:
+        """
+        Решение модели. start_values - начальное решение: отправления, затем остановки
+        """
+        highs = self.get_highs()
+        highs.setOptionValue('time_limit', float(timelimit))
+        if start_values is not None:
+            start_solution = highspy.HighsSolution()
+            start_solution.col_value = np.asarray(start_values, dtype=float).tolist()
+            highs.setSolution(start_solution)
+        self.telemetry.start(highs, 'mip')
+        highs.run()
+        self.telemetry.finish()
+
+        solution = highs.getSolution()
+        if not solution.value_valid:
+            raise RuntimeError(f'Решение не найдено: {highs.modelStatusToString(highs.getModelStatus())}')
+        self.set_solution(np.array(solution.col_value), highs.getInfo().objective_function_value)
+
+    def solve_portfolio(
+            self,
+            timelimit: float,
+            portfolio_size: int,
+            gap: float,
+            start_values: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Параллельное решение модели портфелем решателей
+        """
+        result = solve_portfolio(self.get_highs(), timelimit, portfolio_size, gap, start_values)
+        for run in result['telemetry']:
+            self.telemetry.add_run(run)
+        self.set_solution(result['col_value'], result['objective'])
+
+    def set_solution(self, values: np.ndarray, objective_value: float) -> None:
+        n_departures = len(self.input.departure_arrays)
+        self.departure_values = values[:n_departures]
+        self.stop_place_values = values[n_departures:]
+        self.objective_value = objective_value
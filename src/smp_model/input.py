@@ -1,9 +1,11 @@
+import hashlib
 import os
 from collections import defaultdict
 
+import numpy as np
 import pandas as pd
-import math
-from typing import Dict, List, Tuple
+import networkx as nx
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from src.smp_model.entity.edge_t_connection import EdgeTConnection
@@ -11,19 +13,38 @@ from src.smp_model.entity.port import Port
 from src.smp_model.entity.vessel import Vessel
 from src.smp_model.entity.edge import Edge
 from src.smp_model.entity.speed_decrease import SpeedDecrease
-from src.smp_model.entity.departure import Departure
-from src.smp_model.entity.location import Location
+from src.smp_model.entity.array_index import ArrayIndex
+from src.smp_model.entity.departure import Departure, DepartureArrays
+from src.smp_model.entity.location import Location, LocationArrays
+from src.smp_model.excel_cache import (
+    CACHE_FOLDER_NAME, create_frame, get_file_hash, get_frame_arrays, read_excel_cached,
+)
 from src.smp_model.graph.base_graph import BaseGraph
 from src.smp_model.model_config import ModelConfig
+from src.smp_model.speed_table import SpeedTable
+from src.smp_model.time_grid import TimeGrid
 from src.smp_model.utils import choose_week_for_calc
 
+# Листы model_data.xlsx
+MODEL_DATA_SHEET_NAMES = ['points', 'edges', 'vessels', 'icebreakers', 'speed_decrease']
+# Снимок входных данных модели в папке кэша
+SNAPSHOT_FILE_NAME = 'model_input.npz'
+# Версия формата снимка: увеличивается при изменении состава сохраняемых колонок или построения сети
+SNAPSHOT_FORMAT_VERSION = 1
+# Колонки хранилищ отправлений и вершин в снимке (в порядке аргументов extend)
+SNAPSHOT_DEPARTURE_COLUMNS = ['vessel_idx', 'edge_idx', 'time', 'speed', 'duration', 'is_icebreaker_assistance']
+SNAPSHOT_LOCATION_COLUMNS = ['vessel_idx', 'port_idx', 'time', 'min_time_to_end_port']
+
+
 class ModelInput:
     def __init__(
             self,
             input_folder_path: str,
             output_folder_path: str,
 
-            model_config: ModelConfig
+            model_config: ModelConfig,
+            # Снимок входных данных (см. save_snapshot): сеть судов восстанавливается по нему, а не строится заново
+            snapshot: Dict[str, np.ndarray] = None,
     ):
         print('Подготовка входных данных модели')
         self.input_folder_path: str = input_folder_path
@@ -38,6 +59,9 @@ class ModelInput:
 
         self.main_graph = BaseGraph()
 
+        self.time_grid: TimeGrid = TimeGrid.create(
+            self.config.planning_hours, self.config.hours_in_interval, self.config.time_grid,
+        )
         self.times: List[int] = self.generate_time()
 
         self.ports: List[Port] = []
@@ -49,43 +73,78 @@ class ModelInput:
         self.edges: List[Edge] = []
         self.edges_dict: Dict[Tuple[int, int], Edge] = {}
 
+        # Отправления и вершины сети хранятся по колонкам, списки содержат их представления
+        self.departure_arrays: DepartureArrays = None
         self.departures: List[Departure] = []
-        self.departures_dict = {}
+        # (судно, ребро, время, признак проводки) -> отправление
+        self.departures_dict: ArrayIndex = None
         self.edge_t_connections: Dict[Tuple[Edge, int], EdgeTConnection] = {}
 
+        self.location_arrays: LocationArrays = None
         self.locations: List[Location] = []
-        self.locations_dict = {}
+        # (судно, порт, время) -> вершина
+        self.locations_dict: ArrayIndex = None
 
         self.speed_decrease_dict: Dict[Tuple[str, int, bool], SpeedDecrease] = {}
+        self.speed_table: SpeedTable = None
 
         self.min_time_from_start: Dict[Tuple[Vessel, Port], float] = {}
         self.edges_for_main_graph: List[Edge] = []
 
+        # Позиция порта в матрицах кратчайшего времени хода
+        self.port_positions: Dict[Port, int] = {}
+        # Матрицы кратчайшего времени хода между всеми портами для каждого типа судна (type_max_speed_str)
+        self.min_time_matrices: Dict[str, np.ndarray] = {}
+
+        # Листы model_data.xlsx
+        self.model_data: Dict[str, pd.DataFrame] = read_excel_cached(
+            os.path.join(self.input_folder_path, 'model_data.xlsx'), MODEL_DATA_SHEET_NAMES,
+        )
+        # Хэш данных, не зависящих от заявок (заполняется при работе через снимок, см. create)
+        self.static_input_hash: str = None
+
         self.read_ports_xlsx()
         self.read_edges_xlsx()
-        self.read_vessels_xlsx()
+        if snapshot is None:
+            self.read_vessels_xlsx()
+        else:
+            # Заявки, по которым построен снимок; текущие заявки применяются update_vessels
+            self.read_vessels_xlsx(self.get_snapshot_frame(snapshot, 'vessels'))
         self.read_icebreakers_xlsx()
         self.speed_decrease_xlsx()
 
         self.create_main_graph()
+        self.calculate_min_time_matrices()
         self.calculate_min_time_from_start()
         self.fill_best_routes()
 
-        self.generate_departures()
-        self.generate_locations()
-        self.generate_links()
-        
-        # Заплатка, ждем Дейкстру
+        if snapshot is None:
+            self.generate_departures()
+            self.generate_locations()
+            self.generate_links()
+            if self.config.prune_network:
+                self.prune_network()
+        else:
+            self.read_snapshot_network(snapshot)
+
+        self.fill_port_min_dist()
+
+    def fill_port_min_dist(self) -> None:
+        """
+        Минимальное время хода между портами по самому быстрому типу судна
+        """
+        fastest_min_time = np.minimum.reduce([
+            self.min_time_matrices[weight] for weight in {v.type_max_speed_str for v in self.vessels}
+        ])
         for p_from in self.ports:
             for p_to in self.ports:
-                if (p_from.id, p_to.id) in self.edges_dict.keys():
-                    p_from.add_min_dist(p_to, round(self.edges_dict[p_from.id, p_to.id].distance / 15, 0) * 2)
-                else:
-                    p_from.add_min_dist(p_to, 300)
+                p_from.add_min_dist(p_to, fastest_min_time[self.port_positions[p_from], self.port_positions[p_to]])
 
-    def fill_best_routes(self):
-        vessel_best_routes = []
-        for v in self.vessels:
+    def fill_best_routes(self, vessels: List[Vessel] = None):
+        """
+        Поиск лучших маршрутов и допустимых ребер для судов (по умолчанию - для всех)
+        """
+        for v in self.vessels if vessels is None else vessels:
             if v.is_icebreaker:
                 continue
             _, best_routes = self.main_graph.k_shortest_paths(
@@ -98,53 +157,86 @@ class ModelInput:
                 for best_route in best_routes
                 for port_start, port_end in zip(best_route[:-1], best_route[1:])
             }
-            for k, best_route in enumerate(best_routes):
-                for port in best_route:
-                    vessel_best_routes.append((self.config.start_date, v.name, k, port.name, port.latitude, port.longitude))
             possible_ports = set()
             for best_route in best_routes:
                 for port in best_route:
                     possible_ports.add(port)
             v.fill_possible_edges(possible_edges, possible_ports)
+            v.best_routes = best_routes
+
+        vessel_best_routes = []
+        for v in self.vessels:
+            if v.is_icebreaker:
+                continue
+            for k, best_route in enumerate(v.best_routes):
+                for port in best_route:
+                    vessel_best_routes.append((self.config.start_date, v.name, k, port.name, port.latitude, port.longitude))
         self.vessel_best_routes_df = pd.DataFrame(
             vessel_best_routes, columns=["date", "vessel_name", "k", "port_name", "latitude", "longitude"],
         )
 
     def create_main_graph(self) -> None:
-        vessel_type_w_max_speed = {v.type_max_speed: v.type_max_speed_str for v in self.vessels}
-        graph_edges = []
-        for e in self.edges_for_main_graph:
-            graph_edges.append((
-                e.port_from,
-                e.port_to,
-                {
-                    v_key:
-                    self.calculate_edge_time_by_vessel_class_speed(
-                        e.distance,
-                        e.avg_norm,
-                        vessel_type,
-                        max_speed
-                    )
-                    for (vessel_type, max_speed), v_key in vessel_type_w_max_speed.items()
-                }
-            ))
-        self.main_graph.add_edges_from(graph_edges)
-
-    def calculate_min_time_from_start(self):
+        self.main_graph.add_edges_from((e.port_from, e.port_to) for e in self.edges_for_main_graph)
+        # Изолированные порты нужны для матриц кратчайшего времени хода
+        self.main_graph.add_nodes_from(self.ports)
+        self.add_vessel_types_to_graph(self.vessels)
+
+    def add_vessel_types_to_graph(self, vessels: List[Vessel]) -> List[str]:
+        """
+        Добавление весов ребер основного графа (времени хода) для типов судов, которых еще нет в графе
+
+        Returns:
+            Список добавленных весов (type_max_speed_str)
+        """
+        vessel_type_w_max_speed = {
+            v.type_max_speed: v.type_max_speed_str
+            for v in vessels
+            if v.type_max_speed_str not in self.min_time_matrices
+        }
+        if not vessel_type_w_max_speed:
+            return []
+        edge_times = self.speed_table.calculate_edge_times(
+            [e.distance for e in self.edges_for_main_graph],
+            np.round(np.array([e.avg_norm for e in self.edges_for_main_graph], dtype=float)),
+            [self.speed_table.get_class_position(vessel_type) for vessel_type, _ in vessel_type_w_max_speed],
+            [max_speed for _, max_speed in vessel_type_w_max_speed],
+        )
+        for e_num, e in enumerate(self.edges_for_main_graph):
+            edge_attr = self.main_graph.edges[e.port_from, e.port_to]
+            for type_num, v_key in enumerate(vessel_type_w_max_speed.values()):
+                edge_attr[v_key] = edge_times[type_num, e_num]
+        return list(vessel_type_w_max_speed.values())
+
+    def calculate_min_time_matrices(self, weights: List[str] = None) -> None:
+        """
+        Расчет матриц кратчайшего времени хода между всеми портами, по одной на каждый тип судна
+        """
+        self.port_positions = {p: i for i, p in enumerate(self.ports)}
+        for weight in {v.type_max_speed_str for v in self.vessels} if weights is None else weights:
+            self.min_time_matrices[weight] = nx.floyd_warshall_numpy(self.main_graph, nodelist=self.ports, weight=weight)
+
+    def get_min_time(self, port_from: Port, port_to: Port, weight: str) -> float:
+        """
+        Кратчайшее время хода из port_from в port_to для типа судна weight
+        """
+        min_time = self.min_time_matrices[weight][self.port_positions[port_from], self.port_positions[port_to]]
+        if np.isinf(min_time):
+            raise nx.NetworkXNoPath(f"Невозможно построить путь из {port_from} в {port_to}")
+        return float(min_time)
+
+    def calculate_min_time_from_start(self, vessels: List[Vessel] = None):
         for p in self.ports:
-            for v in self.vessels:
-                self.min_time_from_start[v, p] = (
-                    self.main_graph.k_shortest_paths(v.port_start, p, k=1, weight=v.type_max_speed_str)[0][0]
-                )
+            for v in self.vessels if vessels is None else vessels:
+                self.min_time_from_start[v, p] = self.get_min_time(v.port_start, p, v.type_max_speed_str)
 
     def generate_time(self) -> List[int]:
-        return list(range(math.ceil(self.config.planning_hours / self.config.hours_in_interval)))
+        return list(range(len(self.time_grid)))
     
     def date_to_time(self, date: datetime) -> int:
-        return math.ceil((date - self.config.start_date).total_seconds() / 3600 / self.config.hours_in_interval)
+        return self.time_grid.get_time((date - self.config.start_date).total_seconds() / 3600)
 
     def read_ports_xlsx(self) -> None:
-        port_data = pd.read_excel(os.path.join(self.input_folder_path, 'model_data.xlsx'), sheet_name='points')
+        port_data = self.model_data['points']
         for _, row in port_data.iterrows():
             port = Port(
                 id=row['point_id'],
@@ -156,8 +248,17 @@ class ModelInput:
             self.ports_dict[port.id] = port
         return 
     
-    def read_vessels_xlsx(self) -> None:
-        vessel_data = pd.read_excel(os.path.join(self.input_folder_path, 'model_data.xlsx'), sheet_name='vessels')
+    def read_vessels_xlsx(self, vessel_data: pd.DataFrame = None) -> None:
+        for vessel in self.create_vessels(self.model_data['vessels'] if vessel_data is None else vessel_data):
+            self.vessels.append(vessel)
+            self.vessels_dict[vessel.id] = vessel
+        return
+
+    def create_vessels(self, vessel_data: pd.DataFrame) -> List[Vessel]:
+        """
+        Судна из таблицы заявок (лист vessels), попадающие в горизонт планирования
+        """
+        vessels = []
         vessel_data = vessel_data[
             (vessel_data['date_start'] < self.config.end_date + timedelta(hours=self.config.hours_in_cross))
             & (vessel_data['date_start'] >= self.config.start_date)
@@ -189,12 +290,11 @@ class ModelInput:
                 max_speed=row.max_speed,
                 class_type=row.class_type,
             )
-            self.vessels.append(vessel)
-            self.vessels_dict[vessel.id] = vessel
-        return 
+            vessels.append(vessel)
+        return vessels
     
     def read_icebreakers_xlsx(self) -> None:
-        icebreaker_data = pd.read_excel(os.path.join(self.input_folder_path, 'model_data.xlsx'), sheet_name='icebreakers')
+        icebreaker_data = self.model_data['icebreakers']
         for row in icebreaker_data.itertuples():
             icebreaker = Vessel(
                 id=row.vessel_id,
@@ -211,11 +311,11 @@ class ModelInput:
         return 
     
     def read_edges_xlsx(self) -> None:
-        edge_data = pd.read_excel(os.path.join(self.input_folder_path, 'model_data.xlsx'), sheet_name='edges')
+        edge_data = self.model_data['edges']
         acc_vel_dict, acc_len_dict = {}, {}
         if os.path.isfile(os.path.join(self.input_folder_path, 'velocity_env.xlsx')):
             # velocity_book = pd.ExcelFile(os.path.join(self.input_folder_path, 'velocity_env.xlsx'))
-            vel_edge_df = pd.read_excel(os.path.join(self.input_folder_path, 'velocity_env.xlsx'), sheet_name='Sheet1')
+            vel_edge_df = read_excel_cached(os.path.join(self.input_folder_path, 'velocity_env.xlsx'), ['Sheet1'])['Sheet1']
             min_vel_date = vel_edge_df['date'].min()
             if min_vel_date >= self.config.start_date:
                 vel_date = min_vel_date
@@ -262,7 +362,7 @@ class ModelInput:
         return
 
     def speed_decrease_xlsx(self) -> None:
-        speed_decrease_data = pd.read_excel(os.path.join(self.input_folder_path, 'model_data.xlsx'), sheet_name='speed_decrease')
+        speed_decrease_data = self.model_data['speed_decrease']
         for row in speed_decrease_data.itertuples():
             for i in range(row.integer_velocity_from, row.integer_velocity_to + 1):
                 speed_decrease = SpeedDecrease(  
@@ -274,6 +374,7 @@ class ModelInput:
                     base_speed=row.base_speed
                 )
                 self.speed_decrease_dict[speed_decrease.class_type, speed_decrease.integer_velocity, speed_decrease.is_icebreaker_assistance] = speed_decrease
+        self.speed_table = SpeedTable(self.speed_decrease_dict)
 
     def calculate_edge_time_by_vessel_class_speed(
             self,
@@ -282,46 +383,171 @@ class ModelInput:
             vessel_class: str,
             max_speed: float,
     ) -> float:
-        integer_integral_ice = round(integer_integral_ice, 0)
-        if integer_integral_ice < 10:
-            return 99999
-        possible_speed = 0.1
-        for is_icebreaker_assistance in [True, False]:
-            if (vessel_class, integer_integral_ice, is_icebreaker_assistance) in self.speed_decrease_dict.keys():
-                speed_decrease = self.speed_decrease_dict[vessel_class, integer_integral_ice, is_icebreaker_assistance]
-                if speed_decrease.is_possible:
-                    if speed_decrease.base_speed == 'max_speed':
-                        speed = max_speed * (1 - speed_decrease.speed_decrease_pct / 100)
-                    else:
-                        speed = min(integer_integral_ice * (1 - speed_decrease.speed_decrease_pct / 100), max_speed)   
-                    if speed > possible_speed:
-                        possible_speed = speed
-        return length / possible_speed
-
-        
+        edge_time = self.speed_table.calculate_edge_times(
+            [length],
+            [round(integer_integral_ice, 0)],
+            [self.speed_table.get_class_position(vessel_class)],
+            [max_speed],
+        )
+        return float(edge_time[0, 0])
 
     def calculate_ice_depending_values(self, vessel: Vessel, edge: Edge) -> List[Tuple[float, bool, bool]]:
-        integer_integral_ice = round(edge.avg_norm, 0)
         if edge.is_fict:
             return [(0, False, True)]
-        result = []
-        for is_icebreaker_assistance in [True, False]:
-            if (vessel.class_type, integer_integral_ice, is_icebreaker_assistance) in self.speed_decrease_dict.keys():
-                speed_decrease = self.speed_decrease_dict[vessel.class_type, integer_integral_ice, is_icebreaker_assistance]
-                if speed_decrease.base_speed == 'max_speed':
-                    speed = vessel.max_speed * (1 - speed_decrease.speed_decrease_pct / 100)
-                else:
-                    speed = min(integer_integral_ice * (1 - speed_decrease.speed_decrease_pct / 100), vessel.max_speed)
-                result.append((speed, is_icebreaker_assistance, speed_decrease.is_possible))
-        return result
-    
-    # Требует умной фильтрации
+        return self.speed_table.get_ice_depending_values(vessel.class_type, vessel.max_speed, round(edge.avg_norm, 0))
+
     def generate_departures(self):
-        for e in self.edges:
+        if self.config.vectorized_departures:
+            self.generate_departures_numpy()
+        else:
+            self.generate_departures_python()
+        return
+
+    def set_departures(self, departure_arrays: DepartureArrays) -> None:
+        """
+        Установка хранилища отправлений и индекса (судно, ребро, время, признак проводки) -> отправление
+        """
+        self.departure_arrays = departure_arrays
+        self.departures = departure_arrays.views
+        self.departures_dict = ArrayIndex(
+            [self.vessels, self.edges, None, None],
+            [len(self.vessels), len(self.edges), len(self.times), 2],
+            [
+                departure_arrays.vessel_idx,
+                departure_arrays.edge_idx,
+                departure_arrays.time,
+                departure_arrays.is_icebreaker_assistance,
+            ],
+            departure_arrays.views,
+        )
+
+    def set_locations(self, location_arrays: LocationArrays) -> None:
+        """
+        Установка хранилища вершин и индекса (судно, порт, время) -> вершина
+        """
+        self.location_arrays = location_arrays
+        self.locations = location_arrays.views
+        self.locations_dict = ArrayIndex(
+            [self.vessels, self.ports, None],
+            [len(self.vessels), len(self.ports), len(self.times)],
+            [location_arrays.vessel_idx, location_arrays.port_idx, location_arrays.time],
+            location_arrays.views,
+        )
+
+    def generate_departures_numpy(self):
+        columns = self.calculate_departure_columns(np.arange(len(self.vessels)))
+        departure_arrays = DepartureArrays(self.vessels, self.edges)
+        departure_arrays.extend(*columns)
+        self.set_departures(departure_arrays)
+        self.fill_edge_t_connections(keep_empty=True)
+        return
+
+    def calculate_departure_columns(self, vessel_positions: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Генерация отправлений для судов с заданными позициями: скорости и длительности считаются один раз
+        на (судно, ребро, режим проводки), после чего отправления разворачиваются по оси времени массивами numpy
+
+        Returns:
+            Колонки DepartureArrays (судно, ребро, время, скорость, длительность, признак проводки),
+            упорядоченные по ребру, времени, судну и режиму проводки
+        """
+        n_times = len(self.times)
+        vessel_positions = np.asarray(vessel_positions, dtype=np.int64)
+        vessels = [self.vessels[i] for i in vessel_positions.tolist()]
+
+        is_fict = np.array([e.is_fict for e in self.edges], dtype=bool)
+        edge_positions = {e: i for i, e in enumerate(self.edges)}
+
+        # Скорости судов на всех ребрах в обоих режимах проводки
+        speed, _, is_possible = self.speed_table.calculate_speeds(
+            [self.speed_table.get_class_position(v.class_type) for v in vessels],
+            [v.max_speed for v in vessels],
+            np.round(np.array([e.avg_norm for e in self.edges], dtype=float)),
+        )
+        # Стоянка (фиктивное ребро) всегда возможна без проводки
+        speed[:, is_fict, :] = 0
+        is_possible[:, is_fict, :] = False
+        is_possible[:, is_fict, SpeedTable.ASSISTANCE_MODES.index(False)] = True
+        is_possible[:, ~is_fict, :] &= speed[:, ~is_fict, :] > 0
+
+        # Допустимые ребра судов: ледоколы ходят по всем ребрам, судна - по ребрам лучших маршрутов
+        is_allowed = np.zeros(is_possible.shape[:2], dtype=bool)
+        for v_num, v in enumerate(vessels):
+            if v.is_icebreaker:
+                is_allowed[v_num, :] = True
+                continue
+            for e in v.possible_edges:
+                is_allowed[v_num, edge_positions[e]] = True
+            for p in v.possible_ports:
+                is_allowed[v_num, edge_positions[self.edges_dict[p.id, p.id]]] = True
+        is_possible &= is_allowed[:, :, None]
+
+        # Кандидаты на отправление - допустимые комбинации (судно, ребро, режим проводки)
+        cand_vessel, cand_edge, cand_mode = np.nonzero(is_possible)
+        cand_speed = speed[cand_vessel, cand_edge, cand_mode]
+        cand_is_fict = is_fict[cand_edge]
+        distances = np.array([e.distance for e in self.edges], dtype=float)[cand_edge]
+        # Время в пути в часах; стоянка длится один шаг сетки
+        cand_travel_hours = np.where(cand_is_fict, 0, np.round(distances / np.where(cand_speed > 0, cand_speed, 1)))
+        is_finite = np.isfinite(cand_travel_hours)
+        cand_travel_hours = np.where(is_finite, cand_travel_hours, 0)
+        cand_time_from = np.maximum(np.array([v.time_start for v in vessels], dtype=np.int64)[cand_vessel], 0)
+        # Последний момент отправления, при котором прибытие попадает в горизонт
+        cand_time_to = np.where(cand_is_fict, n_times - 2, self.time_grid.get_last_departure_times(cand_travel_hours))
+        cand_assistance = np.array(SpeedTable.ASSISTANCE_MODES, dtype=bool)[cand_mode]
+        counts = np.where(is_finite, np.maximum(cand_time_to - cand_time_from + 1, 0), 0)
+
+        # Разворачиваем кандидатов по времени отправления
+        cand_idx = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.cumsum(counts) - counts
+        dep_time = np.arange(counts.sum()) - np.repeat(offsets, counts) + np.repeat(cand_time_from, counts)
+        dep_edge = cand_edge[cand_idx]
+        # Порядок как в построчном расчете: ребро, время, судно, режим проводки (кандидаты упорядочены по судну)
+        order = np.lexsort((cand_idx, dep_time, dep_edge))
+        cand_idx, dep_time, dep_edge = cand_idx[order], dep_time[order], dep_edge[order]
+        # Длительность в шагах сетки: прибытие в ближайший к расчетному момент сетки
+        dep_duration = np.where(
+            cand_is_fict[cand_idx],
+            1,
+            self.time_grid.get_arrival_times(dep_time, cand_travel_hours[cand_idx]) - dep_time,
+        )
+
+        return (
+            vessel_positions[cand_vessel[cand_idx]],
+            dep_edge,
+            dep_time,
+            cand_speed[cand_idx],
+            dep_duration,
+            cand_assistance[cand_idx],
+        )
+
+    def fill_edge_t_connections(self, keep_empty: bool) -> None:
+        """
+        Допустимые судна для каждой пары (ребро, время) по сгенерированным отправлениям
+
+        :param keep_empty: сохранять пары (ребро, время) без отправлений
+        """
+        allowed_vessels = defaultdict(dict)
+        for v_num, e_num, t in zip(
+                self.departure_arrays.vessel_idx.tolist(),
+                self.departure_arrays.edge_idx.tolist(),
+                self.departure_arrays.time.tolist(),
+        ):
+            allowed_vessels[e_num, t][self.vessels[v_num]] = None
+        self.edge_t_connections = {}
+        for e_num, e in enumerate(self.edges):
+            for t in self.times:
+                if keep_empty or (e_num, t) in allowed_vessels:
+                    self.edge_t_connections[e, t] = EdgeTConnection(e, t)
+                    self.edge_t_connections[e, t].set_allowed_vessels(list(allowed_vessels.get((e_num, t), ())))
+
+    def generate_departures_python(self):
+        departure_rows = []
+        for e_num, e in enumerate(self.edges):
             for t in self.times:
                 self.edge_t_connections[e, t] = EdgeTConnection(e, t)
                 allowed_vessels = []
-                for v in self.vessels:
+                for v_num, v in enumerate(self.vessels):
                     if (
                          t < v.time_start
                         #t < v.time_start + self.min_time_from_start[v, e.port_from] - 1
@@ -329,67 +555,411 @@ class ModelInput:
                         continue
                     for (speed, is_icebreaker_assistance, is_possible) in self.calculate_ice_depending_values(v, e):
                         if is_possible:
-                            departure = Departure(
-                                vessel=v,
-                                edge=e,
-                                time=t,
-                                speed=speed,
-                                is_icebreaker_assistance=is_icebreaker_assistance
-                            )
+                            if e.is_fict:
+                                time_to = t + 1 if t + 1 < len(self.times) else -1
+                            else:
+                                time_to = self.time_grid.get_arrival_time(t, Departure.calculate_travel_hours(e, speed))
+                            duration = time_to - t
                             if (
-                                t + departure.duration in self.times
+                                time_to >= 0
                                 and (
                                     v.is_icebreaker
                                     or e in v.possible_edges
                                     or (e.is_fict and e.port_from in v.possible_ports)
                                 )
                             ):
-                                self.departures.append(departure)
-                                self.departures_dict[v, e, t, is_icebreaker_assistance] = departure
+                                departure_rows.append((v_num, e_num, t, speed, duration, is_icebreaker_assistance))
                                 allowed_vessels.append(v)
                 allowed_vessels = list(set(allowed_vessels))
                 self.edge_t_connections[e, t].set_allowed_vessels(allowed_vessels)
+
+        departure_arrays = DepartureArrays(self.vessels, self.edges)
+        departure_arrays.extend(*(list(column) for column in zip(*departure_rows)) if departure_rows else [[]] * 6)
+        self.set_departures(departure_arrays)
         return 
     
     # Требует умной фильтрации
     def generate_locations(self):
-        for v in self.vessels:
-            for p in self.ports:
-                if v.port_end:
-                    min_time_to_port_end = self.main_graph.k_shortest_paths(p, v.port_end, weight=v.type_max_speed_str)[0][0]
-                else:
-                    min_time_to_port_end = 0
-                for t in self.times:
+        location_arrays = LocationArrays(self.vessels, self.ports, self.departure_arrays)
+        location_arrays.extend(*self.calculate_location_columns(np.arange(len(self.vessels))))
+        self.set_locations(location_arrays)
+        return
+
+    def calculate_location_columns(self, vessel_positions: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Вершины сети для судов с заданными позициями
+
+        Returns:
+            Колонки LocationArrays (судно, порт, время, минимальное время до конечного порта),
+            упорядоченные по судну, порту и времени
+        """
+        n_times = len(self.times)
+        vessel_idx, port_idx, times = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        min_times_to_port_end = [np.empty(0, dtype=float)]
+        for v_num in np.asarray(vessel_positions, dtype=np.int64).tolist():
+            v = self.vessels[v_num]
+            if v.port_end:
+                min_time_to_port_end = [self.get_min_time(p, v.port_end, v.type_max_speed_str) for p in self.ports]
+            else:
+                min_time_to_port_end = [0] * len(self.ports)
+            vessel_times = np.arange(max(v.time_start, 0), n_times)
+            # TODO: Фильтр убивает
+            #t < v.time_start + self.min_time_from_start[v, p] - 1
+            vessel_idx.append(np.full(len(self.ports) * len(vessel_times), v_num))
+            port_idx.append(np.repeat(np.arange(len(self.ports)), len(vessel_times)))
+            times.append(np.tile(vessel_times, len(self.ports)))
+            min_times_to_port_end.append(np.repeat(min_time_to_port_end, len(vessel_times)))
+        return tuple(np.concatenate(column) for column in (vessel_idx, port_idx, times, min_times_to_port_end))
+
+    def generate_links(self):
+        self.link_locations()
+        self.link_icebreaker_departures()
+        self.fill_vessel_locations()
+        return
+
+    def fill_vessel_locations(self) -> None:
+        locations_by_vessel = np.argsort(self.location_arrays.vessel_idx, kind='stable')
+        bounds = np.searchsorted(
+            self.location_arrays.vessel_idx[locations_by_vessel], np.arange(len(self.vessels) + 1)
+        ).tolist()
+        for v_num, v in enumerate(self.vessels):
+            v.locations_by_vessel = [self.locations[i] for i in locations_by_vessel[bounds[v_num]:bounds[v_num + 1]].tolist()]
+
+    def link_locations(self) -> None:
+        """
+        Привязка отправлений к вершинам отправления и прибытия. Вершины ищутся одним поиском по
+        целочисленным ключам (судно, порт, время) для всех отправлений сразу
+        """
+        departure_arrays = self.departure_arrays
+        port_from = np.array([self.port_positions[e.port_from] for e in self.edges], dtype=np.int64)
+        port_to = np.array([self.port_positions[e.port_to] for e in self.edges], dtype=np.int64)
+
+        location_from = self.locations_dict.find_columns([
+            departure_arrays.vessel_idx,
+            port_from[departure_arrays.edge_idx],
+            departure_arrays.time,
+        ])
+        location_to = self.locations_dict.find_columns([
+            departure_arrays.vessel_idx,
+            port_to[departure_arrays.edge_idx],
+            departure_arrays.time.astype(np.int64) + departure_arrays.duration,
+        ])
+        self.location_arrays.set_links(location_from, location_to)
+
+    def link_icebreaker_departures(self) -> None:
+        """
+        Индекс отправлений ледоколов без проводки по (ребро, время) для possible_icebreaker_departures
+        """
+        departure_arrays = self.departure_arrays
+        is_icebreaker = np.array([v.is_icebreaker for v in self.vessels], dtype=bool)
+        icebreaker_departures = np.nonzero(
+            is_icebreaker[departure_arrays.vessel_idx] & ~departure_arrays.is_icebreaker_assistance
+        )[0]
+        icebreaker_departures_by_edge_t = defaultdict(list)
+        for i, e_num, t in zip(
+                icebreaker_departures.tolist(),
+                departure_arrays.edge_idx[icebreaker_departures].tolist(),
+                departure_arrays.time[icebreaker_departures].tolist(),
+        ):
+            icebreaker_departures_by_edge_t[e_num, t].append(self.departures[i])
+        departure_arrays.icebreaker_departures_by_edge_t = dict(icebreaker_departures_by_edge_t)
+
+    def prune_network(self, vessels: List[Vessel] = None):
+        """
+        Удаление вершин и дуг сети, которые не могут лежать на допустимом пути судна.
+
+        Прямой проход ищет вершины, достижимые из стартовой позиции судна. Отправление с проводкой допустимо
+        только если на том же ребре в тот же момент есть достижимое отправление ледокола, поэтому ледоколы
+        обрабатываются первыми. Обратный проход оставляет только дуги, ведущие в сохраненные вершины: так как
+        остановка возможна в любой вершине, каждая достижимая вершина является допустимым концом пути.
+
+        :param vessels: судна, сеть которых сокращается (по умолчанию - все). Если среди них нет ледоколов,
+            сеть ледоколов считается уже сокращенной
+        """
+        vessels = self.vessels if vessels is None else vessels
+        departure_arrays, location_arrays = self.departure_arrays, self.location_arrays
+        departures_before, locations_before = len(self.departures), len(self.locations)
+
+        output_ptr = location_arrays.output_ptr.tolist()
+        output_departures = location_arrays.output_departures.tolist()
+        departure_location_to = location_arrays.departure_location_to.tolist()
+        departure_edge = departure_arrays.edge_idx.tolist()
+        departure_time = departure_arrays.time.tolist()
+        departure_assistance = departure_arrays.is_icebreaker_assistance.tolist()
+
+        # Сеть остальных судов сохраняется целиком
+        vessel_positions = {v: i for i, v in enumerate(self.vessels)}
+        pruned_vessels = np.array([vessel_positions[v] for v in vessels], dtype=np.int64)
+        kept_locations = ~np.isin(location_arrays.vessel_idx, pruned_vessels)
+        kept_departures = ~np.isin(departure_arrays.vessel_idx, pruned_vessels)
+        # Пары (позиция ребра, время), на которых возможна проводка ледоколом
+        escort_edge_times = set()
+        if not any(v.is_icebreaker for v in vessels):
+            is_icebreaker = np.array([v.is_icebreaker for v in self.vessels], dtype=bool)
+            escort = is_icebreaker[departure_arrays.vessel_idx] & ~departure_arrays.is_icebreaker_assistance
+            escort_edge_times.update(zip(departure_arrays.edge_idx[escort].tolist(), departure_arrays.time[escort].tolist()))
+        for v in sorted(vessels, key=lambda x: not x.is_icebreaker):
+            source = self.locations_dict.find((v, v.port_start, v.time_start))
+            if source < 0:
+                # Стартовая вершина вне горизонта - сеть судна не сокращаем
+                for l in v.locations_by_vessel:
+                    kept_locations[l.idx] = True
+                    kept_departures[output_departures[output_ptr[l.idx]:output_ptr[l.idx + 1]]] = True
+                continue
+            reached = {source}
+            stack = [source]
+            vessel_departures = []
+            while stack:
+                l = stack.pop()
+                for d in output_departures[output_ptr[l]:output_ptr[l + 1]]:
                     if (
-                         t < v.time_start
-                        #t < v.time_start + self.min_time_from_start[v, p] - 1
+                        departure_assistance[d]
+                        and not v.is_icebreaker
+                        and (departure_edge[d], departure_time[d]) not in escort_edge_times
                     ):
                         continue
-                    # TODO: Фильтр убивает
-                    location = Location(
-                        vessel=v,
-                        port=p,
-                        time=t,
-                        min_time_to_port_end=min_time_to_port_end,
-                    )
-                    self.locations.append(location)
-                    self.locations_dict[v, p, t] = location
+                    vessel_departures.append(d)
+                    if v.is_icebreaker and not departure_assistance[d]:
+                        escort_edge_times.add((departure_edge[d], departure_time[d]))
+                    l_to = departure_location_to[d]
+                    if l_to not in reached:
+                        reached.add(l_to)
+                        stack.append(l_to)
+            kept_locations[list(reached)] = True
+            kept_departures[vessel_departures] = True
+
+        # Обратный проход: оставляем дуги между сохраненными вершинами
+        self.set_departures(departure_arrays.take(np.nonzero(kept_departures)[0]))
+        self.set_locations(location_arrays.take(np.nonzero(kept_locations)[0], self.departure_arrays))
+        self.generate_links()
+        self.fill_edge_t_connections(keep_empty=False)
+
+        print(
+            f'Сокращение сети: отправления {departures_before} -> {len(self.departures)},'
+            f' локации {locations_before} -> {len(self.locations)}'
+        )
         return
 
-    def generate_links(self):
-        for d in self.departures:
-            if (
-                d.time + d.duration in self.times
-                and (d.vessel, d.edge.port_from, d.time) in self.locations_dict
-                and (d.vessel, d.edge.port_to, d.time + d.duration) in self.locations_dict
-            ):
-                self.locations_dict[d.vessel, d.edge.port_to, d.time + d.duration].add_input_departure(d)
-                self.locations_dict[d.vessel, d.edge.port_from, d.time].add_output_departure(d)
-            for icebreaker in [v for v in self.vessels if v.is_icebreaker and v.id != d.vessel.id]:
-                if (icebreaker, d.edge, d.time) in self.departures_dict.keys():
-                    d.add_possible_icebreaker(self.departures_dict[icebreaker, d.edge, d.time])
-
-        for l in self.locations:
-            self.vessels_dict[l.vessel.id].add_location(l)
+    def update_vessels(self, vessel_data: pd.DataFrame) -> None:
+        """
+        Инкрементальное обновление входных данных при изменении таблицы заявок (лист vessels).
 
+        Порты, ребра, ледовая обстановка, основной граф, таблица скоростей и сеть ледоколов не меняются.
+        Лучшие маршруты, отправления и вершины пересчитываются только для добавленных и измененных заявок,
+        сеть остальных судов переиспользуется. Результат совпадает с полным построением ModelInput
+        """
+        def get_request(v: Vessel) -> tuple:
+            return v.name, v.port_start, v.port_end, v.time_start, v.max_speed, v.class_type
+
+        previous_vessels = list(self.vessels)
+        previous_requests = {v.id: v for v in previous_vessels if not v.is_icebreaker}
+        vessels = []
+        for vessel in self.create_vessels(vessel_data):
+            previous_vessel = previous_requests.get(vessel.id)
+            if previous_vessel is not None and get_request(previous_vessel) == get_request(vessel):
+                vessel = previous_vessel
+            vessels.append(vessel)
+        vessels.extend(v for v in previous_vessels if v.is_icebreaker)
+
+        added_vessels = [v for v in vessels if v not in set(previous_vessels)]
+        removed_vessels = [v for v in previous_vessels if v not in set(vessels)]
+        print(f'Обновление заявок: добавлено {len(added_vessels)}, удалено {len(removed_vessels)}')
+        if not added_vessels and not removed_vessels:
+            return
+
+        # Порядок судов как при полном построении; списки обновляются на месте, так как на них ссылаются хранилища
+        self.vessels[:] = vessels
+        self.vessels_dict.clear()
+        self.vessels_dict.update((v.id, v) for v in self.vessels)
+        for v in removed_vessels:
+            for p in self.ports:
+                self.min_time_from_start.pop((v, p), None)
+
+        self.calculate_min_time_matrices(self.add_vessel_types_to_graph(added_vessels))
+        self.calculate_min_time_from_start(added_vessels)
+        self.fill_best_routes(added_vessels)
+
+        # Позиции сохраненных судов в новом списке
+        vessel_positions = {v: i for i, v in enumerate(self.vessels)}
+        position_map = np.array([vessel_positions.get(v, -1) for v in previous_vessels] or [-1], dtype=np.int64)
+        added_positions = np.array([vessel_positions[v] for v in added_vessels], dtype=np.int64)
+
+        departure_arrays = self.departure_arrays
+        kept = np.nonzero(position_map[departure_arrays.vessel_idx] >= 0)[0]
+        departure_columns = [
+            np.concatenate(column)
+            for column in zip(
+                (
+                    position_map[departure_arrays.vessel_idx[kept]],
+                    departure_arrays.edge_idx[kept],
+                    departure_arrays.time[kept],
+                    departure_arrays.speed[kept],
+                    departure_arrays.duration[kept],
+                    departure_arrays.is_icebreaker_assistance[kept],
+                ),
+                self.calculate_departure_columns(added_positions),
+            )
+        ]
+        vessel_idx, edge_idx, time, _, _, is_icebreaker_assistance = departure_columns
+        order = np.lexsort((~is_icebreaker_assistance, vessel_idx, time, edge_idx))
+        departure_arrays = DepartureArrays(self.vessels, self.edges)
+        departure_arrays.extend(*(column[order] for column in departure_columns))
+        self.set_departures(departure_arrays)
+
+        location_arrays = self.location_arrays
+        kept = np.nonzero(position_map[location_arrays.vessel_idx] >= 0)[0]
+        location_columns = [
+            np.concatenate(column)
+            for column in zip(
+                (
+                    position_map[location_arrays.vessel_idx[kept]],
+                    location_arrays.port_idx[kept],
+                    location_arrays.time[kept],
+                    location_arrays.min_time_to_end_port[kept],
+                ),
+                self.calculate_location_columns(added_positions),
+            )
+        ]
+        vessel_idx, port_idx, time, _ = location_columns
+        order = np.lexsort((time, port_idx, vessel_idx))
+        location_arrays = LocationArrays(self.vessels, self.ports, self.departure_arrays)
+        location_arrays.extend(*(column[order] for column in location_columns))
+        self.set_locations(location_arrays)
+
+        self.generate_links()
+        if self.config.prune_network:
+            self.prune_network(added_vessels)
+        else:
+            self.fill_edge_t_connections(keep_empty=True)
+        self.fill_port_min_dist()
         return
+
+    @staticmethod
+    def calculate_static_input_hash(
+            input_folder_path: str,
+            model_data: Dict[str, pd.DataFrame],
+            model_config: ModelConfig,
+    ) -> str:
+        """
+        Хэш входных данных, не зависящих от заявок: листы model_data.xlsx кроме vessels, velocity_env.xlsx и конфиг
+        (без настроек решения)
+        """
+        input_hash = hashlib.sha1(model_config.get_structural_repr().encode())
+        for sheet_name in sorted(model_data):
+            if sheet_name == 'vessels':
+                continue
+            df = model_data[sheet_name]
+            input_hash.update(sheet_name.encode())
+            input_hash.update(repr(list(df.columns)).encode())
+            input_hash.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        velocity_env_path = os.path.join(input_folder_path, 'velocity_env.xlsx')
+        if os.path.isfile(velocity_env_path):
+            input_hash.update(get_file_hash(velocity_env_path).encode())
+        return input_hash.hexdigest()
+
+    def calculate_model_hash(self) -> str:
+        """
+        Хэш всех входных данных и настроек построения модели (ключ кэша модели)
+        """
+        model_hash = hashlib.sha1(
+            self.calculate_static_input_hash(self.input_folder_path, self.model_data, self.config).encode()
+        )
+        vessels_df = self.model_data['vessels']
+        model_hash.update(repr(list(vessels_df.columns)).encode())
+        model_hash.update(pd.util.hash_pandas_object(vessels_df, index=False).to_numpy().tobytes())
+        return model_hash.hexdigest()
+
+    def save_snapshot(self, snapshot_path: str, vessel_data: pd.DataFrame) -> None:
+        """
+        Сохранение входных данных модели на диск: таблица заявок vessel_data, по которой построена сеть,
+        и колонки хранилищ отправлений и вершин. Объекты не сериализуются, остальное строится по входным данным
+        """
+        vessel_arrays = get_frame_arrays(vessel_data)
+        if vessel_arrays is None:
+            print(f'Не удалось сохранить снимок входных данных {snapshot_path}: таблицу заявок нельзя сохранить')
+            return
+        arrays = {
+            'format_version': np.array(SNAPSHOT_FORMAT_VERSION),
+            'static_input_hash': np.array(self.static_input_hash),
+            **{f'vessels.{key}': values for key, values in vessel_arrays.items()},
+            **{f'departures.{name}': getattr(self.departure_arrays, name) for name in SNAPSHOT_DEPARTURE_COLUMNS},
+            **{f'locations.{name}': getattr(self.location_arrays, name) for name in SNAPSHOT_LOCATION_COLUMNS},
+        }
+        try:
+            os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+            tmp_snapshot_path = f'{snapshot_path}.tmp'
+            with open(tmp_snapshot_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_snapshot_path, snapshot_path)
+        except OSError as e:
+            print(f'Не удалось сохранить снимок входных данных {snapshot_path}: {e}')
+
+    @staticmethod
+    def load_snapshot(snapshot_path: str, static_input_hash: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Загрузка снимка входных данных с диска. None, если снимок отсутствует, поврежден, сохранен в другом формате
+        или построен по другим входным данным
+        """
+        if not os.path.isfile(snapshot_path):
+            return None
+        try:
+            with np.load(snapshot_path, allow_pickle=False) as data:
+                if (
+                    int(data['format_version']) != SNAPSHOT_FORMAT_VERSION
+                    or str(data['static_input_hash']) != static_input_hash
+                ):
+                    return None
+                return {key: data[key] for key in data.files}
+        except Exception as e:
+            print(f'Не удалось загрузить снимок входных данных {snapshot_path}: {e}')
+            return None
+
+    @staticmethod
+    def get_snapshot_frame(snapshot: Dict[str, np.ndarray], name: str) -> pd.DataFrame:
+        """
+        Таблица, сохраненная в снимке под именем name
+        """
+        prefix = f'{name}.'
+        return create_frame({key[len(prefix):]: values for key, values in snapshot.items() if key.startswith(prefix)})
+
+    def read_snapshot_network(self, snapshot: Dict[str, np.ndarray]) -> None:
+        """
+        Восстановление сети отправлений и вершин по колонкам снимка
+        """
+        departure_arrays = DepartureArrays(self.vessels, self.edges)
+        departure_arrays.extend(*(snapshot[f'departures.{name}'] for name in SNAPSHOT_DEPARTURE_COLUMNS))
+        self.set_departures(departure_arrays)
+        location_arrays = LocationArrays(self.vessels, self.ports, self.departure_arrays)
+        location_arrays.extend(*(snapshot[f'locations.{name}'] for name in SNAPSHOT_LOCATION_COLUMNS))
+        self.set_locations(location_arrays)
+        self.generate_links()
+        self.fill_edge_t_connections(keep_empty=not self.config.prune_network)
+
+    @classmethod
+    def create(
+            cls,
+            input_folder_path: str,
+            output_folder_path: str,
+            model_config: ModelConfig,
+    ) -> 'ModelInput':
+        """
+        Создание входных данных модели. При model_config.use_input_snapshot переиспользуется снимок
+        предыдущего запуска, если с тех пор изменилась только таблица заявок
+        """
+        if not model_config.use_input_snapshot:
+            return cls(input_folder_path, output_folder_path, model_config)
+
+        model_data = read_excel_cached(os.path.join(input_folder_path, 'model_data.xlsx'), MODEL_DATA_SHEET_NAMES)
+        static_input_hash = cls.calculate_static_input_hash(input_folder_path, model_data, model_config)
+        snapshot_path = os.path.join(input_folder_path, CACHE_FOLDER_NAME, SNAPSHOT_FILE_NAME)
+        snapshot = cls.load_snapshot(snapshot_path, static_input_hash)
+        if snapshot is not None:
+            print('Подготовка входных данных модели по снимку предыдущего запуска')
+            input = cls(input_folder_path, output_folder_path, model_config, snapshot)
+            input.update_vessels(input.model_data['vessels'])
+        else:
+            input = cls(input_folder_path, output_folder_path, model_config)
+        input.static_input_hash = static_input_hash
+        input.save_snapshot(snapshot_path, input.model_data['vessels'])
+        return input
+
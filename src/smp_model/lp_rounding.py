@@ -0,0 +1,143 @@
+import time
+from typing import List, Optional, Tuple
+
+import highspy
+import numpy as np
+
+from src.smp_model.entity.vessel import Vessel
+from src.smp_model.greedy_model import GreedyModel
+from src.smp_model.highs_model import HighsModel
+from src.smp_model.input import ModelInput
+
+
+class LpRoundingModel(GreedyModel):
+    """
+    Быстрый режим: решается LP-релаксация модели (та же матрица, что и в HighsModel), затем поток каждого судна
+    (кроме ледоколов) округляется до одного пути - из стартовой вершины по отправлению с наибольшим значением
+    в релаксации, пока значение остановки не станет наибольшим. Пути судов фиксируются, и ограничения каравана
+    восстанавливаются целочисленным решением только по переменным ледоколов (небольшая задача).
+
+    Если задача по ледоколам недопустима или не решена за оставшееся время, расписание строится жадной
+    эвристикой с округленным маршрутом среди маршрутов-кандидатов судна.
+
+    Значение LP-релаксации - нижняя граница целевой функции, по ней оценивается разрыв решения
+    """
+    def __init__(self, input: ModelInput, icebreaker_end_ports: List[int]) -> None:
+        super().__init__(input, icebreaker_end_ports)
+        self.lp_bound = None
+        self.departure_lp_values = np.empty(0, dtype=float)
+        self.stop_place_lp_values = np.empty(0, dtype=float)
+
+    def create_model(self) -> None:
+        HighsModel.create_model(self)
+        self.lp.integrality_ = [highspy.HighsVarType.kContinuous] * self.num_col
+        self.departure_cost, self.stop_cost = self.get_costs()
+
+    def solve_relaxation(self, timelimit: float) -> bool:
+        """
+        Решение LP-релаксации. False - релаксация не решена за лимит времени
+        """
+        highs = self.get_highs()
+        highs.setOptionValue('time_limit', float(timelimit))
+        self.telemetry.start(highs, 'lp_relaxation')
+        highs.run()
+        self.telemetry.finish()
+        if highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            print(f'LP-релаксация не решена: {highs.modelStatusToString(highs.getModelStatus())}')
+            return False
+        col_value = np.array(highs.getSolution().col_value)
+        n_departures = len(self.input.departure_arrays)
+        self.departure_lp_values = col_value[:n_departures]
+        self.stop_place_lp_values = col_value[n_departures:]
+        self.lp_bound = highs.getInfo().objective_function_value
+        return True
+
+    def get_lp_path(self, vessel: Vessel) -> Tuple[List[int], int]:
+        """
+        Округленный путь судна по значениям отправлений и остановок в LP-релаксации (отправления и вершина остановки)
+        """
+        location_arrays = self.input.location_arrays
+        output_ptr = location_arrays.output_ptr
+        output_departures = location_arrays.output_departures
+        departures = []
+        location = self.input.locations_dict.find((vessel, vessel.port_start, vessel.time_start))
+        while True:
+            candidates = output_departures[output_ptr[location]:output_ptr[location + 1]]
+            if not len(candidates):
+                break
+            d = int(candidates[np.argmax(self.departure_lp_values[candidates])])
+            if self.departure_lp_values[d] <= self.stop_place_lp_values[location]:
+                break
+            departures.append(d)
+            location = int(location_arrays.departure_location_to[d])
+        return departures, location
+
+    def get_routes(self, vessel: Vessel) -> List[list]:
+        """
+        Маршрут округленного пути (порты) и лучшие маршруты судна
+        """
+        if not len(self.departure_lp_values):
+            return vessel.best_routes
+        edges = self.input.edges
+        edge_idx = self.input.departure_arrays.edge_idx
+        departures, _ = self.get_lp_path(vessel)
+        route = [vessel.port_start] + [
+            edges[edge_idx[d]].port_to for d in departures if edges[edge_idx[d]].port_from != edges[edge_idx[d]].port_to
+        ]
+        return [route] + vessel.best_routes
+
+    def solve_icebreakers(self, timelimit: float) -> bool:
+        """
+        Фиксация округленных путей судов и целочисленное решение по переменным ледоколов.
+        False - решение не найдено
+        """
+        departure_arrays = self.input.departure_arrays
+        location_arrays = self.input.location_arrays
+        n_departures = len(departure_arrays)
+        is_icebreaker = np.array([v.is_icebreaker for v in self.input.vessels], dtype=bool)
+        col_vessel = np.concatenate((departure_arrays.vessel_idx, location_arrays.vessel_idx))
+
+        col_value = np.zeros(self.num_col)
+        for vessel in self.input.vessels:
+            if vessel.is_icebreaker:
+                continue
+            if self.input.locations_dict.find((vessel, vessel.port_start, vessel.time_start)) < 0:
+                continue
+            departures, location = self.get_lp_path(vessel)
+            col_value[departures] = 1
+            col_value[n_departures + location] = 1
+        fixed = np.nonzero(~is_icebreaker[col_vessel])[0].astype(np.int32)
+        free = np.nonzero(is_icebreaker[col_vessel])[0].astype(np.int32)
+
+        highs = self.get_highs()
+        highs.changeColsBounds(len(fixed), fixed, col_value[fixed], col_value[fixed])
+        highs.changeColsIntegrality(len(free), free, np.full(len(free), highspy.HighsVarType.kInteger))
+        highs.setOptionValue('time_limit', float(timelimit))
+        self.telemetry.start(highs, 'icebreaker_mip')
+        highs.run()
+        self.telemetry.finish()
+        solution = highs.getSolution()
+        if not solution.value_valid:
+            return False
+        self.set_solution(np.round(solution.col_value), highs.getInfo().objective_function_value)
+        return True
+
+    def solve_model(self, timelimit: float, start_values: Optional[np.ndarray] = None) -> None:
+        """
+        Решение LP-релаксации и задачи по ледоколам (не дольше лимита времени в сумме). Если релаксация
+        или задача по ледоколам не решена - жадная эвристика (начальное решение не используется)
+        """
+        start_time = time.perf_counter()
+        if not self.solve_relaxation(timelimit):
+            print('Округление LP-релаксации: нижняя граница не получена, расписание жадной эвристикой')
+            super().solve_model(timelimit)
+            return
+        lp_time = time.perf_counter() - start_time
+        if not self.solve_icebreakers(max(timelimit - lp_time, 1)):
+            print('Округление LP-релаксации: не найдены пути ледоколов, расписание жадной эвристикой')
+            super().solve_model(max(timelimit - (time.perf_counter() - start_time), 1))
+        gap = (self.objective_value - self.lp_bound) / max(abs(self.objective_value), 1e-9)
+        print(
+            f'Округление LP-релаксации: нижняя граница {self.lp_bound:.2f} ({lp_time:.1f} с),'
+            f' решение {self.objective_value:.2f}, разрыв {gap:.2%} ({time.perf_counter() - start_time:.1f} с)'
+        )
@@ -1,5 +1,7 @@
 import os
 
+import pandas as pd
+
 from src.smp_dash.main_old import ModelDash
 from src.smp_model.input import ModelInput
 from src.smp_model.model import Model
@@ -11,16 +13,27 @@ def run_model(
         input_folder_path: str,
         output_folder_path: str,
         model_config: ModelConfig,
-):
-    input = ModelInput(
+        solution_departures_df: pd.DataFrame = None,
+) -> Model:
+    """
+    Расчет модели. solution_departures_df - перемещения из решения предыдущего сценария цепочки
+    для начального решения
+    """
+    input = ModelInput.create(
         input_folder_path=input_folder_path,
         output_folder_path=output_folder_path,
         model_config=model_config,
     )
     model = Model(input)
+    if solution_departures_df is not None and model_config.use_warm_start:
+        model.set_warm_start(solution_departures_df)
+    elif model_config.use_greedy_start:
+        model.set_greedy_start()
     model.solve_model()
     model.correct_results()
     model.output.create_output()
+    model.save_telemetry()
+    return model
 
 
 if __name__ == '__main__':
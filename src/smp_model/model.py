@@ -1,19 +1,51 @@
-from pyomo.environ import Var, Binary, Objective, quicksum, minimize, SolverFactory, ConcreteModel
+from pyomo.environ import Var, Binary, Objective, quicksum, minimize, SolverFactory, ConcreteModel, Constraint, Any
 from pyomo.core import value
 
+import highspy
+import numpy as np
+import os
+
+from src.smp_model.column_generation import ColumnGenerationModel
+from src.smp_model.entity.schedule_segment import ScheduleSegment
+from src.smp_model.entity.schedule_stop import ScheduleStop
+from src.smp_model.excel_cache import CACHE_FOLDER_NAME
+from src.smp_model.greedy_model import GreedyModel
+from src.smp_model.highs_model import HighsModel
 from src.smp_model.input import ModelInput
+from src.smp_model.lp_rounding import LpRoundingModel
 from src.smp_model.output import ModelOutput
+from src.smp_model.solver_telemetry import SolverTelemetry
 from src.smp_model.utils import constraints_from_dict
+from src.smp_model.warm_start import WarmStart, create_solution_departures_df
 
 from collections import defaultdict
-import copy
+import heapq
 import sys
+from typing import Iterator
+
+# Порты западного сектора: в конце горизонта в них должно быть не менее двух ледоколов
+EUROPE_POINTS = [1, 14, 15, 16, 6, 34, 25, 10, 11, 35, 13, 0, 43, 7, 36, 20, 19]
+# Кэш построенной модели в папке кэша входных данных
+MODEL_CACHE_FILE_NAME = 'model.npz'
 
 
 class Model:
 	def __init__(self, input: ModelInput) -> None:
 		self.model = ConcreteModel()
 		self.input = input
+		self.highs_model = None
+		# Ключи (позиция ребра * (число моментов + 1) + время) добавленных отложенных ограничений на караваны
+		self.convoy_constraint_keys = np.empty(0, dtype=np.int64)
+		# Решатель Pyomo (сохраняется для повторных решений в режиме скользящего окна)
+		self.solver = None
+		# Номера столбцов HiGHS для индексированных переменных Pyomo (по имени переменной) - для чтения решения
+		self.solver_columns = dict()
+		# Телеметрия запусков решателя Pyomo (для остальных вариантов построения - в highs_model)
+		self.telemetry = SolverTelemetry()
+		# Начальное решение для решателя
+		self.warm_start = None
+		# Перемещения из решения до корректировки (для начального решения следующего сценария цепочки)
+		self.solution_departures_df = None
 
 		self.output = ModelOutput(
 			self.model,
@@ -25,6 +57,59 @@ class Model:
 	def create_model(self):
 		print('Подготовка модели')
 
+		if self.input.config.use_model_cache and self.input.config.model_backend in ('pyomo', 'highs'):
+			# Кэш хранит модель в виде матрицы для HiGHS: модель строится только как HighsModel,
+			# чтобы при промахе кэша не строить ее дважды
+			if self.input.config.model_backend == 'pyomo':
+				print('Кэш модели: модель строится и решается через HighsModel вместо Pyomo')
+			if self.load_model_cache():
+				return
+			self.highs_model = HighsModel(self.input, EUROPE_POINTS)
+			self.highs_model.create_model()
+			self.save_model_cache()
+			return
+		self.create_model_without_cache()
+
+	def get_model_cache_path(self):
+		return os.path.join(self.input.input_folder_path, CACHE_FOLDER_NAME, MODEL_CACHE_FILE_NAME)
+
+	def load_model_cache(self):
+		"""
+		Загрузка модели из кэша в виде матрицы для HiGHS (модель Pyomo не строится). False - кэш не подходит
+		"""
+		highs_model = HighsModel(self.input, EUROPE_POINTS)
+		if not highs_model.load_model(self.get_model_cache_path(), self.input.calculate_model_hash()):
+			return False
+		print('Модель загружена из кэша')
+		self.highs_model = highs_model
+		return True
+
+	def save_model_cache(self):
+		"""
+		Сохранение построенной HighsModel в кэш
+		"""
+		self.highs_model.save_model(self.get_model_cache_path(), self.input.calculate_model_hash())
+
+	def create_model_without_cache(self):
+		if self.input.config.model_backend == 'highs':
+			self.highs_model = HighsModel(self.input, EUROPE_POINTS)
+			self.highs_model.create_model()
+			return
+		if self.input.config.model_backend == 'greedy':
+			self.highs_model = GreedyModel(self.input, EUROPE_POINTS)
+			self.highs_model.create_model()
+			return
+		if self.input.config.model_backend == 'lp_rounding':
+			self.highs_model = LpRoundingModel(self.input, EUROPE_POINTS)
+			self.highs_model.create_model()
+			return
+		if self.input.config.model_backend == 'column_generation':
+			self.highs_model = ColumnGenerationModel(
+				self.input, EUROPE_POINTS, self.input.config.column_generation_max_iterations
+			)
+			self.highs_model.create_model()
+			return
+
 		## Переменные
 		# Индикатор отправления судна v по ребру e в момент времени t
 		self.model.departure = Var(self.input.departures, domain=Binary, initialize=0)
@@ -81,32 +166,22 @@ class Model:
 		'''
 
 		# Ограничение: максимальное количество судов в караване
-		cons_max_vessels_assistance = {}
-		for (e, t) in self.input.edge_t_connections:
-			cons_max_vessels_assistance[e, t] = (
-				quicksum(
-					self.model.departure[self.input.departures_dict[v, e, t, True]]
-					for v in self.input.edge_t_connections[e, t].allowed_vessels
-					if  (v, e, t, True) in self.input.departures_dict.keys()
-				)
-				<=
-				# TODO: сделать параметром?
-				3 * quicksum(
-					self.model.departure[self.input.departures_dict[v, e, t, False]]
-					for v in self.input.edge_t_connections[e, t].allowed_vessels
-					if v.is_icebreaker
-				)
-			)
-		constraints_from_dict(cons_max_vessels_assistance, self.model, 'cons_max_vessels_assistance')
+		if self.input.config.lazy_convoy_constraints:
+			# Ограничения добавляются по мере нарушения в решении (add_convoy_constraints)
+			self.model.cons_max_vessels_assistance = Constraint(Any)
+		else:
+			cons_max_vessels_assistance = {}
+			for (e, t) in self.input.edge_t_connections:
+				cons_max_vessels_assistance[e, t] = self.get_max_vessels_assistance_expr(e, t)
+			constraints_from_dict(cons_max_vessels_assistance, self.model, 'cons_max_vessels_assistance')
 
 		# Ограничение на баланс ледоколов
-		europe_points = [1, 14, 15, 16, 6, 34, 25, 10, 11, 35, 13, 0, 43, 7, 36, 20, 19]
 		cons_icebreak_balance = {}
 		cons_icebreak_balance['adhoc'] = (
 			quicksum(self.model.stop_place[l] 
 				for l in self.input.locations 
 				if l.vessel.is_icebreaker
-				and l.port.id in europe_points
+				and l.port.id in EUROPE_POINTS
 			)
 			>=
 			2
@@ -119,15 +194,19 @@ class Model:
 		## Целевая функция 
 
 		# Минимизация суммарного времени в пути и отклонения от конечного порта для каждого судна
+		# (время считается в часах по сетке времени)
+		time_grid = self.input.time_grid
 		self.model.obj = Objective(
 			expr=(
 				quicksum(
-					(0 if l.vessel.is_icebreaker else ((l.time - l.vessel.time_start) * self.model.stop_place[l]))
+					(0 if l.vessel.is_icebreaker else (
+						(time_grid.get_hours(l.time) - time_grid.get_hours(l.vessel.time_start)) * self.model.stop_place[l]
+					))
 					+ (0 if l.vessel.is_icebreaker else (l.min_time_to_end_port * self.model.stop_place[l]) * 5)
 					for l in self.input.locations
 				)
 				+ quicksum(
-					self.model.departure[d] * d.duration 
+					self.model.departure[d] * (time_grid.get_hours(d.time + d.duration) - time_grid.get_hours(d.time))
 					for d in self.input.departures 
 					if not d.edge.is_fict
 				) / 100
@@ -137,6 +216,22 @@ class Model:
 
 		return
 
+	def get_max_vessels_assistance_expr(self, e, t):
+		return (
+			quicksum(
+				self.model.departure[self.input.departures_dict[v, e, t, True]]
+				for v in self.input.edge_t_connections[e, t].allowed_vessels
+				if  (v, e, t, True) in self.input.departures_dict
+			)
+			<=
+			# TODO: сделать параметром?
+			3 * quicksum(
+				self.model.departure[self.input.departures_dict[v, e, t, False]]
+				for v in self.input.edge_t_connections[e, t].allowed_vessels
+				if v.is_icebreaker
+			)
+		)
+
 	def solve_model(self):
 		print('Запуск оптимизации')
 		print(self.input.config)
@@ -151,40 +246,303 @@ class Model:
 		#solver.options['time_limit'] = 900
 		#solver.options['mip_rel_gap'] = 0.02
 
+		if self.input.config.rolling_window_hours:
+			self.solve_rolling_horizon()
+		else:
+			self.run_solver(self.input.config.timelimit, self.get_warm_start_values())
+
+		self.fill_solution_departures()
+		return
+
+	def run_solver(self, timelimit, start_values=None):
+		"""
+		Запуск решателя. start_values - начальное решение: отправления в порядке input.departures,
+		затем остановки в порядке input.locations.
+		При отложенных ограничениях на караваны модель перерешивается (с тем же timelimit), пока в решении
+		есть нарушенные ограничения
+		"""
+		while True:
+			self.call_solver(timelimit, start_values)
+			if not self.input.config.lazy_convoy_constraints:
+				return
+			edge_idx, times = self.get_violated_convoy_constraints()
+			if not len(edge_idx):
+				return
+			print(f'Добавление ограничений на караваны: {len(edge_idx)} на {len(np.unique(edge_idx))} ребрах')
+			self.add_convoy_constraints(edge_idx, times)
+			# Предыдущее решение нарушает добавленные ограничения
+			start_values = None
+
+	def get_violated_convoy_constraints(self):
+		"""
+		Пары (позиция ребра, время) для добавления ограничений на караваны: все моменты времени с проводками
+		на ребрах, на которых в решении проводок больше, чем 3 * ледоколы
+		"""
+		departure_arrays = self.input.departure_arrays
+		is_icebreaker = np.array([v.is_icebreaker for v in self.input.vessels], dtype=bool)
+		coefficients = np.where(
+			departure_arrays.is_icebreaker_assistance,
+			1,
+			np.where(is_icebreaker[departure_arrays.vessel_idx], -3, 0),
+		)
+		used = np.nonzero((self.get_departure_values() > 0.5) & (coefficients != 0))[0]
+		n_times = len(self.input.times) + 1
+		keys, key_rows = np.unique(
+			departure_arrays.edge_idx[used].astype(np.int64) * n_times + departure_arrays.time[used],
+			return_inverse=True,
+		)
+		violated_edges = np.unique(
+			keys[np.bincount(key_rows, weights=coefficients[used], minlength=len(keys)) > 0] // n_times
+		)
+		assisted = np.nonzero(
+			departure_arrays.is_icebreaker_assistance & np.isin(departure_arrays.edge_idx, violated_edges)
+		)[0]
+		new_keys = np.setdiff1d(
+			departure_arrays.edge_idx[assisted].astype(np.int64) * n_times + departure_arrays.time[assisted],
+			self.convoy_constraint_keys,
+		)
+		self.convoy_constraint_keys = np.union1d(self.convoy_constraint_keys, new_keys)
+		return new_keys // n_times, new_keys % n_times
+
+	def add_convoy_constraints(self, edge_idx, times):
+		if self.highs_model is not None:
+			self.highs_model.add_convoy_rows(edge_idx, times)
+			return
+		for e_num, t in zip(edge_idx.tolist(), times.tolist()):
+			e = self.input.edges[e_num]
+			self.model.cons_max_vessels_assistance[e, t] = self.get_max_vessels_assistance_expr(e, t)
+
+	def call_solver(self, timelimit, start_values=None):
+		if self.input.config.portfolio_size:
+			if type(self.highs_model) is not HighsModel:
+				raise ValueError('Портфель решателей доступен только для model_backend highs')
+			self.highs_model.solve_portfolio(
+				timelimit, self.input.config.portfolio_size, self.input.config.mip_rel_gap, start_values
+			)
+			return
+		if self.highs_model is not None:
+			self.highs_model.solve_model(timelimit, start_values)
+			return
+
+		if start_values is not None:
+			n_departures = len(self.input.departures)
+			for d, x in zip(self.input.departures, start_values[:n_departures].tolist()):
+				if not self.model.departure[d].fixed:
+					self.model.departure[d] = x
+			for l, x in zip(self.input.locations, start_values[n_departures:].tolist()):
+				self.model.stop_place[l] = x
+
 		solver_name = 'appsi_highs'
-		solver = SolverFactory(solver_name)
+		if self.solver is None:
+			self.solver = SolverFactory(solver_name)
+			if solver_name == 'appsi_highs':
+				# Зафиксированные переменные передаются в решатель границами, без пересборки ограничений
+				self.solver.update_config.treat_fixed_vars_as_params = False
+		solver = self.solver
 		# self.model.write('1.lp', io_options={'symbolic_solver_labels': True})
 		if solver_name == 'appsi_highs':
-			solver.options['time_limit'] = self.input.config.timelimit
+			solver.options['time_limit'] = timelimit
+			# Модель передается в HiGHS до запуска решения: для подписки телеметрии на события решателя
+			# и для начального решения
+			if solver._model is not self.model:
+				solver.set_instance(self.model)
+				self.solver_columns = dict()
+			if start_values is not None:
+				# appsi_highs не передает начальные значения переменных: решение задается напрямую
+				solver.update()
+				col_value = [0.0] * len(solver._pyomo_var_to_solver_var_map)
+				for var in self.model.component_data_objects(Var):
+					if id(var) in solver._pyomo_var_to_solver_var_map:
+						col_value[solver._pyomo_var_to_solver_var_map[id(var)]] = var.value
+				solution = highspy.HighsSolution()
+				solution.col_value = col_value
+				solver._solver_model.setSolution(solution)
+			self.telemetry.start(solver._solver_model, 'mip')
 			solve_results = solver.solve(self.model, tee=True)
+			self.telemetry.finish(str(solve_results.solver.termination_condition))
 		else:
-			solver.options['TimeLimit'] = self.input.config.timelimit
+			solver.options['TimeLimit'] = timelimit
 			solver.options['Method'] = 3
 			solve_results = solver.solve(self.model, tee=True, warmstart=True)
 
-		return       
+	def solve_rolling_horizon(self):
+		"""
+		Решение скользящим окном: модель решается на окне горизонта (отправления после конца окна запрещены),
+		выбранные отправления до точки фиксации (конец окна минус перекрытие) фиксируются, и окно сдвигается
+		на точку фиксации. Невыбранные отправления до точки фиксации остаются свободными: судно, остановленное
+		в окне (остановка ледокола ничего не стоит), может продолжить движение в следующих окнах.
+		Баланс ледоколов учитывается только в последнем окне
+		"""
+		config = self.input.config
+		time_grid = self.input.time_grid
+		window_hours = config.rolling_window_hours
+		overlap_hours = config.rolling_overlap_hours
+		if not 0 <= overlap_hours < window_hours:
+			raise ValueError(f'Перекрытие окон ({overlap_hours} ч) должно быть меньше длины окна ({window_hours} ч)')
+		timelimit = config.rolling_window_timelimit or config.timelimit
+
+		departure_time = self.input.departure_arrays.time
+		free_upper = (
+			self.highs_model.col_upper[:len(departure_time)] if self.highs_model is not None
+			else np.ones(len(departure_time))
+		)
+		fixed_values = np.zeros(len(departure_time))
+		start_values = self.get_warm_start_values()
+		freeze_hours = 0
+		while True:
+			window_end_hours = freeze_hours + window_hours
+			is_last = window_end_hours >= config.planning_hours
+			freeze_time = time_grid.get_time(freeze_hours)
+			window_end_time = len(time_grid) if is_last else time_grid.get_time(window_end_hours)
+			print(
+				f'Окно {freeze_hours} - {min(window_end_hours, config.planning_hours)} ч'
+				f' (зафиксированы отправления до {freeze_hours} ч)'
+			)
+
+			lower = np.where(departure_time < freeze_time, fixed_values, 0)
+			upper = np.where(departure_time < window_end_time, free_upper, 0)
+			self.set_departure_bounds(lower, upper)
+			self.set_icebreaker_balance(is_last)
+			self.run_solver(timelimit, start_values)
+			if is_last:
+				break
+
+			departure_values = np.array(self.get_departure_values(), dtype=float)
+			start_values = np.concatenate((departure_values, self.get_stop_place_values()))
+			freeze_hours = window_end_hours - overlap_hours
+			fixed_values = np.round(departure_values)
+
+	def set_departure_bounds(self, lower, upper):
+		"""
+		Границы переменных отправлений в порядке input.departures
+		"""
+		if self.highs_model is not None:
+			self.highs_model.set_departure_bounds(lower, upper)
+			return
+		for d, lb, ub in zip(self.input.departures, lower.tolist(), upper.tolist()):
+			if lb == ub:
+				self.model.departure[d].fix(lb)
+			else:
+				self.model.departure[d].unfix()
+
+	def set_icebreaker_balance(self, is_active):
+		if self.highs_model is not None:
+			self.highs_model.set_icebreaker_balance(is_active)
+		elif is_active:
+			self.model.cons_icebreak_balance.activate()
+		else:
+			self.model.cons_icebreak_balance.deactivate()
+
+	def get_warm_start_values(self):
+		if self.warm_start is None:
+			return None
+		return np.concatenate((self.warm_start.departure_values, self.warm_start.stop_place_values))
+
+	def set_warm_start(self, solution_departures_df) -> None:
+		"""
+		Начальное решение по перемещениям из решения предыдущего сценария цепочки
+		"""
+		self.warm_start = WarmStart(self.input, solution_departures_df, EUROPE_POINTS)
+		self.warm_start.create()
+
+	def set_greedy_start(self) -> None:
+		"""
+		Начальное решение жадной эвристикой
+		"""
+		greedy_model = GreedyModel(self.input, EUROPE_POINTS)
+		greedy_model.create_model()
+		greedy_model.solve_model(self.input.config.timelimit)
+		self.warm_start = greedy_model
+
+	def fill_solution_departures(self) -> None:
+		self.solution_departures_df = create_solution_departures_df(
+			self.input,
+			[self.input.departures[i] for i in np.nonzero(self.get_departure_values() > 0.5)[0].tolist()],
+		)
 	
+	def get_pyomo_values(self, var: Var) -> np.ndarray:
+		"""
+		Значения индексированной переменной Pyomo в порядке индексов: вектор решения HiGHS читается один раз
+		и сопоставляется с переменными по номерам столбцов (без value() для каждой переменной).
+		Номера столбцов определяются один раз для экземпляра решателя
+		"""
+		if self.solver is None or not hasattr(self.solver, '_pyomo_var_to_solver_var_map'):
+			return np.array([value(v) for v in var.values()], dtype=float)
+		columns = self.solver_columns.get(var.name)
+		if columns is None:
+			var_map = self.solver._pyomo_var_to_solver_var_map
+			columns = np.fromiter((var_map.get(id(v), -1) for v in var.values()), dtype=np.int64, count=len(var))
+			self.solver_columns[var.name] = columns
+		col_value = np.asarray(self.solver._solver_model.getSolution().col_value, dtype=float)
+		values = col_value[columns]
+		# Переменные, не переданные в решатель (не входят в ограничения), - по значению в Pyomo
+		missing = np.nonzero(columns < 0)[0]
+		if len(missing):
+			var_data = list(var.values())
+			values[missing] = [var_data[i].value or 0 for i in missing.tolist()]
+		return values
+
+	def get_departure_values(self) -> np.ndarray:
+		"""
+		Значения переменных отправлений в порядке input.departures
+		"""
+		if self.highs_model is not None:
+			return self.highs_model.departure_values
+		return self.get_pyomo_values(self.model.departure)
+
+	def get_stop_place_values(self) -> np.ndarray:
+		"""
+		Значения переменных остановок в порядке input.locations
+		"""
+		if self.highs_model is not None:
+			return self.highs_model.stop_place_values
+		return self.get_pyomo_values(self.model.stop_place)
+
+	def get_telemetry(self) -> SolverTelemetry:
+		if self.highs_model is not None:
+			return self.highs_model.telemetry
+		return self.telemetry
+
+	def save_telemetry(self) -> None:
+		"""
+		Запись телеметрии решателя в папку с выходными данными
+		"""
+		self.get_telemetry().save(
+			self.input.output_folder_path,
+			model_backend=self.input.config.model_backend,
+			timelimit=self.input.config.timelimit,
+			start_date=str(self.input.config.start_date),
+			num_departures=len(self.input.departure_arrays),
+			num_locations=len(self.input.location_arrays),
+			objective=self.get_objective_value(),
+		)
+
+	def get_objective_value(self) -> float:
+		if self.highs_model is not None:
+			return self.highs_model.objective_value
+		return value(self.model.obj)
+
 	def correct_results(self):
 		print('Корректировка результатов')
 
 		### Таблица Departures
 		self.model.departure_result = defaultdict(int)
-		self.model.departure_results = list()
-		delay = defaultdict(int)
 		corrected_time = dict()
 		corrected_speed = dict()
 		corrected_duration = dict()
 		# vessel_port_example = dict()
 
-		for d in self.input.departures:
-			if value(self.model.departure[d]) > 0.5:
-				self.model.departure_result[d] = 1
-				corrected_time[d] = d.time
-				corrected_speed[d] = d.speed
-				corrected_duration[d] = d.duration
-			
-			# if d.edge.port_from.id == d.edge.port_to.id:
-			# 	vessel_port_example[(d.vessel.id, d.edge.port_from.id)] = d
+		# Представления создаются только для выбранных перемещений: стоянки (ребра А-А) в выравнивании времени
+		# не участвуют и восстанавливаются между перемещениями при формировании отрезков расписания
+		departures = self.input.departures
+		is_wait = np.array([e.port_from.id == e.port_to.id for e in self.input.edges], dtype=bool)
+		chosen = np.nonzero(self.get_departure_values() > 0.5)[0]
+		for i in chosen[~is_wait[self.input.departure_arrays.edge_idx[chosen]]].tolist():
+			d = departures[i]
+			self.model.departure_result[d] = 1
+			corrected_time[d] = d.time
+			corrected_speed[d] = d.speed
+			corrected_duration[d] = d.duration
 
 		# Связки
 		linkage_departures = defaultdict(list)
@@ -192,75 +550,58 @@ class Model:
 		vessel_departures = defaultdict(list)
 		edges_with_assistance = set()
 		for d in self.model.departure_result.keys():
-			if d.edge.port_from.id != d.edge.port_to.id:
-				linkage_departures[d.edge.port_from.id, d.edge.port_to.id, d.time].append(d)
-				len_linkage[d.edge.port_from.id, d.edge.port_to.id, d.time] += 1
-				vessel_departures[d.vessel.id].append(d)
+			linkage_departures[d.edge.port_from.id, d.edge.port_to.id, d.time].append(d)
+			len_linkage[d.edge.port_from.id, d.edge.port_to.id, d.time] += 1
+			vessel_departures[d.vessel.id].append(d)
 			if d.is_icebreaker_assistance:
 				edges_with_assistance.add((d.edge.port_from.id, d.edge.port_to.id, d.time))
 
 
-		LINKAGES = sorted([linkage for linkage in linkage_departures.keys() 
-					if len_linkage[linkage] > 1 and linkage in edges_with_assistance], key=lambda x: x[2])
+		LINKAGES = [linkage for linkage in linkage_departures.keys()
+					if len_linkage[linkage] > 1 and linkage in edges_with_assistance]
 
-		# Сортируем отправления по дате
+		# Сортируем отправления по дате (в один момент - по цепочке портов)
 		for vessel_id in vessel_departures.keys():
-			vessel_departures[vessel_id] = sorted(vessel_departures[vessel_id],
-											key=lambda x: x.time)
-
-
-
-		# Итерируемся по связкам и сдвигаем время
+			vessel_departures[vessel_id] = self.sort_vessel_departures(vessel_departures[vessel_id])
+
+		# Выравнивание времени: самый длинный путь в ациклическом графе. Вершина - связка (отправления каравана
+		# выходят одновременно, с наименьшей скоростью и наибольшей длительностью) или одиночное отправление,
+		# дуга - переход судна к следующему отправлению. Вершины проходятся один раз в топологическом порядке,
+		# и задержки каскадно переходят между караванами без повторных проходов
+		prev_departure = dict()
+		for departures in vessel_departures.values():
+			prev_departure.update(zip(departures[1:], departures[:-1]))
+
+		nodes = []
+		linkage_members = set()
 		for linkage in LINKAGES:
 			speed = min(d.speed for d in linkage_departures[linkage])
 			duration = max(d.duration for d in linkage_departures[linkage])
-			start_time = max(d.time + delay[d] for d in linkage_departures[linkage])
 			for d in linkage_departures[linkage]:
-				prev_delay = 0
-				prev_time = start_time
-				prev_duration = duration
-
 				corrected_speed[d] = speed
 				corrected_duration[d] = duration
+			linkage_members.update(linkage_departures[linkage])
+			nodes.append(linkage_departures[linkage])
+		nodes += [[d] for departures in vessel_departures.values() for d in departures if d not in linkage_members]
+
+		for node in self.sort_convoy_nodes(nodes, prev_departure):
+			start_time = node[0].time
+			for d in node:
+				prev_d = prev_departure.get(d)
+				if prev_d is not None:
+					start_time = max(start_time, corrected_time[prev_d] + corrected_duration[prev_d])
+			for d in node:
 				corrected_time[d] = start_time
 
-				for d1 in vessel_departures[d.vessel.id]:
-					if d1.time > d.time:
-						delay[d1] = max(prev_time + prev_delay + prev_duration - d1.time, 0)
-						corrected_time[d1] = d1.time + delay[d1]
-
-						if delay[d1] == 0:
-							break
-						prev_delay = delay[d1]
-						prev_time = d1.time
-						prev_duration = d1.duration
-
-		# Записываем результат для формирования отчета
-		for vessel_id in vessel_departures.keys():
-			prev_finish_time = 0
-			for d in vessel_departures[vessel_id]:
-
-				# Добавление ребра А-А
-				interval = corrected_time[d] - max(d.vessel.time_start, prev_finish_time)
-				if interval > 0:
-					# d1 = vessel_port_example[vessel_id, d.edge.port_from.id]
-					d1 = copy.deepcopy(d)
-					d1.speed = 0
-					d1.edge.avg_norm = 21
-					d1.is_icebreaker_assistance = 0
-					d1.edge.port_to = d1.edge.port_from
-
-					d1.time = corrected_time[d] - interval
-					d1.duration = interval
-					self.model.departure_results.append(d1)
-
-				 
-				d.speed = corrected_speed[d]
-				d.duration = corrected_duration[d]
-				d.time = corrected_time[d]
-				self.model.departure_results.append(d)
-
-				prev_finish_time = d.time + d.duration
+		# Записываем результат для формирования отчета. При записи выходных данных частями отрезки расписания
+		# формируются по мере записи (ModelOutput.create_output), без списка всех отрезков
+		schedule_segments = self.get_schedule_segments(
+			vessel_departures, corrected_time, corrected_speed, corrected_duration
+		)
+		if self.input.config.output_batch_size:
+			self.model.departure_results = schedule_segments
+		else:
+			self.model.departure_results = list(schedule_segments)
 
 		# for d in self.model.departure_result.keys():
 		# 	d.speed = corrected_speed[d]
@@ -270,18 +611,115 @@ class Model:
 			
 
 		### Таблица Locations
-		self.model.stop_place_result = dict()
-		self.model.stop_place_results = list()
-		for l in self.input.locations:
-			self.model.stop_place_result[l] = value(self.model.stop_place[l])
-			if value(self.model.stop_place[l]) > 0.5:
-				try:
-					l.time = max(corrected_time[d] + corrected_duration[d] for d in vessel_departures[l.vessel.id])
-				except:
-					# почему-то судно с vessel.id = 14 попадает сюда, хотя его нет в расчете
-					pass
-				self.model.stop_place_results.append(l)
+		locations = self.input.locations
+		stop_locations = [locations[i] for i in np.nonzero(self.get_stop_place_values() > 0.5)[0].tolist()]
+		self.model.stop_place_result = dict.fromkeys(stop_locations, 1)
+		# Конечные точки, как и отрезки расписания, при записи частями формируются по мере записи
+		schedule_stops = self.get_schedule_stops(stop_locations, vessel_departures, corrected_time, corrected_duration)
+		if self.input.config.output_batch_size:
+			self.model.stop_place_results = schedule_stops
+		else:
+			self.model.stop_place_results = list(schedule_stops)
 
 		return
 
+	@staticmethod
+	def get_schedule_stops(
+		stop_locations, vessel_departures, corrected_time, corrected_duration,
+	) -> Iterator[ScheduleStop]:
+		"""
+		Конечные точки итогового расписания судов. Скорректированное время остановки записывается в ScheduleStop,
+		хранилище вершин не изменяется
+		"""
+		for l in stop_locations:
+			time = l.time
+			try:
+				time = max(corrected_time[d] + corrected_duration[d] for d in vessel_departures[l.vessel.id])
+			except:
+				# почему-то судно с vessel.id = 14 попадает сюда, хотя его нет в расчете
+				pass
+			yield ScheduleStop(l.vessel, l.port, time)
+
+	@staticmethod
+	def sort_vessel_departures(departures):
+		"""
+		Отправления судна в порядке маршрута: по времени, а отправления в один момент (ребра нулевой длительности)
+		- по цепочке портов, в которой следующее отправление выходит из порта прибытия предыдущего
+		"""
+		departures_by_time = defaultdict(list)
+		for d in departures:
+			departures_by_time[d.time].append(d)
+		result = []
+		for t in sorted(departures_by_time):
+			group = departures_by_time[t]
+			if len(group) > 1:
+				arrival_ports = {d.edge.port_to for d in group}
+				departure_by_port = {d.edge.port_from: d for d in group}
+				d = next((d for d in group if d.edge.port_from not in arrival_ports), None)
+				chain = []
+				while d is not None and d not in chain:
+					chain.append(d)
+					d = departure_by_port.get(d.edge.port_to)
+				# Отправления вне цепочки (не должны встречаться в допустимом решении) - в исходном порядке
+				group = chain + [d for d in group if d not in chain]
+			result += group
+		return result
+
+	@staticmethod
+	def sort_convoy_nodes(nodes, prev_departure):
+		"""
+		Топологический порядок вершин выравнивания времени (алгоритм Кана): вершина обрабатывается после всех
+		вершин с предыдущими отправлениями ее судов. Среди готовых вершин раньше идут вершины с меньшим исходным
+		временем. Вершины на цикле (не должны встречаться в допустимом решении) идут в конце по исходному времени
+		"""
+		node_positions = {d: k for k, node in enumerate(nodes) for d in node}
+		successors = defaultdict(list)
+		in_degree = [0] * len(nodes)
+		for d, prev_d in prev_departure.items():
+			k, prev_k = node_positions[d], node_positions[prev_d]
+			if k != prev_k:
+				successors[prev_k].append(k)
+				in_degree[k] += 1
+
+		ready = [(node[0].time, k) for k, node in enumerate(nodes) if not in_degree[k]]
+		heapq.heapify(ready)
+		order = []
+		while ready:
+			_, k = heapq.heappop(ready)
+			order.append(k)
+			for next_k in successors[k]:
+				in_degree[next_k] -= 1
+				if not in_degree[next_k]:
+					heapq.heappush(ready, (nodes[next_k][0].time, next_k))
+		if len(order) < len(nodes):
+			ordered = set(order)
+			order += sorted((k for k in range(len(nodes)) if k not in ordered), key=lambda k: nodes[k][0].time)
+		return [nodes[k] for k in order]
+
+	@staticmethod
+	def get_schedule_segments(
+		vessel_departures, corrected_time, corrected_speed, corrected_duration,
+	) -> Iterator[ScheduleSegment]:
+		"""
+		Отрезки итогового расписания судов: скорректированные отправления и стоянки (ребра А-А) между ними
+		"""
+		for vessel_id in vessel_departures.keys():
+			prev_finish_time = 0
+			for d in vessel_departures[vessel_id]:
+
+				# Добавление ребра А-А
+				interval = corrected_time[d] - max(d.vessel.time_start, prev_finish_time)
+				if interval > 0:
+					yield ScheduleSegment.create_wait(
+						d.vessel, d.edge.port_from, corrected_time[d] - interval, interval
+					)
+
+				edge = d.edge
+				yield ScheduleSegment(
+					d.vessel, edge.port_from, edge.port_to, corrected_time[d], corrected_duration[d],
+					corrected_speed[d], d.is_icebreaker_assistance, edge.avg_norm,
+				)
+
+				prev_finish_time = corrected_time[d] + corrected_duration[d]
+
 
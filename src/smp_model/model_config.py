@@ -1,6 +1,23 @@
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+# Настройки решения, не влияющие на входные данные и построенную модель (не входят в хэши снимка и кэша модели)
+SOLVE_FIELDS = {
+    'timelimit',
+    'column_generation_max_iterations',
+    'use_warm_start',
+    'use_greedy_start',
+    'portfolio_size',
+    'mip_rel_gap',
+    'rolling_window_hours',
+    'rolling_overlap_hours',
+    'rolling_window_timelimit',
+    'use_input_snapshot',
+    'use_model_cache',
+    'output_batch_size',
+}
 
 
 @dataclass
@@ -11,6 +28,45 @@ class ModelConfig:
     start_date: datetime
     timelimit: int
     k_bests: int
+    # Генерация отправлений на numpy (False - исходный построчный расчет для сравнения)
+    vectorized_departures: bool = True
+    # Удаление вершин и дуг сети, недостижимых из стартовой позиции судна
+    prune_network: bool = False
+    # Переиспользование снимка входных данных предыдущего запуска, если изменились только заявки
+    use_input_snapshot: bool = False
+    # Кэш построенной модели (матрица ограничений и соответствие столбцов отправлениям и вершинам): при совпадении
+    # входных данных и настроек построения модель загружается в решатель без построения (model_backend pyomo и highs;
+    # при pyomo модель строится и решается через HighsModel - модель Pyomo не строится)
+    use_model_cache: bool = False
+    # Неравномерная сетка времени: участки (длительность в часах, шаг в часах), шаг последнего участка
+    # действует до конца горизонта. None - равномерная сетка с шагом hours_in_interval
+    time_grid: Optional[List[Tuple[float, float]]] = None
+    # Построение модели: 'pyomo' - выражения Pyomo и appsi_highs, 'highs' - матрица ограничений напрямую в highspy,
+    # 'column_generation' - генерация маршрутов судов и целочисленное решение на сгенерированных маршрутах,
+    # 'greedy' - расписание жадной эвристикой без решателя, 'lp_rounding' - LP-релаксация и округление маршрутов
+    # (быстрый режим, в выводе нижняя граница и разрыв)
+    model_backend: str = 'pyomo'
+    # Максимальное количество итераций генерации маршрутов
+    column_generation_max_iterations: int = 100
+    # Начальное решение из решения предыдущего сценария цепочки
+    use_warm_start: bool = True
+    # Начальное решение жадной эвристикой (если нет решения предыдущего сценария)
+    use_greedy_start: bool = False
+    # Отложенные ограничения на караваны: модель решается без них, для ребер с нарушениями в решении
+    # ограничения добавляются на все моменты времени, и модель перерешивается (каждый раз с лимитом timelimit)
+    lazy_convoy_constraints: bool = False
+    # Портфель решателей: количество параллельных настроек HiGHS (0 - один решатель; только для model_backend highs)
+    # и разрыв, при доказательстве которого остальные решатели останавливаются
+    portfolio_size: int = 0
+    mip_rel_gap: float = 1e-4
+    # Скользящее окно: длина окна в часах (None - решение на всем горизонте сразу), перекрытие соседних окон
+    # в часах и лимит времени на окно (None - timelimit)
+    rolling_window_hours: Optional[float] = None
+    rolling_overlap_hours: float = 24
+    rolling_window_timelimit: Optional[int] = None
+    # Запись таблиц отправлений и вершин частями по столько строк по мере корректировки результатов
+    # (None - таблицы собираются целиком). Память на вывод не зависит от длины расписания
+    output_batch_size: Optional[int] = None
 
     @property
     def end_date(self):
@@ -20,6 +76,12 @@ class ModelConfig:
     def planning_hours(self):
         return self.hours_in_horizon + self.hours_in_cross
 
+    def get_structural_repr(self) -> str:
+        """
+        Настройки, влияющие на входные данные и построение модели (для хэшей снимка и кэша модели)
+        """
+        return repr({f.name: getattr(self, f.name) for f in fields(self) if f.name not in SOLVE_FIELDS})
+
     # @classmethod
     # def create_from_json(cls, json_file_path: str) -> 'ScenarioConfig':
     #     """
@@ -37,4 +99,9 @@ class ModelConfig:
             f' Количество часов сверх планирования (cross) - {self.hours_in_cross};'
             f' Timelimit - {self.timelimit};'
             f' k_bests - {self.k_bests};'
+            + (f' Сетка времени - {self.time_grid};' if self.time_grid else '')
+            + (
+                f' Скользящее окно - {self.rolling_window_hours} ч, перекрытие {self.rolling_overlap_hours} ч;'
+                if self.rolling_window_hours else ''
+            )
         )
@@ -1,4 +1,3 @@
-import os
 from datetime import datetime, timedelta
 
 import pandas as pd
@@ -6,6 +5,7 @@ from pyomo.core import value, ConcreteModel
 import plotly.express as px
 
 from src.smp_model.input import ModelInput
+from src.smp_model.output_store import OutputTableWriter, save_output_table
 
 
 class ModelOutput:
@@ -53,58 +53,85 @@ class ModelOutput:
             ]
         )
 
-    def create_output(self):
-        print('Подготовка выходных данных')
+    def get_hours(self, t: int):
+        """
+        Часы от даты начала до момента сетки t. Все времена в выходных данных - в часах
+        (целые часы записываются целыми, как при равномерной сетке с шагом 1 ч)
+        """
+        hours = self.input.time_grid.get_hours(t)
+        return int(hours) if float(hours).is_integer() else hours
 
-        result_departures = [
-            [
-                d.vessel.name,
-                d.vessel.id,
-                d.edge.port_from.name,
-                d.edge.port_from.id,
-                d.edge.port_to.name,
-                d.edge.port_to.id,
-                d.time,
-                d.duration,
-                d.vessel.port_start.name,
-                d.vessel.time_start,
-                '-' if d.vessel.is_icebreaker else d.vessel.port_end.name,
-                1 if d.is_icebreaker_assistance else 0,
-                d.vessel.is_icebreaker,
-                self.input.config.start_date + timedelta(hours=d.time),
-                self.input.config.start_date + timedelta(hours=d.time + d.duration),
-                 d.vessel.class_type,
-                round(d.edge.avg_norm, 0),
-                d.speed,
-                d.vessel.max_speed
-            ]
-            for d in self.model.departure_results
+    def get_departure_row(self, d) -> list:
+        """
+        Строка таблицы отправлений по отрезку расписания судна (ScheduleSegment)
+        """
+        time_grid = self.input.time_grid
+        return [
+            d.vessel.name,
+            d.vessel.id,
+            d.port_from.name,
+            d.port_from.id,
+            d.port_to.name,
+            d.port_to.id,
+            self.get_hours(d.time),
+            self.get_hours(d.time + d.duration) - self.get_hours(d.time),
+            d.vessel.port_start.name,
+            self.get_hours(d.vessel.time_start),
+            '-' if d.vessel.is_icebreaker else d.vessel.port_end.name,
+            1 if d.is_icebreaker_assistance else 0,
+            d.vessel.is_icebreaker,
+            self.input.config.start_date + timedelta(hours=time_grid.get_hours(d.time)),
+            self.input.config.start_date + timedelta(hours=time_grid.get_hours(d.time + d.duration)),
+            d.vessel.class_type,
+            round(d.avg_norm, 0),
+            d.speed,
+            d.vessel.max_speed
         ]
-        self.result_departures_df = pd.DataFrame(result_departures, columns=self.result_departures_df.columns)
 
-        result_locations = [
-            [
-                l.vessel.name,
-                l.port.name,
-                l.time,
-                l.vessel.port_start.name,
-                l.vessel.time_start,
-                '-' if l.vessel.is_icebreaker else l.vessel.port_end.name,
-                l.vessel.is_icebreaker
-            ]
-            for l in self.model.stop_place_results
+    def get_location_row(self, l) -> list:
+        """
+        Строка таблицы остановок по конечной точке расписания судна (ScheduleStop)
+        """
+        return [
+            l.vessel.name,
+            l.port.name,
+            self.get_hours(l.time),
+            l.vessel.port_start.name,
+            self.get_hours(l.vessel.time_start),
+            '-' if l.vessel.is_icebreaker else l.vessel.port_end.name,
+            l.vessel.is_icebreaker
         ]
 
-        self.result_locations_df = pd.DataFrame(result_locations, columns=self.result_locations_df.columns)
+    def create_output(self):
+        print('Подготовка выходных данных')
+        folder_path = self.input.output_folder_path
+        batch_size = self.input.config.output_batch_size
 
-        self.start_planning_dates_df = pd.DataFrame([self.input.config.start_date], columns=self.start_planning_dates_df.columns)
+        if batch_size:
+            # Запись частями: строки формируются по мере получения отрезков расписания из корректировки результатов,
+            # таблицы целиком в памяти не собираются
+            departure_columns = list(self.result_departures_df.columns)
+            with OutputTableWriter(folder_path, 'departures', departure_columns, batch_size) as writer:
+                for d in self.model.departure_results:
+                    writer.append(self.get_departure_row(d))
+            location_columns = list(self.result_locations_df.columns)
+            with OutputTableWriter(folder_path, 'locations', location_columns, batch_size) as writer:
+                for l in self.model.stop_place_results:
+                    writer.append(self.get_location_row(l))
+        else:
+            # Отрезки расписания судов (ScheduleSegment) после корректировки результатов
+            self.result_departures_df = pd.DataFrame(
+                [self.get_departure_row(d) for d in self.model.departure_results],
+                columns=self.result_departures_df.columns,
+            )
+            self.result_locations_df = pd.DataFrame(
+                [self.get_location_row(l) for l in self.model.stop_place_results],
+                columns=self.result_locations_df.columns,
+            )
+            save_output_table(self.result_departures_df, folder_path, 'departures')
+            save_output_table(self.result_locations_df, folder_path, 'locations')
 
-        with pd.ExcelWriter(os.path.join(self.input.output_folder_path, 'departures.xlsx')) as writer:
-            self.result_departures_df.to_excel(writer)
-        with pd.ExcelWriter(os.path.join(self.input.output_folder_path, 'locations.xlsx')) as writer:
-            self.result_locations_df.to_excel(writer)
-        with pd.ExcelWriter(os.path.join(self.input.output_folder_path, 'start_planning_dates.xlsx')) as writer:
-            self.start_planning_dates_df.to_excel(writer)
-        with pd.ExcelWriter(os.path.join(self.input.output_folder_path, 'vessel_best_routes.xlsx')) as writer:
-            self.input.vessel_best_routes_df.to_excel(writer)
+        self.start_planning_dates_df = pd.DataFrame([self.input.config.start_date], columns=self.start_planning_dates_df.columns)
+        save_output_table(self.start_planning_dates_df, folder_path, 'start_planning_dates')
+        save_output_table(self.input.vessel_best_routes_df, folder_path, 'vessel_best_routes')
         return
@@ -0,0 +1,196 @@
+import os
+import shutil
+from collections import defaultdict
+from typing import List, Set
+
+import pandas as pd
+
+from src.smp_model.excel_cache import load_frame_npz, save_frame_npz
+
+# Таблицы выходных данных: имя таблицы -> (книга Excel для выгрузки, лист)
+OUTPUT_TABLES = {
+    'departures': ('departures.xlsx', 'Sheet1'),
+    'locations': ('locations.xlsx', 'Sheet1'),
+    'start_planning_dates': ('start_planning_dates.xlsx', 'Sheet1'),
+    'vessel_best_routes': ('vessel_best_routes.xlsx', 'Sheet1'),
+    'summary_statistics': ('statistics.xlsx', 'Общая статистика'),
+    'detailed_statistics': ('statistics.xlsx', 'Частная статистика'),
+}
+OUTPUT_TABLE_EXTENSION = '.npz'
+# Папка с частями таблицы, записанной OutputTableWriter
+OUTPUT_TABLE_PARTS_SUFFIX = '.parts'
+# Папка, в которую OutputTableWriter пишет части до завершения записи
+OUTPUT_TABLE_PARTS_TMP_SUFFIX = '.parts.tmp'
+
+
+def get_output_table_path(folder_path: str, name: str) -> str:
+    return os.path.join(folder_path, f'{name}{OUTPUT_TABLE_EXTENSION}')
+
+
+def get_output_table_parts_path(folder_path: str, name: str) -> str:
+    return os.path.join(folder_path, f'{name}{OUTPUT_TABLE_PARTS_SUFFIX}')
+
+
+def get_output_table_parts_tmp_path(folder_path: str, name: str) -> str:
+    return os.path.join(folder_path, f'{name}{OUTPUT_TABLE_PARTS_TMP_SUFFIX}')
+
+
+def get_output_excel_path(folder_path: str, name: str) -> str:
+    return os.path.join(folder_path, OUTPUT_TABLES[name][0])
+
+
+def get_output_table_file_names() -> Set[str]:
+    """
+    Имена файлов и папок хранилища таблиц выходных данных (в том числе незавершенной записи частями)
+    """
+    return {
+        file_name
+        for name in OUTPUT_TABLES
+        for file_name in (
+            f'{name}{OUTPUT_TABLE_EXTENSION}',
+            f'{name}{OUTPUT_TABLE_PARTS_SUFFIX}',
+            f'{name}{OUTPUT_TABLE_PARTS_TMP_SUFFIX}',
+        )
+    }
+
+
+def is_output_table_stored(folder_path: str, name: str) -> bool:
+    """
+    Есть ли таблица выходных данных в хранилище по колонкам (целиком или частями)
+    """
+    return (
+        os.path.isfile(get_output_table_path(folder_path, name))
+        or os.path.isdir(get_output_table_parts_path(folder_path, name))
+    )
+
+
+def has_output_table(folder_path: str, name: str) -> bool:
+    """
+    Есть ли таблица выходных данных (в хранилище по колонкам или в книге Excel прежнего формата)
+    """
+    return is_output_table_stored(folder_path, name) or os.path.isfile(get_output_excel_path(folder_path, name))
+
+
+def remove_output_table(folder_path: str, name: str) -> None:
+    """
+    Удаление таблицы выходных данных во всех форматах, чтобы при чтении не использовались устаревшие данные
+    """
+    for file_path in (get_output_table_path(folder_path, name), get_output_excel_path(folder_path, name)):
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+    shutil.rmtree(get_output_table_parts_path(folder_path, name), ignore_errors=True)
+
+
+def save_output_table(df: pd.DataFrame, folder_path: str, name: str) -> None:
+    """
+    Сохранение таблицы выходных данных по колонкам (типы колонок, в том числе даты, сохраняются).
+    Индекс таблицы не сохраняется
+    """
+    save_table_npz(df, get_output_table_path(folder_path, name), name)
+    # Таблица в других форматах удаляется, чтобы при чтении не использовались устаревшие данные
+    excel_path = get_output_excel_path(folder_path, name)
+    if os.path.isfile(excel_path):
+        os.remove(excel_path)
+    shutil.rmtree(get_output_table_parts_path(folder_path, name), ignore_errors=True)
+
+
+def save_table_npz(df: pd.DataFrame, file_path: str, name: str) -> None:
+    """
+    Запись таблицы (или ее части) в .npz
+    """
+    df = df.reset_index(drop=True).infer_objects()
+    if not save_frame_npz(df, file_path):
+        raise ValueError(f'Таблица {name} содержит колонки, которые нельзя сохранить по колонкам')
+
+
+def read_output_table(folder_path: str, name: str) -> pd.DataFrame:
+    """
+    Чтение таблицы выходных данных. Результаты прежних расчетов читаются из книг Excel
+    """
+    table_path = get_output_table_path(folder_path, name)
+    if os.path.isfile(table_path):
+        return load_frame_npz(table_path)
+    parts_path = get_output_table_parts_path(folder_path, name)
+    if os.path.isdir(parts_path):
+        return pd.concat(
+            [load_frame_npz(os.path.join(parts_path, part_name)) for part_name in sorted(os.listdir(parts_path))],
+            ignore_index=True,
+        )
+    excel_path = get_output_excel_path(folder_path, name)
+    if not os.path.isfile(excel_path):
+        raise FileNotFoundError(f'Не найдена таблица выходных данных {name} в папке {folder_path}.')
+    df = pd.read_excel(excel_path, sheet_name=OUTPUT_TABLES[name][1])
+    # Индекс, записанный в книгу Excel
+    return df.drop(columns=[col for col in df.columns if str(col).startswith('Unnamed:')])
+
+
+def export_output_excel(folder_path: str, export_folder_path: str) -> List[str]:
+    """
+    Выгрузка таблиц выходных данных из хранилища в книги Excel. Возвращает пути созданных книг
+    """
+    workbook_tables = defaultdict(list)
+    for name, (workbook_name, sheet_name) in OUTPUT_TABLES.items():
+        if is_output_table_stored(folder_path, name):
+            workbook_tables[workbook_name].append((name, sheet_name))
+
+    os.makedirs(export_folder_path, exist_ok=True)
+    workbook_paths = []
+    for workbook_name, tables in workbook_tables.items():
+        workbook_path = os.path.join(export_folder_path, workbook_name)
+        with pd.ExcelWriter(workbook_path) as writer:
+            for name, sheet_name in tables:
+                read_output_table(folder_path, name).to_excel(writer, sheet_name=sheet_name, index=False)
+        workbook_paths.append(workbook_path)
+    return workbook_paths
+
+
+class OutputTableWriter:
+    """
+    Запись таблицы выходных данных частями по batch_size строк по мере их получения: в памяти хранится
+    не больше одной части, поэтому память не зависит от длины расписания. Части читаются read_output_table.
+    Части пишутся во временную папку, которая переименовывается при завершении записи; при ошибке она
+    удаляется, поэтому недописанная таблица не читается как готовая
+    """
+    def __init__(self, folder_path: str, name: str, columns: List[str], batch_size: int) -> None:
+        self.name = name
+        self.columns = columns
+        self.batch_size = batch_size
+        self.parts_path = get_output_table_parts_path(folder_path, name)
+        self.tmp_parts_path = get_output_table_parts_tmp_path(folder_path, name)
+        self.rows: List[list] = []
+        self.n_parts = 0
+        self.n_rows = 0
+
+        remove_output_table(folder_path, name)
+        shutil.rmtree(self.tmp_parts_path, ignore_errors=True)
+        os.makedirs(self.tmp_parts_path)
+
+    def __enter__(self) -> 'OutputTableWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            shutil.rmtree(self.tmp_parts_path, ignore_errors=True)
+
+    def append(self, row: list) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Запись накопленных строк отдельной частью
+        """
+        df = pd.DataFrame(self.rows, columns=self.columns)
+        save_table_npz(df, os.path.join(self.tmp_parts_path, f'{self.n_parts:06d}{OUTPUT_TABLE_EXTENSION}'), self.name)
+        self.n_parts += 1
+        self.n_rows += len(self.rows)
+        self.rows = []
+
+    def close(self) -> None:
+        # Пустая таблица записывается одной частью без строк (сохраняются колонки)
+        if self.rows or not self.n_parts:
+            self.flush()
+        os.replace(self.tmp_parts_path, self.parts_path)
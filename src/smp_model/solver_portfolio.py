@@ -0,0 +1,166 @@
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import List, Optional
+
+import highspy
+import numpy as np
+
+from src.smp_model.solver_telemetry import SolverTelemetry
+
+# Настройки HiGHS участников портфеля (берутся первые portfolio_size)
+DEFAULT_PORTFOLIO = [
+    {'random_seed': 0},
+    {'random_seed': 1, 'mip_heuristic_effort': 0.3},
+    {'random_seed': 2, 'presolve': 'off'},
+    {'random_seed': 3, 'mip_heuristic_effort': 0.02},
+    {'random_seed': 4, 'presolve': 'off', 'mip_heuristic_effort': 0.3},
+    {'random_seed': 5},
+]
+# Запас времени на чтение модели и передачу решения сверх лимита времени решателя (после него остальные
+# решатели останавливаются, если уже есть решение)
+EXTRA_SECONDS = 30
+
+
+def run_highs(
+        model_path: str,
+        options: dict,
+        timelimit: float,
+        gap: float,
+        start_values: Optional[np.ndarray],
+        results: multiprocessing.Queue,
+) -> None:
+    """
+    Решение модели из файла HiGHS с заданными настройками (выполняется в отдельном процессе)
+    """
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', False)
+    highs.readModel(model_path)
+    for name, value in options.items():
+        highs.setOptionValue(name, value)
+    highs.setOptionValue('time_limit', float(timelimit))
+    highs.setOptionValue('mip_rel_gap', float(gap))
+    if start_values is not None:
+        start_solution = highspy.HighsSolution()
+        start_solution.col_value = start_values.tolist()
+        highs.setSolution(start_solution)
+    telemetry = SolverTelemetry()
+    telemetry.start(highs, f'portfolio: highs {options}')
+    highs.run()
+
+    solution = highs.getSolution()
+    info = highs.getInfo()
+    results.put({
+        'name': f'highs {options}',
+        'telemetry': telemetry.finish(),
+        'is_gap_reached': highs.getModelStatus() == highspy.HighsModelStatus.kOptimal,
+        'objective': info.objective_function_value if solution.value_valid else None,
+        'gap': info.mip_gap,
+        'col_value': np.array(solution.col_value) if solution.value_valid else None,
+    })
+
+
+def run_cbc(model_path: str, num_col: int, timelimit: float, gap: float, results: multiprocessing.Queue) -> None:
+    """
+    Решение модели из файла CBC (выполняется в отдельном процессе)
+    """
+    solution_path = model_path + '.cbc.txt'
+    start_time = time.perf_counter()
+    subprocess.run(
+        [shutil.which('cbc'), model_path, 'sec', str(timelimit), 'ratio', str(gap), 'solve', 'solu', solution_path],
+        capture_output=True,
+    )
+    objective, col_value, is_gap_reached = None, None, False
+    if os.path.exists(solution_path):
+        with open(solution_path) as f:
+            status = f.readline()
+            match = re.search(r'objective value\s+(\S+)', status)
+            if match and not status.startswith('Infeasible'):
+                objective = float(match.group(1))
+                is_gap_reached = status.startswith('Optimal')
+                col_value = np.zeros(num_col)
+                for line in f:
+                    parts = line.replace('**', '').split()
+                    if len(parts) >= 3 and parts[1].startswith('c'):
+                        col_value[int(parts[1][1:])] = float(parts[2])
+    results.put({
+        'name': 'cbc',
+        'telemetry': {
+            'stage': 'portfolio: cbc',
+            'status': 'Optimal' if is_gap_reached else None,
+            'objective': objective,
+            'wall_time_sec': round(time.perf_counter() - start_time, 3),
+        },
+        'is_gap_reached': is_gap_reached,
+        'objective': objective,
+        'gap': None,
+        'col_value': col_value,
+    })
+
+
+def solve_portfolio(
+        highs: highspy.Highs,
+        timelimit: float,
+        portfolio_size: int,
+        gap: float,
+        start_values: Optional[np.ndarray] = None,
+) -> dict:
+    """
+    Параллельное решение модели несколькими настройками HiGHS (и CBC, если установлен).
+    Когда один из участников доказывает заданный разрыв, остальные останавливаются; иначе по истечении
+    лимита времени выбирается лучшее найденное решение
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as folder_path:
+        model_path = os.path.join(folder_path, 'model.mps')
+        highs.writeModel(model_path)
+
+        processes: List[multiprocessing.Process] = [
+            context.Process(target=run_highs, args=(model_path, options, timelimit, gap, start_values, results))
+            # Не больше процессов, чем ядер: иначе решатели делят ядра и не укладываются в лимит времени
+            for options in DEFAULT_PORTFOLIO[:min(portfolio_size, os.cpu_count() or 1)]
+        ]
+        if shutil.which('cbc'):
+            processes.append(context.Process(
+                target=run_cbc, args=(model_path, highs.getNumCol(), timelimit, gap, results)
+            ))
+        print(f'Портфель решателей: {len(processes)} процессов')
+        for process in processes:
+            process.start()
+
+        best = None
+        n_results = 0
+        telemetry = []
+        deadline = time.perf_counter() + timelimit + EXTRA_SECONDS
+        # После лимита времени ожидание продолжается, только пока нет ни одного решения
+        while n_results < len(processes) and (time.perf_counter() < deadline or best is None):
+            try:
+                result = results.get(timeout=1)
+            except queue.Empty:
+                # Все процессы завершились, не передав решение (ошибка в процессе)
+                if not any(process.is_alive() for process in processes):
+                    break
+                continue
+            n_results += 1
+            telemetry.append(result['telemetry'])
+            print(f"Портфель решателей: {result['name']} - {result['objective']}, разрыв {result['gap']}")
+            if result['col_value'] is not None and (best is None or result['objective'] < best['objective']):
+                best = result
+            if result['is_gap_reached']:
+                break
+
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    if best is None:
+        raise RuntimeError('Решение не найдено ни одним решателем портфеля')
+    print(f"Портфель решателей: выбрано решение {best['name']}")
+    return {**best, 'telemetry': telemetry}
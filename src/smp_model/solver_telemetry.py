@@ -0,0 +1,147 @@
+import json
+import os
+import re
+import time
+from typing import List, Optional
+
+import highspy
+
+# Строка журнала HiGHS с итогом предварительной обработки: размеры после нее и сокращение
+PRESOLVE_PATTERN = re.compile(
+    r'Presolve reductions: rows (\d+)\((-?\d+)\); columns (\d+)\((-?\d+)\); nonzeros (\d+)\((-?\d+)\)'
+)
+TELEMETRY_FILE_NAME = 'solver_telemetry.json'
+# Статус допустимого решения HiGHS (kSolutionStatusFeasible); в старых версиях highspy нет перечисления SolutionStatus
+SOLUTION_STATUS_FEASIBLE = 2
+
+
+def to_float(x: float) -> Optional[float]:
+    """
+    Число для json (бесконечные значения HiGHS - None)
+    """
+    return float(x) if abs(x) < highspy.kHighsInf else None
+
+
+class SolverTelemetry:
+    """
+    Телеметрия решателя: для каждого запуска HiGHS (окна скользящего горизонта, раунды отложенных ограничений,
+    этапы генерации маршрутов) - размер модели, сокращение предварительной обработкой, ход решения
+    (найденные решения и нижняя граница по времени), статус завершения, количество узлов и время.
+    Данные собираются обработчиками событий HiGHS, поэтому не зависят от построения модели (Pyomo или highspy).
+    В версиях highspy без событий записываются только итоговые показатели (статус, целевая функция, время)
+    """
+    def __init__(self) -> None:
+        self.runs: List[dict] = []
+        self.highs: Optional[highspy.Highs] = None
+        self.start_time = 0.0
+
+    def on_logging(self, event) -> None:
+        match = PRESOLVE_PATTERN.search(event.message)
+        if match:
+            rows, rows_reduction, cols, cols_reduction, nonzeros, nonzeros_reduction = map(int, match.groups())
+            self.runs[-1]['presolve'] = {
+                'num_row': rows, 'num_col': cols, 'num_nonzeros': nonzeros,
+                'rows_removed': -rows_reduction, 'cols_removed': -cols_reduction,
+                'nonzeros_removed': -nonzeros_reduction,
+            }
+
+    def on_mip_logging(self, event) -> None:
+        data = event.data_out
+        self.runs[-1]['timeline'].append({
+            'time_sec': round(data.running_time, 3),
+            'primal_bound': to_float(data.mip_primal_bound),
+            'dual_bound': to_float(data.mip_dual_bound),
+            'gap': to_float(data.mip_gap),
+            'node_count': int(data.mip_node_count),
+        })
+
+    def on_mip_improving_solution(self, event) -> None:
+        self.runs[-1]['incumbents'].append({
+            'time_sec': round(event.data_out.running_time, 3),
+            'objective': float(event.data_out.objective_function_value),
+        })
+
+    def get_callbacks(self, highs: highspy.Highs) -> list:
+        """
+        События HiGHS, доступные в установленной версии highspy, и их обработчики
+        """
+        return [
+            (getattr(highs, name), handler)
+            for name, handler in (
+                ('cbLogging', self.on_logging),
+                ('cbMipLogging', self.on_mip_logging),
+                ('cbMipImprovingSolution', self.on_mip_improving_solution),
+            )
+            if hasattr(highs, name)
+        ]
+
+    def start(self, highs: highspy.Highs, stage: str) -> None:
+        """
+        Начало запуска решателя: подписка на события HiGHS
+        """
+        self.runs.append({
+            'stage': stage,
+            'presolve': None,
+            'timeline': [],
+            'incumbents': [],
+        })
+        self.highs = highs
+        for callback, handler in self.get_callbacks(highs):
+            callback.subscribe(handler)
+        self.start_time = time.perf_counter()
+
+    def finish(self, termination: Optional[str] = None) -> dict:
+        """
+        Завершение запуска решателя: итоговые показатели и отписка от событий HiGHS.
+        termination - статус завершения в терминах вызывающей стороны (например, Pyomo)
+        """
+        highs = self.highs
+        wall_time = time.perf_counter() - self.start_time
+        for callback, handler in self.get_callbacks(highs):
+            callback.unsubscribe(handler)
+        self.highs = None
+
+        info = highs.getInfo()
+        model_status = highs.getModelStatus()
+        run = self.runs[-1]
+        run.update({
+            'num_col': highs.getNumCol(),
+            'num_row': highs.getNumRow(),
+            'num_nonzeros': highs.getNumNz(),
+            'time_limit': to_float(highs.getOptionValue('time_limit')[1]),
+            'status': highs.modelStatusToString(model_status),
+            'termination': termination,
+            'is_time_limit_reached': model_status == highspy.HighsModelStatus.kTimeLimit,
+            'objective': (
+                to_float(info.objective_function_value)
+                if int(info.primal_solution_status) == SOLUTION_STATUS_FEASIBLE else None
+            ),
+            'dual_bound': to_float(info.mip_dual_bound),
+            'gap': to_float(info.mip_gap),
+            'node_count': int(info.mip_node_count),
+            'simplex_iteration_count': int(info.simplex_iteration_count),
+            'wall_time_sec': round(wall_time, 3),
+        })
+        return run
+
+    def add_run(self, run: dict) -> None:
+        """
+        Запуск решателя, выполненный вне процесса (портфель решателей)
+        """
+        self.runs.append(run)
+
+    def save(self, folder_path: str, **attributes) -> None:
+        """
+        Запись телеметрии в папку с выходными данными (attributes - общие сведения о расчете)
+        """
+        with open(os.path.join(folder_path, TELEMETRY_FILE_NAME), 'w') as f:
+            json.dump(
+                {
+                    **attributes,
+                    'solver_wall_time_sec': round(sum(run.get('wall_time_sec', 0) for run in self.runs), 3),
+                    'runs': self.runs,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
@@ -0,0 +1,133 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.smp_model.entity.speed_decrease import SpeedDecrease
+
+
+class SpeedTable:
+    """
+    Таблица снижения скорости в виде плотных массивов по осям: класс судна x интегральная тяжесть x признак проводки
+    """
+    # Порядок режимов проводки по последней оси массивов
+    ASSISTANCE_MODES = (True, False)
+
+    def __init__(self, speed_decrease_dict: Dict[Tuple[str, int, bool], SpeedDecrease]):
+        self.class_positions: Dict[str, int] = {
+            class_type: i
+            for i, class_type in enumerate(sorted({key[0] for key in speed_decrease_dict}))
+        }
+        ice_levels = [key[1] for key in speed_decrease_dict] or [0]
+        self.min_ice: int = int(min(ice_levels))
+        n_ice = int(max(ice_levels)) - self.min_ice + 1
+        shape = (max(len(self.class_positions), 1), n_ice, len(self.ASSISTANCE_MODES))
+
+        # Задано ли снижение скорости для комбинации
+        self.is_defined = np.zeros(shape, dtype=bool)
+        self.is_possible = np.zeros(shape, dtype=bool)
+        # Множитель базовой скорости: 1 - speed_decrease_pct / 100
+        self.speed_factor = np.zeros(shape, dtype=float)
+        # Признак базовой скорости: максимальная скорость судна (иначе - интегральная тяжесть льда)
+        self.is_max_speed_base = np.zeros(shape, dtype=bool)
+
+        for (class_type, integer_velocity, is_icebreaker_assistance), speed_decrease in speed_decrease_dict.items():
+            idx = (
+                self.class_positions[class_type],
+                int(integer_velocity) - self.min_ice,
+                self.ASSISTANCE_MODES.index(bool(is_icebreaker_assistance)),
+            )
+            self.is_defined[idx] = True
+            self.is_possible[idx] = bool(speed_decrease.is_possible)
+            self.speed_factor[idx] = 1 - speed_decrease.speed_decrease_pct / 100
+            self.is_max_speed_base[idx] = speed_decrease.base_speed == 'max_speed'
+
+        # Кэш поштучных запросов get_ice_depending_values
+        self.ice_depending_values_cache: Dict[Tuple[str, float, float], List[Tuple[float, bool, bool]]] = {}
+
+    def get_class_position(self, class_type: str) -> int:
+        """
+        Позиция класса судна по первой оси (-1, если класс отсутствует в таблице)
+        """
+        return self.class_positions.get(class_type, -1)
+
+    def get_ice_position(self, integer_integral_ice: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Позиции округленной интегральной тяжести по второй оси и маска попадания в таблицу
+        """
+        ice = np.asarray(integer_integral_ice, dtype=float)
+        in_table = np.isfinite(ice)
+        ice_position = np.where(in_table, ice, self.min_ice).astype(np.int64) - self.min_ice
+        in_table &= (ice_position >= 0) & (ice_position < self.is_defined.shape[1])
+        return np.where(in_table, ice_position, 0), in_table
+
+    def calculate_speeds(
+            self,
+            class_positions: np.ndarray,
+            max_speeds: np.ndarray,
+            integer_integral_ice: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Расчет скоростей для всех судов (типов судов) на всех ребрах
+
+        :param class_positions: позиции классов судов, размерность (n_vessels,)
+        :param max_speeds: максимальные скорости судов, размерность (n_vessels,)
+        :param integer_integral_ice: округленная интегральная тяжесть на ребрах, размерность (n_edges,)
+
+        Returns:
+            speed, is_defined, is_possible - массивы размерности (n_vessels, n_edges, len(ASSISTANCE_MODES))
+        """
+        class_positions = np.asarray(class_positions, dtype=np.int64)
+        max_speeds = np.asarray(max_speeds, dtype=float)[:, None, None]
+        ice = np.asarray(integer_integral_ice, dtype=float)
+        ice_position, in_table = self.get_ice_position(ice)
+        known_class = class_positions >= 0
+
+        idx = (np.where(known_class, class_positions, 0)[:, None], ice_position[None, :])
+        is_defined = self.is_defined[idx] & (known_class[:, None] & in_table[None, :])[:, :, None]
+        speed_factor = self.speed_factor[idx]
+        speed = np.where(
+            self.is_max_speed_base[idx],
+            max_speeds * speed_factor,
+            np.minimum(np.nan_to_num(ice)[None, :, None] * speed_factor, max_speeds),
+        )
+        return speed, is_defined, self.is_possible[idx] & is_defined
+
+    def calculate_edge_times(
+            self,
+            lengths: np.ndarray,
+            integer_integral_ice: np.ndarray,
+            class_positions: np.ndarray,
+            max_speeds: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Время прохождения ребер для типов судов по лучшему допустимому режиму проводки
+
+        Returns:
+            Массив размерности (n_vessels, n_edges)
+        """
+        ice = np.asarray(integer_integral_ice, dtype=float)
+        speed, _, is_possible = self.calculate_speeds(class_positions, max_speeds, ice)
+        possible_speed = np.maximum(np.where(is_possible, speed, 0.1).max(axis=-1), 0.1)
+        edge_time = np.asarray(lengths, dtype=float)[None, :] / possible_speed
+        return np.where(ice[None, :] < 10, 99999, edge_time)
+
+    def get_ice_depending_values(
+            self,
+            class_type: str,
+            max_speed: float,
+            integer_integral_ice: float,
+    ) -> List[Tuple[float, bool, bool]]:
+        """
+        Скорость, признак проводки и признак возможности движения для одного судна на одном ребре
+        """
+        key = (class_type, max_speed, integer_integral_ice)
+        if key not in self.ice_depending_values_cache:
+            speed, is_defined, is_possible = self.calculate_speeds(
+                [self.get_class_position(class_type)], [max_speed], [integer_integral_ice],
+            )
+            self.ice_depending_values_cache[key] = [
+                (float(speed[0, 0, a]), is_icebreaker_assistance, bool(is_possible[0, 0, a]))
+                for a, is_icebreaker_assistance in enumerate(self.ASSISTANCE_MODES)
+                if is_defined[0, 0, a]
+            ]
+        return self.ice_depending_values_cache[key]
@@ -0,0 +1,120 @@
+import bisect
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Допуск при сравнении часов
+EPS = 1e-9
+
+
+class TimeGrid:
+    """
+    Сетка моментов времени горизонта планирования: момент t наступает через hours[t] часов после даты начала.
+    Шаг сетки может меняться по горизонту (мелкий в начале, крупный в конце и в периоде cross)
+    """
+    def __init__(self, hours: Sequence[float]):
+        self.hours = np.asarray(hours, dtype=float)
+        self.hours_list: List[float] = self.hours.tolist()
+        # Шаги до начала и после конца сетки - для моментов вне горизонта (старт до начала, сдвиги при корректировке)
+        self.first_step = self.hours_list[1] - self.hours_list[0] if len(self.hours_list) > 1 else 1.0
+        self.last_step = self.hours_list[-1] - self.hours_list[-2] if len(self.hours_list) > 1 else 1.0
+
+    @classmethod
+    def create(
+            cls,
+            planning_hours: float,
+            hours_in_interval: float,
+            steps: List[Tuple[float, float]] = None,
+    ) -> 'TimeGrid':
+        """
+        Создание сетки на горизонт planning_hours
+
+        :param steps: участки сетки (длительность участка в часах, шаг в часах); шаг последнего участка
+            действует до конца горизонта. None - равномерная сетка с шагом hours_in_interval
+        """
+        steps = steps or [(planning_hours, hours_in_interval)]
+        if any(step <= 0 for _, step in steps):
+            raise ValueError(f'Шаг сетки времени должен быть положительным: {steps}')
+        hours = []
+        current, segment_end = 0, 0
+        for segment_hours, step in steps:
+            segment_end += segment_hours
+            while current < min(segment_end, planning_hours) - EPS:
+                hours.append(current)
+                current += step
+        while current < planning_hours - EPS:
+            hours.append(current)
+            current += steps[-1][1]
+        return cls(hours)
+
+    def __len__(self) -> int:
+        return len(self.hours_list)
+
+    def get_hours(self, t: int) -> float:
+        """
+        Часы от даты начала до момента t
+        """
+        if 0 <= t < len(self.hours_list):
+            return self.hours_list[t]
+        if t < 0:
+            return t * self.first_step
+        return self.hours_list[-1] + (t - len(self.hours_list) + 1) * self.last_step
+
+    def get_hours_array(self, t: np.ndarray) -> np.ndarray:
+        """
+        Векторный вариант get_hours
+        """
+        t = np.asarray(t, dtype=np.int64)
+        n = len(self.hours_list)
+        return np.where(
+            t < 0,
+            t * self.first_step,
+            np.where(t < n, self.hours[np.clip(t, 0, n - 1)], self.hours_list[-1] + (t - n + 1) * self.last_step),
+        )
+
+    def get_time(self, hours: float) -> int:
+        """
+        Первый момент сетки, наступающий не раньше, чем через hours часов от даты начала
+        """
+        if hours < 0:
+            return math.ceil(hours / self.first_step - EPS)
+        if hours <= self.hours_list[-1] + EPS:
+            return bisect.bisect_left(self.hours_list, hours - EPS)
+        return len(self.hours_list) - 1 + math.ceil((hours - self.hours_list[-1]) / self.last_step - EPS)
+
+    def get_arrival_time(self, t: int, travel_hours: float) -> int:
+        """
+        Момент прибытия при отправлении в момент t и времени в пути travel_hours: ближайший момент сетки
+        (при равной удаленности - более поздний), но не раньше следующего момента. -1, если прибытие за горизонтом
+        """
+        if travel_hours == 0:
+            return t
+        arrival_hours = self.get_hours(t) + travel_hours
+        if arrival_hours > self.hours_list[-1] + EPS:
+            return -1
+        upper = bisect.bisect_left(self.hours_list, arrival_hours - EPS)
+        lower = max(upper - 1, 0)
+        if arrival_hours - self.hours_list[lower] < self.hours_list[upper] - arrival_hours - EPS:
+            upper = lower
+        return max(upper, t + 1)
+
+    def get_arrival_times(self, t: np.ndarray, travel_hours: np.ndarray) -> np.ndarray:
+        """
+        Векторный вариант get_arrival_time для отправлений в пределах сетки
+        """
+        t = np.asarray(t, dtype=np.int64)
+        travel_hours = np.asarray(travel_hours, dtype=float)
+        arrival_hours = self.hours[t] + travel_hours
+        upper = np.minimum(np.searchsorted(self.hours, arrival_hours - EPS, side='left'), len(self.hours) - 1)
+        lower = np.maximum(upper - 1, 0)
+        is_lower_nearer = arrival_hours - self.hours[lower] < self.hours[upper] - arrival_hours - EPS
+        arrival = np.maximum(np.where(is_lower_nearer, lower, upper), t + 1)
+        arrival = np.where(travel_hours == 0, t, arrival)
+        return np.where(arrival_hours > self.hours[-1] + EPS, -1, arrival)
+
+    def get_last_departure_times(self, travel_hours: np.ndarray) -> np.ndarray:
+        """
+        Последний момент отправления, при котором прибытие через travel_hours часов попадает в горизонт
+        """
+        return np.searchsorted(self.hours, self.hours[-1] - np.asarray(travel_hours, dtype=float) + EPS, side='right') - 1
@@ -0,0 +1,170 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.smp_model.entity.departure import Departure
+from src.smp_model.entity.vessel import Vessel
+from src.smp_model.greedy_model import GreedyModel
+from src.smp_model.input import ModelInput
+
+SOLUTION_DEPARTURES_COLUMNS = ['vessel_id', 'port_from_id', 'port_to_id', 'time_from_dt', 'is_icebreaker_assistance']
+
+
+def create_solution_departures_df(input: ModelInput, departures: List[Departure]) -> pd.DataFrame:
+    """
+    Перемещения (без ожиданий) из решения модели до корректировки времени связок, с абсолютными датами
+    """
+    time_grid = input.time_grid
+    return pd.DataFrame(
+        [
+            [
+                d.vessel.id,
+                d.edge.port_from.id,
+                d.edge.port_to.id,
+                input.config.start_date + timedelta(hours=time_grid.get_hours(d.time)),
+                d.is_icebreaker_assistance,
+            ]
+            for d in departures
+            if not d.edge.is_fict
+        ],
+        columns=SOLUTION_DEPARTURES_COLUMNS,
+    )
+
+
+class WarmStart:
+    """
+    Начальное решение для модели по перемещениям из решения предыдущего сценария цепочки.
+
+    Каждое судно проходит перемещения предыдущего решения, начинающиеся не раньше даты начала сценария,
+    начиная со своей стартовой позиции: до времени перемещения судно ждет в порту, перемещение, которое
+    после корректировки связок стало невозможно вовремя, сдвигается на время готовности судна. Маршрут
+    обрывается на первом перемещении, которого нет в сети. Суда, которые в караване оказались без достаточного
+    числа ледоколов, останавливаются перед этим перемещением. Если в портах баланса ледоколов оказалось меньше
+    двух ледоколов, свободные ледоколы приводятся туда, как в жадной эвристике: иначе решатель отклонит
+    начальное решение
+    """
+    def __init__(
+            self,
+            input: ModelInput,
+            solution_departures_df: pd.DataFrame,
+            icebreaker_end_ports: List[int],
+    ) -> None:
+        self.input = input
+        self.solution_departures_df = solution_departures_df
+        # Порты, в которых в конце горизонта должно быть не менее двух ледоколов
+        self.icebreaker_end_ports = icebreaker_end_ports
+
+        # Значения переменных в порядке input.departures и input.locations
+        self.departure_values = np.zeros(len(input.departures))
+        self.stop_place_values = np.zeros(len(input.locations))
+        # Количество судов, маршрут которых взят из предыдущего решения
+        self.n_vessels_with_route = 0
+
+    def get_time(self, date: datetime) -> int:
+        hours = (pd.Timestamp(date) - pd.Timestamp(self.input.config.start_date)).total_seconds() / 3600
+        return self.input.time_grid.get_time(hours)
+
+    def create_route(self, vessel, moves_df: pd.DataFrame) -> Tuple[List[int], int]:
+        """
+        Позиции отправлений маршрута судна и позиция его конечной вершины
+        """
+        departures_dict = self.input.departures_dict
+        location_arrays = self.input.location_arrays
+        route = []
+        port, t = vessel.port_start, vessel.time_start
+        location = self.input.locations_dict.find((vessel, port, t))
+        for move in moves_df.itertuples():
+            if move.port_from_id != port.id or (move.port_from_id, move.port_to_id) not in self.input.edges_dict:
+                break
+            move_time = max(self.get_time(move.time_from_dt), t)
+            waits = [
+                departures_dict.find((vessel, self.input.edges_dict[port.id, port.id], wait_t, False))
+                for wait_t in range(t, move_time)
+            ]
+            d = departures_dict.find((
+                vessel,
+                self.input.edges_dict[move.port_from_id, move.port_to_id],
+                move_time,
+                bool(move.is_icebreaker_assistance),
+            ))
+            if d < 0 or location_arrays.departure_location_to[d] < 0 or min(waits, default=0) < 0:
+                break
+            route.extend(waits + [d])
+            location = int(location_arrays.departure_location_to[d])
+            port, t = self.input.locations[location].port, self.input.locations[location].time
+        return route, location
+
+    def create(self) -> None:
+        """
+        Заполнение значений переменных
+        """
+        departure_arrays = self.input.departure_arrays
+        location_arrays = self.input.location_arrays
+        moves_by_vessel = {
+            vessel_id: moves_df.sort_values('time_from_dt')
+            for vessel_id, moves_df in self.solution_departures_df[
+                self.solution_departures_df['time_from_dt'] >= pd.Timestamp(self.input.config.start_date)
+            ].groupby('vessel_id')
+        }
+        routes = {
+            v: self.create_route(v, moves_by_vessel.get(v.id, self.solution_departures_df.iloc[:0]))
+            for v in self.input.vessels
+        }
+
+        # Караваны без достаточного числа ледоколов: суда останавливаются перед таким перемещением
+        while True:
+            convoy = defaultdict(int)
+            for v, (route, _) in routes.items():
+                for d in route:
+                    if departure_arrays.is_icebreaker_assistance[d]:
+                        convoy[departure_arrays.edge_idx[d], departure_arrays.time[d]] += 1
+                    elif v.is_icebreaker:
+                        convoy[departure_arrays.edge_idx[d], departure_arrays.time[d]] -= 3
+            overloaded = {key for key, n in convoy.items() if n > 0}
+            if not overloaded:
+                break
+            for v, (route, _) in routes.items():
+                for i, d in enumerate(route):
+                    if departure_arrays.is_icebreaker_assistance[d] \
+                            and (departure_arrays.edge_idx[d], departure_arrays.time[d]) in overloaded:
+                        routes[v] = (route[:i], int(location_arrays.departure_location_from[d]))
+                        break
+
+        self.n_vessels_with_route = sum(bool(route) for route, location in routes.values() if location >= 0)
+        self.move_icebreakers_to_end_ports(routes)
+
+        for route, location in routes.values():
+            if location < 0:
+                continue
+            self.departure_values[route] = 1
+            self.stop_place_values[location] = 1
+        print(
+            f'Начальное решение из предыдущего сценария: маршруты {self.n_vessels_with_route} судов'
+            f' из {len(self.input.vessels)}'
+        )
+
+    def move_icebreakers_to_end_ports(self, routes: Dict[Vessel, Tuple[List[int], int]]) -> None:
+        """
+        Выполнение баланса ледоколов: ледоколы продолжают маршрут из конечной вершины в порты баланса
+        """
+        greedy_model = GreedyModel(self.input, self.icebreaker_end_ports)
+        greedy_model.icebreaker_locations = {
+            v: location for v, (_, location) in routes.items() if v.is_icebreaker and location >= 0
+        }
+        greedy_model.icebreaker_departures = {v: [] for v in greedy_model.icebreaker_locations}
+        greedy_model.move_icebreakers_to_end_ports()
+        for v, location in greedy_model.icebreaker_locations.items():
+            routes[v] = (routes[v][0] + greedy_model.icebreaker_departures[v], location)
+
+        n_in_end_ports = sum(
+            self.input.locations[location].port.id in self.icebreaker_end_ports
+            for location in greedy_model.icebreaker_locations.values()
+        )
+        if n_in_end_ports < 2:
+            print(
+                f'Начальное решение нарушает баланс ледоколов (в портах баланса {n_in_end_ports} из 2):'
+                f' решатель его отклонит'
+            )
@@ -9,7 +9,10 @@ import pandas as pd
 from fastapi import FastAPI, UploadFile
 from fastapi.responses import StreamingResponse
 
+from src.smp_model.excel_cache import CACHE_FOLDER_NAME
 from src.smp_model.graph.length_velocity_calc import dump_velocity_length
+from src.smp_model.output_store import export_output_excel, get_output_table_file_names
+from src.smp_model.time_grid import TimeGrid
 from src.smp_scenario.parent_scenario import ParentScenario
 from src.smp_scenario.parent_scenario_config import ParentScenarioConfig
 from src.smp_scenario.scenario import Scenario
@@ -63,6 +66,16 @@ API для сервиса по планированию маршрутов ат
 дашборда, а также можно выгрузить входные и выходные данные по нему.
 """
 
+def parse_time_grid(time_grid: str, duration_days: int, cross_days: int) -> list:
+    """
+    Разбор и проверка сетки времени на горизонте сценария. ValueError - некорректная сетка
+    """
+    steps = ScenarioConfig.parse_time_grid(time_grid)
+    if steps:
+        TimeGrid.create((duration_days + cross_days) * 24, 1, steps)
+    return steps
+
+
 app = FastAPI(
     title="🚢 BnW_SMP",
     description=description,
@@ -88,6 +101,7 @@ async def create_scenario(
         cross_days: int = 2,
         # timelimit: int = 900,
         k_bests: int = 5,
+        time_grid: str = None,
 ):
     """
     Создание сценария для планирования маршрутов.
@@ -101,6 +115,9 @@ async def create_scenario(
     Для сценария также можно выставить различные параметры моделирования. Можно настроить дату начала построения расписания,
      количество дней планирования, количество дней сверх плана, ограничение по времени на решение задачи и количество
      лучших маршрутов для построения расписания.
+
+    Параметр time_grid задает неравномерную сетку времени в виде "48:1,72:3,0:6" - участки (длительность в часах:шаг
+     в часах), шаг последнего участка действует до конца горизонта. По умолчанию сетка равномерная с шагом 1 час.
     """
     if name == 'base':
         return {'result': 'error', 'desc': f'Запрещено создавать сценарий с названием {name}'}
@@ -110,6 +127,12 @@ async def create_scenario(
     if not velocity_env.filename.endswith('.xlsx'):
         return {'result': 'error', 'desc': f'Файл {velocity_env.filename} должен быть формата .xlsx'}
 
+    # Сетка времени проверяется до создания папок сценария
+    try:
+        time_grid_steps = parse_time_grid(time_grid, duration_days, cross_days)
+    except ValueError as e:
+        return {'result': 'error', 'desc': f'Некорректная сетка времени {time_grid}: {e}'}
+
     scenario_dir = os.path.join('.', 'data', 'scenarios', name)
     if os.path.exists(scenario_dir):
         shutil.rmtree(scenario_dir)
@@ -137,6 +160,7 @@ async def create_scenario(
         cross_days=cross_days,
         timelimit=900,
         k_bests=k_bests,
+        time_grid=time_grid_steps,
     )
     config.to_json(input_dir)
 
@@ -155,13 +179,14 @@ async def create_parent_scenario(
         cross_days: int = 2,
         # timelimit: int = 900,
         k_bests: int = 5,
+        time_grid: str = None,
 ):
     """
     Создание родительского сценария. Запуск такого сценария осуществляется последовательно интервалами времени,
      заданными в настройках сценария.
 
     Для сценария можно указать последнюю дату планирования - дату до которой будет осуществлен последовательный расчет
-     расписания.
+     расписания. Параметр time_grid задается так же, как при создании сценария.
      """
 
     if name == 'base':
@@ -172,6 +197,12 @@ async def create_parent_scenario(
     if not velocity_env.filename.endswith('.xlsx'):
         return {'result': 'error', 'desc': f'Файл {velocity_env.filename} должен быть формата .xlsx'}
 
+    # Сетка времени проверяется до создания папок сценария
+    try:
+        time_grid_steps = parse_time_grid(time_grid, duration_days, cross_days)
+    except ValueError as e:
+        return {'result': 'error', 'desc': f'Некорректная сетка времени {time_grid}: {e}'}
+
     scenario_dir = os.path.join('.', 'data', 'scenarios', name)
     if os.path.exists(scenario_dir):
         shutil.rmtree(scenario_dir)
@@ -200,6 +231,7 @@ async def create_parent_scenario(
         cross_days=cross_days,
         timelimit=900,
         k_bests=k_bests,
+        time_grid=time_grid_steps,
     )
     config.to_json(input_dir)
 
@@ -219,10 +251,23 @@ async def download_scenario(
         return {'result': 'error', 'desc': f'Входные данные с названием {name} не загружены'}
 
     tmp_zf_path = os.path.join('.', 'data', 'tmp', f'{name}.zip')
+    tmp_export_dir = os.path.join('.', 'data', 'tmp', f'{name}_export')
+    output_table_files = get_output_table_file_names()
     tmp_zf_data = zipfile.ZipFile(tmp_zf_path, "w")
     for dirname, subdirs, files in os.walk(scenario_dir):
+        # Бинарный кэш входных данных не выгружается
+        if CACHE_FOLDER_NAME in subdirs:
+            subdirs.remove(CACHE_FOLDER_NAME)
+        short_dirname = dirname.replace(f'/data/scenarios/{name}', '')
+        # Таблицы выходных данных (файлы и папки с частями) выгружаются книгами Excel
+        if output_table_files & set(files + subdirs):
+            for workbook_path in export_output_excel(dirname, tmp_export_dir):
+                tmp_zf_data.write(workbook_path, os.path.join(short_dirname, os.path.basename(workbook_path)))
+            shutil.rmtree(tmp_export_dir)
+        subdirs[:] = [subdir for subdir in subdirs if subdir not in output_table_files]
         for filename in files:
-            short_dirname = dirname.replace(f'/data/scenarios/{name}', '')
+            if filename in output_table_files:
+                continue
             tmp_zf_data.write(os.path.join(dirname, filename), os.path.join(short_dirname, filename))
     tmp_zf_data.close()
 
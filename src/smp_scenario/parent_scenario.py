@@ -5,6 +5,8 @@ from typing import List
 
 import pandas as pd
 
+from src.smp_model.excel_cache import read_excel_cached
+from src.smp_model.output_store import has_output_table, read_output_table, save_output_table
 from src.smp_scenario.parent_scenario_config import ParentScenarioConfig
 from src.smp_scenario.scenario import Scenario
 from src.smp_scenario.scenario_config import ScenarioConfig
@@ -51,8 +53,7 @@ class ParentScenario(Scenario):
         """
         self.clear_or_create_folder(self.child_scenarios_folder_path)
         if os.path.isfile(os.path.join(self.input_folder_path, 'velocity_env.xlsx')):
-            with pd.ExcelFile(os.path.join(self.input_folder_path, 'velocity_env.xlsx')) as reader:
-                velocity_df = pd.read_excel(reader, sheet_name='Sheet1')
+            velocity_df = read_excel_cached(os.path.join(self.input_folder_path, 'velocity_env.xlsx'), ['Sheet1'])['Sheet1']
             velocity_dates = velocity_df['date'].unique()
             velocity_dates_flt = [pd.Timestamp(d).to_pydatetime() for d in velocity_dates if self.config.start_date_dt <= pd.Timestamp(d).to_pydatetime() <= self.config.end_date_dt]
             min_date_with_velocity = min(velocity_dates_flt)
@@ -73,7 +74,8 @@ class ParentScenario(Scenario):
                 interval_hours=self.config.interval_hours,
                 cross_days=self.config.cross_days,
                 timelimit=self.config.timelimit,
-                k_bests=self.config.k_bests
+                k_bests=self.config.k_bests,
+                time_grid=self.config.time_grid,
             )
             scenario = Scenario(
                 name=child_scenario_name,
@@ -95,7 +97,8 @@ class ParentScenario(Scenario):
                 interval_hours=self.config.interval_hours,
                 cross_days=self.config.cross_days,
                 timelimit=self.config.timelimit,
-                k_bests=self.config.k_bests
+                k_bests=self.config.k_bests,
+                time_grid=self.config.time_grid,
             )
             scenario = Scenario(
                 name=child_scenario_name,
@@ -111,9 +114,10 @@ class ParentScenario(Scenario):
         for i, child_scenario in enumerate(self.child_scenario_chain):
             if i == 0:
                 child_scenario.copy_input_from_other_scenario(self)
+                child_scenario.run_optimization()
             else:
                 child_scenario.create_input_from_prev_scenario(self.child_scenario_chain[i - 1])
-            child_scenario.run_optimization()
+                child_scenario.run_optimization(self.child_scenario_chain[i - 1])
 
     def concatenate_chain_optimization_results(self):
         """
@@ -123,15 +127,12 @@ class ParentScenario(Scenario):
         all_planning_start_dates_list = []
         all_vessel_best_routes_list = []
         for child_scenario in self.child_scenario_chain:
-            if not os.path.exists(os.path.join(child_scenario.output_folder_path, 'departures.xlsx')):
-                raise FileNotFoundError(f'Не найден выходной файл departures.xlsx в сценарии {child_scenario.name}.')
-
-            with pd.ExcelFile(os.path.join(child_scenario.output_folder_path, 'departures.xlsx')) as reader:
-                child_scenario_departures_df = pd.read_excel(reader, sheet_name='Sheet1')
-            with pd.ExcelFile(os.path.join(child_scenario.output_folder_path, 'start_planning_dates.xlsx')) as reader:
-                planning_start_dates_df = pd.read_excel(reader, sheet_name='Sheet1')
-            with pd.ExcelFile(os.path.join(child_scenario.output_folder_path, 'vessel_best_routes.xlsx')) as reader:
-                vessel_best_routes_df = pd.read_excel(reader, sheet_name='Sheet1')
+            if not has_output_table(child_scenario.output_folder_path, 'departures'):
+                raise FileNotFoundError(f'Не найдены выходные данные departures в сценарии {child_scenario.name}.')
+
+            child_scenario_departures_df = read_output_table(child_scenario.output_folder_path, 'departures')
+            planning_start_dates_df = read_output_table(child_scenario.output_folder_path, 'start_planning_dates')
+            vessel_best_routes_df = read_output_table(child_scenario.output_folder_path, 'vessel_best_routes')
             child_scenario_departures_df = child_scenario_departures_df[
                 (child_scenario_departures_df['time_from_dt'] < child_scenario.config.end_date_dt)
                 | (child_scenario_departures_df['time_to_dt'] <= child_scenario.config.end_date_dt)
@@ -147,12 +148,9 @@ class ParentScenario(Scenario):
         all_departures_df = pd.concat(all_departures_list)
         all_planning_start_dates_df = pd.concat(all_planning_start_dates_list)
         all_vessel_best_routes_df = pd.concat(all_vessel_best_routes_list)
-        with pd.ExcelWriter(os.path.join(self.output_folder_path, 'departures.xlsx')) as writer:
-            all_departures_df.to_excel(writer)
-        with pd.ExcelWriter(os.path.join(self.output_folder_path, 'start_planning_dates.xlsx')) as writer:
-            all_planning_start_dates_df.to_excel(writer)
-        with pd.ExcelWriter(os.path.join(self.output_folder_path, 'vessel_best_routes.xlsx')) as writer:
-            all_vessel_best_routes_df.to_excel(writer)
+        save_output_table(all_departures_df, self.output_folder_path, 'departures')
+        save_output_table(all_planning_start_dates_df, self.output_folder_path, 'start_planning_dates')
+        save_output_table(all_vessel_best_routes_df, self.output_folder_path, 'vessel_best_routes')
 
     @classmethod
     def create_scenario(cls, scenario_folder_path: str, scenario_name: str):
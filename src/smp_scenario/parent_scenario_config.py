@@ -15,6 +15,7 @@ class ParentScenarioConfig(ScenarioConfig):
         'cross_days',
         'timelimit',
         'k_bests',
+        'time_grid',
     )
 
     def __init__(
@@ -26,8 +27,9 @@ class ParentScenarioConfig(ScenarioConfig):
             cross_days: int,
             timelimit: int,
             k_bests: int,
+            time_grid: list = None,
     ):
-        super().__init__(start_date, duration_days, interval_hours, cross_days, timelimit, k_bests)
+        super().__init__(start_date, duration_days, interval_hours, cross_days, timelimit, k_bests, time_grid)
         # Дата окончания планирования родительского сценария
         self.end_date = end_date
 
@@ -46,6 +48,7 @@ class ParentScenarioConfig(ScenarioConfig):
             config_dict['cross_days'],
             config_dict['timelimit'],
             config_dict['k_bests'],
+            config_dict.get('time_grid'),
         )
 
     def get_child_model_config(self, model_start_date_dt: datetime) -> ModelConfig:
@@ -56,4 +59,5 @@ class ParentScenarioConfig(ScenarioConfig):
             start_date=model_start_date_dt,
             timelimit=self.timelimit,
             k_bests=self.k_bests,
+            time_grid=[tuple(segment) for segment in self.time_grid] if self.time_grid else None,
         )
\ No newline at end of file
@@ -1,12 +1,14 @@
 import os
 import shutil
 from datetime import datetime
-from typing import Union, List
+from typing import Union, List, Optional
 
 import pandas as pd
 
 from src.smp_dash.main_old import ModelDash
+from src.smp_model.excel_cache import read_excel_cached
 from src.smp_model.main import run_model
+from src.smp_model.output_store import has_output_table, read_output_table
 from src.smp_scenario.parent_scenario_config import ParentScenarioConfig
 from src.smp_scenario.scenario_config import ScenarioConfig
 
@@ -40,6 +42,9 @@ class Scenario:
         self.vessels_df = pd.DataFrame
         self.speed_decrease_df = pd.DataFrame
 
+        # Перемещения из решения модели до корректировки (для начального решения следующего сценария цепочки)
+        self.solution_departures_df: Optional[pd.DataFrame] = None
+
     @property
     def ports_dict(self):
         if not len(self.ports_df):
@@ -82,12 +87,15 @@ class Scenario:
         """
         if other_scenario is None:
             other_scenario = self
-        with pd.ExcelFile(os.path.join(other_scenario.input_folder_path, 'model_data.xlsx')) as reader:
-            self.ports_df = pd.read_excel(reader, sheet_name='points')
-            self.edges_df = pd.read_excel(reader, sheet_name='edges')
-            self.icebreakers_df = pd.read_excel(reader, sheet_name='icebreakers')
-            self.vessels_df = pd.read_excel(reader, sheet_name='vessels')
-            self.speed_decrease_df = pd.read_excel(reader, sheet_name='speed_decrease')
+        model_data = read_excel_cached(
+            os.path.join(other_scenario.input_folder_path, 'model_data.xlsx'),
+            ['points', 'edges', 'icebreakers', 'vessels', 'speed_decrease'],
+        )
+        self.ports_df = model_data['points']
+        self.edges_df = model_data['edges']
+        self.icebreakers_df = model_data['icebreakers']
+        self.vessels_df = model_data['vessels']
+        self.speed_decrease_df = model_data['speed_decrease']
 
     def save_input_objects_to_folder(self):
         """
@@ -129,11 +137,10 @@ class Scenario:
         """
         Обновление входных данных на основе выходных данных другого сценария
         """
-        if not os.path.exists(os.path.join(prev_scenario.output_folder_path, 'departures.xlsx')):
-            raise FileNotFoundError('Не найден выходной файл departures.xlsx в предыдущем сценарии.')
+        if not has_output_table(prev_scenario.output_folder_path, 'departures'):
+            raise FileNotFoundError('Не найдены выходные данные departures в предыдущем сценарии.')
 
-        with pd.ExcelFile(os.path.join(prev_scenario.output_folder_path, 'departures.xlsx')) as reader:
-            departures_df = pd.read_excel(reader, sheet_name='Sheet1')
+        departures_df = read_output_table(prev_scenario.output_folder_path, 'departures')
 
         # Отправления, которые пересекают дату начала планирования текущего сценария
         cross_start_departures_df = departures_df[
@@ -185,16 +192,19 @@ class Scenario:
             if self.icebreakers_df.at[row.Index, 'date_start'] < self.config.start_date_dt:
                 self.icebreakers_df.at[row.Index, 'date_start'] = self.config.start_date_dt
 
-    def run_optimization(self):
+    def run_optimization(self, prev_scenario: 'Scenario' = None):
         """
-        Запуск оптимизации СМП на данных сценария
+        Запуск оптимизации СМП на данных сценария. Решение предыдущего сценария цепочки (если есть)
+        используется как начальное
         """
         model_config = self.config.get_model_config()
-        run_model(
+        model = run_model(
             self.input_folder_path,
             self.output_folder_path,
             model_config,
+            prev_scenario.solution_departures_df if prev_scenario is not None else None,
         )
+        self.solution_departures_df = model.solution_departures_df
 
     def optimize(self):
         self.run_optimization()
@@ -1,4 +1,5 @@
 import json
+import math
 import os
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -17,9 +18,10 @@ class ScenarioConfig:
         'cross_days',
         'timelimit',
         'k_bests',
+        'time_grid',
     )
 
-    def __init__(self, start_date, duration_days, interval_hours, cross_days, timelimit, k_bests):
+    def __init__(self, start_date, duration_days, interval_hours, cross_days, timelimit, k_bests, time_grid=None):
         # Дата начала построения графика движения
         self.start_date: str = start_date
         # Количество дней планирования
@@ -31,6 +33,8 @@ class ScenarioConfig:
 
         self.timelimit: int = timelimit
         self.k_bests: int = k_bests
+        # Неравномерная сетка времени: список [длительность участка в часах, шаг в часах] (None - равномерная сетка)
+        self.time_grid: list = time_grid
 
     @classmethod
     def create_from_dict(cls, config_dict: dict) -> 'ScenarioConfig':
@@ -44,8 +48,30 @@ class ScenarioConfig:
             config_dict['cross_days'],
             config_dict['timelimit'],
             config_dict['k_bests'],
+            config_dict.get('time_grid'),
         )
 
+    @staticmethod
+    def parse_time_grid(time_grid: str) -> list:
+        """
+        Разбор сетки времени из строки вида "48:1,72:3,0:6" (длительность участка в часах:шаг в часах).
+        ValueError - некорректная строка
+        """
+        if not time_grid:
+            return None
+        steps = []
+        for segment in time_grid.split(','):
+            try:
+                segment_hours, step = (float(x) for x in segment.split(':'))
+            except ValueError:
+                raise ValueError(f'Участок сетки времени "{segment}" должен иметь вид длительность:шаг')
+            if not (math.isfinite(segment_hours) and math.isfinite(step)) or segment_hours < 0 or step <= 0:
+                raise ValueError(
+                    f'Участок сетки времени "{segment}": длительность должна быть неотрицательной, шаг - положительным'
+                )
+            steps.append([segment_hours, step])
+        return steps
+
     @property
     def start_date_dt(self):
         return datetime.strptime(self.start_date, '%d-%m-%Y')
@@ -87,6 +113,7 @@ class ScenarioConfig:
             start_date=self.start_date_dt,
             timelimit=self.timelimit,
             k_bests=self.k_bests,
+            time_grid=[tuple(segment) for segment in self.time_grid] if self.time_grid else None,
         )
 
 